@@ -0,0 +1,214 @@
+# analyze_levels.py
+#
+# Monte Carlo difficulty analysis of generated levels. Generates many levels
+# per generation config on all cores and writes aggregate statistics, e.g.
+#   python analyze_levels.py --levels 2 4 --rooms 3 5 8 --samples 2000
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import statistics
+from collections import deque
+from multiprocessing import Pool
+
+from config import (
+    TILE_SIZE, ROOM_COUNT, MAX_ROOM_SIZE, DOOR_COUNT, POINT_COUNT
+)
+from game_logic import setup_level
+from entities import ItemType
+
+METRICS = ("route_length", "dead_ends", "floor_tiles", "enemy_density",
+           "attempts", "gen_seconds")
+
+# -------------------------------------------------------------------------
+# Level metrics
+# -------------------------------------------------------------------------
+def bfs_distances(maze, start, keys):
+    """Distance map (flat list, -1 = unreachable) from start with a keys bitmask."""
+    h=len(maze)
+    w=len(maze[0])
+    dist=[-1]*(w*h)
+    sx,sy=start
+    dist[sy*w+sx]=0
+    queue=deque([(sx,sy)])
+    while queue:
+        cx,cy=queue.popleft()
+        d=dist[cy*w+cx]+1
+        for nx,ny in ((cx-1,cy),(cx+1,cy),(cx,cy-1),(cx,cy+1)):
+            if 0<=nx<w and 0<=ny<h and dist[ny*w+nx]<0:
+                tv=maze[ny][nx]
+                if tv==1 or (tv>=2 and not keys>>(tv-2) & 1):
+                    continue
+                dist[ny*w+nx]=d
+                queue.append((nx,ny))
+    return dist
+
+def route_length(maze, items, start=(1,1)):
+    """
+    Greedy nearest-neighbour tour (in tiles) that collects every point and
+    key, respecting doors, and then walks to the portal. Returns -1 if the
+    tour gets stuck.
+    """
+    w=len(maze[0])
+    todo=[]
+    portal=None
+    for it in items:
+        tile=(int(it.x//TILE_SIZE), int(it.y//TILE_SIZE))
+        if it.kind==ItemType.PORTAL:
+            portal=tile
+        else:
+            todo.append((tile, it.key if it.kind==ItemType.KEY else -1))
+    keys=0
+    pos=start
+    total=0
+    while todo:
+        dist=bfs_distances(maze, pos, keys)
+        best=None
+        for i,((tx,ty),_key) in enumerate(todo):
+            d=dist[ty*w+tx]
+            if d>=0 and (best is None or d<best[0]):
+                best=(d,i)
+        if best is None:
+            return -1
+        d,i=best
+        pos,key=todo.pop(i)
+        total+=d
+        if key>=0:
+            keys|=1<<key
+    if portal:
+        d=bfs_distances(maze, pos, keys)[portal[1]*w+portal[0]]
+        if d<0:
+            return -1
+        total+=d
+    return total
+
+def count_dead_ends(maze):
+    h=len(maze)
+    w=len(maze[0])
+    dead=0
+    for y in range(1,h-1):
+        row=maze[y]
+        for x in range(1,w-1):
+            if row[x]==1:
+                continue
+            open_sides=(row[x-1]!=1)+(row[x+1]!=1)+(maze[y-1][x]!=1)+(maze[y+1][x]!=1)
+            if open_sides==1:
+                dead+=1
+    return dead
+
+def analyze_one(task):
+    """Generate one level for (config, level, seed) and measure it."""
+    config, level, seed = task
+    random.seed(seed)
+    stats={}
+    t0=time.perf_counter()
+    maze, items, _bg, enemies, _fog, _p, _k, _nav = setup_level(level, nav=False,
+                                                                stats=stats, **config)
+    gen_seconds=time.perf_counter()-t0
+    floor=sum(1 for row in maze for tv in row if tv!=1)
+    return {
+        "route_length": route_length(maze, items),
+        "dead_ends": count_dead_ends(maze),
+        "floor_tiles": floor,
+        "enemy_density": 100.0*len(enemies)/floor,  # enemies per 100 floor tiles
+        "attempts": stats["attempts"],
+        "gen_seconds": gen_seconds,
+    }
+
+# -------------------------------------------------------------------------
+# Aggregation
+# -------------------------------------------------------------------------
+def summarize(values):
+    values=sorted(values)
+    n=len(values)
+    return {
+        "mean": statistics.fmean(values),
+        "stdev": statistics.stdev(values) if n>1 else 0.0,
+        "min": values[0],
+        "p50": values[n//2],
+        "p90": values[min(n-1, int(n*0.9))],
+        "max": values[-1],
+    }
+
+def run_analysis(configs, levels, samples, workers=None, seed=0):
+    """
+    Analyze `samples` levels for every (config, level) pair in parallel.
+    Returns a JSON-serialisable report.
+    """
+    tasks=[]
+    for ci,config in enumerate(configs):
+        for level in levels:
+            for s in range(samples):
+                tasks.append((ci, level, (config, level, hash((seed, ci, level, s)))))
+    workers=workers or os.cpu_count()
+    t0=time.perf_counter()
+    results={}
+    with Pool(workers) as pool:
+        chunk=max(1, len(tasks)//(workers*16))
+        measured=pool.imap(analyze_one, [t[2] for t in tasks], chunksize=chunk)
+        for (ci,level,_task),m in zip(tasks, measured):
+            results.setdefault((ci,level), []).append(m)
+    wall=time.perf_counter()-t0
+
+    report={
+        "samples_per_config": samples,
+        "workers": workers,
+        "seconds": wall,
+        "levels_per_sec": len(tasks)/wall if wall>0 else 0.0,
+        "configs": [],
+    }
+    for (ci,level),rows in sorted(results.items()):
+        entry={"config": configs[ci], "level": level}
+        stuck=sum(1 for r in rows if r["route_length"]<0)
+        for name in METRICS:
+            vals=[r[name] for r in rows if not (name=="route_length" and r[name]<0)]
+            if vals:
+                entry[name]=summarize(vals)
+        entry["unfinished_routes"]=stuck
+        report["configs"].append(entry)
+    return report
+
+# -------------------------------------------------------------------------
+def parse_args(argv=None):
+    parser=argparse.ArgumentParser(description="Monte Carlo level difficulty analysis.")
+    parser.add_argument("--levels", type=int, nargs="+", default=[2])
+    parser.add_argument("--rooms", type=int, nargs="+", default=[ROOM_COUNT],
+                        help="ROOM_COUNT values to try")
+    parser.add_argument("--room-size", type=int, nargs="+", default=[MAX_ROOM_SIZE],
+                        help="MAX_ROOM_SIZE values to try")
+    parser.add_argument("--doors", type=int, nargs="+", default=[DOOR_COUNT],
+                        help="DOOR_COUNT values to try")
+    parser.add_argument("--points", type=int, nargs="+", default=[POINT_COUNT],
+                        help="POINT_COUNT values to try")
+    parser.add_argument("--samples", type=int, default=1000,
+                        help="levels per config and level (default: %(default)s)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="level_stats.json")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args=parse_args(argv)
+    configs=[
+        {"room_count": r, "max_room_size": s, "door_count": d, "point_count": p}
+        for r,s,d,p in itertools.product(args.rooms, args.room_size, args.doors, args.points)
+    ]
+    report=run_analysis(configs, args.levels, args.samples, args.workers, args.seed)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    for entry in report["configs"]:
+        route=entry.get("route_length", {})
+        print(f"level {entry['level']} {entry['config']}: "
+              f"route {route.get('mean', 0):.1f} (p90 {route.get('p90', 0)}), "
+              f"dead ends {entry['dead_ends']['mean']:.1f}, "
+              f"attempts {entry['attempts']['mean']:.2f}")
+    print(f"{report['levels_per_sec']:.1f} levels/s on {report['workers']} workers "
+          f"-> {args.output}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,654 @@
+# benchmarks.py
+#
+# Micro-benchmarks for the game's hot paths. Run from this directory:
+#   python benchmarks.py            (all)
+#   python benchmarks.py movement   (one)
+
+import sys
+import time
+import random
+import argparse
+
+from config import TILE_SIZE, PLAYER_SPEED
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    def deco(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return deco
+
+def time_per_call(fn, number=10000, repeat=5):
+    """Best-of-`repeat` seconds per call of fn()."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - t0)
+    return best / number
+
+def report(label, seconds):
+    if seconds < 1e-3:
+        print(f"  {label:<44} {seconds*1e6:10.3f} us")
+    else:
+        print(f"  {label:<44} {seconds*1e3:10.3f} ms")
+
+# -------------------------------------------------------------------------
+def _legacy_move(player_x, player_y, vel_x, vel_y, maze, keys):
+    """The old centre-point movement step, kept here for comparison."""
+    from game_logic import tile_passable_with_ghost
+    tx=int((player_x+vel_x)//TILE_SIZE)
+    ty=int(player_y//TILE_SIZE)
+    if tile_passable_with_ghost(maze, tx, ty, keys, False, False):
+        player_x+=vel_x
+    tx=int(player_x//TILE_SIZE)
+    ty=int((player_y+vel_y)//TILE_SIZE)
+    if tile_passable_with_ghost(maze, tx, ty, keys, False, False):
+        player_y+=vel_y
+    return player_x, player_y
+
+@benchmark("movement")
+def bench_movement(args):
+    from game_logic import (
+        create_level_until_valid, tile_passable_with_ghost,
+        PassabilityMask, move_player_with_diagonal
+    )
+    random.seed(args.seed)
+    maze, _items = create_level_until_valid(2)
+    keys = 0
+    mask = PassabilityMask(maze, keys)
+    px = py = 1.5*TILE_SIZE
+
+    # A single passable() call is no faster than the legacy check (method
+    # call plus bounds test). What the mask buys is the AABB step below,
+    # which ANDs the flags of every overlapped tile: one axis of it costs
+    # less than the legacy step; a diagonal costs more but tests the box.
+    report("tile_passable_with_ghost (legacy)",
+           time_per_call(lambda: tile_passable_with_ghost(
+               maze, 3, 1, keys, False, False), args.number))
+    report("PassabilityMask.passable",
+           time_per_call(lambda: mask.passable(3, 1), args.number))
+
+    report("move step, legacy centre point, diagonal",
+           time_per_call(lambda: _legacy_move(
+               px, py, PLAYER_SPEED, PLAYER_SPEED, maze, keys), args.number))
+    # The AABB movement step: free, blocked by a wall, and diagonal.
+    report("move step, free axis",
+           time_per_call(lambda: move_player_with_diagonal(
+               px, py, PLAYER_SPEED, 0, mask, False, False), args.number))
+    report("move step, blocked axis",
+           time_per_call(lambda: move_player_with_diagonal(
+               px, py, -PLAYER_SPEED, 0, mask, False, False), args.number))
+    report("move step, diagonal",
+           time_per_call(lambda: move_player_with_diagonal(
+               px, py, PLAYER_SPEED, PLAYER_SPEED, mask, False, False), args.number))
+    report("PassabilityMask.update_keys",
+           time_per_call(lambda: mask.update_keys(keys), args.number//10))
+
+# -------------------------------------------------------------------------
+def _alloc_bytes(factory, count):
+    """Bytes allocated per object created by factory(i), via tracemalloc."""
+    import tracemalloc
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # subtract the holding list itself
+    return (after - before - sys.getsizeof(objs)) / count
+
+@benchmark("entities")
+def bench_entities(args):
+    from entities import Item, Enemy, ItemType
+    from enemies import move_enemies, check_enemy_collision
+    count = args.entities
+    print(f"  memory per entity ({count} objects):")
+    report_bytes = lambda label, b: print(f"  {label:<44} {b:10.1f} B")
+    report_bytes("item as [px, py, 'key0'] list",
+                 _alloc_bytes(lambda i: [i*32+16, 48, "key"+str(i % 3)], count))
+    report_bytes("Item (__slots__)",
+                 _alloc_bytes(lambda i: Item(i*32+16, 48, ItemType.KEY, i % 3), count))
+    report_bytes("enemy as dict",
+                 _alloc_bytes(lambda i: {'x': i*1.5, 'y': 48.5, 'dx': 1, 'dy': -1,
+                                         'dir_change_cooldown': 1.5}, count))
+    report_bytes("Enemy (__slots__)",
+                 _alloc_bytes(lambda i: Enemy(i*1.5, 48.5, 1, -1, 1.5), count))
+
+    random.seed(args.seed)
+    enemies = [Enemy(random.uniform(0, 1500), random.uniform(0, 800), 1, 1,
+                     random.uniform(1.0, 3.0)) for _ in range(count)]
+    items = [Item(random.randrange(1536), random.randrange(864),
+                  ItemType(random.randrange(3)), random.randrange(3))
+             for _ in range(count)]
+    px, py = 48.0, 48.0
+    r_sq = (TILE_SIZE//2)**2
+
+    def pickup_scan():
+        # the per-frame part of the pickup loop in main.py
+        for it in items:
+            dx = px-it.x
+            dy = py-it.y
+            if dx*dx+dy*dy < r_sq and it.kind == ItemType.KEY:
+                pass
+
+    frames = max(1, args.number // 1000)
+    print(f"  per-frame time with {count} entities:")
+    report("move_enemies", time_per_call(lambda: move_enemies(enemies, 1/60), frames))
+    report("check_enemy_collision",
+           time_per_call(lambda: check_enemy_collision(-999, -999, enemies), frames))
+    report("item pickup scan", time_per_call(pickup_scan, frames))
+    try:
+        import pygame
+        from rendering import draw_items, draw_enemies, ItemLayer
+    except ImportError:
+        print("  (pygame not installed: skipping draw timings)")
+        return
+    from camera import Camera
+    screen = pygame.Surface((1536, 864))
+    camera = Camera(1536, 864, 48, 27)
+    report("draw_items", time_per_call(
+        lambda: draw_items(screen, items, camera, points_in_level=1), frames))
+    layer = ItemLayer(items, 1)
+    report("cached item layer", time_per_call(
+        lambda: layer.draw(screen, camera), frames))
+    # a typical level: a handful of points and keys
+    from game_logic import setup_level
+    _maze, level_items, _bg, _e, _fog, _p, _k, _nav = setup_level(3)
+    level_layer = ItemLayer(level_items, 1)
+    print(f"  a level 3 layout ({len(level_items)} items, "
+          f"SurfaceCanvas switches at {ItemLayer.MIN_ITEMS}):")
+    report("draw_items", time_per_call(
+        lambda: draw_items(screen, level_items, camera, points_in_level=1), frames))
+    report("cached item layer", time_per_call(
+        lambda: level_layer.draw(screen, camera), frames))
+    report("draw_enemies", time_per_call(
+        lambda: draw_enemies(screen, enemies, camera), frames))
+
+# -------------------------------------------------------------------------
+@benchmark("viewport")
+def bench_viewport(args):
+    try:
+        import pygame
+    except ImportError:
+        print("  (pygame not installed: skipping)")
+        return
+    from game_logic import setup_level
+    from rendering import draw_maze, draw_items, draw_enemies
+    from camera import Camera
+    random.seed(args.seed)
+    screen = pygame.Surface((1920, 1080))
+    frames = max(1, args.number // 1000)
+    for size in ((48, 27), (500, 500)):
+        maze, items, _bg, enemies, _fog, _p, _k, _nav = setup_level(6, size, nav=False)
+        camera = Camera(1920, 1080, *size)
+        camera.follow(size[0]*TILE_SIZE//2, size[1]*TILE_SIZE//2)
+        def frame():
+            draw_maze(screen, maze, camera)
+            draw_items(screen, items, camera)
+            draw_enemies(screen, enemies, camera)
+        report(f"maze+items+enemies frame, {size[0]}x{size[1]}",
+               time_per_call(frame, frames))
+
+# -------------------------------------------------------------------------
+@benchmark("chunks")
+def bench_chunks(args):
+    from chunks import ChunkedWorld, CHUNK_SIZE
+    import tracemalloc
+
+    def walk(world):
+        # walk east across 100 chunks, a quarter chunk per update
+        for step in range(0, 100*CHUNK_SIZE, CHUNK_SIZE//4):
+            world.update_around(step, 1)
+
+    for load_radius in (1, 2):
+        world = ChunkedWorld(args.seed, load_radius=load_radius,
+                             keep_radius=load_radius+1)
+        t0 = time.perf_counter()
+        walk(world)
+        elapsed = time.perf_counter()-t0
+        st = world.stats()
+        # second pass under tracemalloc for the memory peak only
+        tracemalloc.start()
+        walk(ChunkedWorld(args.seed, load_radius=load_radius,
+                          keep_radius=load_radius+1))
+        _cur, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  load radius {load_radius}: {st['resident_chunks']} resident chunks, "
+              f"{st['tile_bytes']/1024:.0f} KiB tiles, peak {peak/1024:.0f} KiB traced, "
+              f"{st['generated']} generated / {st['evicted']} evicted")
+        print(f"    chunk generation {st['gen_ms_mean']:.2f} ms mean, "
+              f"{st['gen_ms_p99']:.2f} ms p99; 100-chunk walk {elapsed*1000:.0f} ms")
+
+# -------------------------------------------------------------------------
+@benchmark("generators")
+def bench_generators(args):
+    import tracemalloc
+    from maze import MAZE_GENERATORS, iter_eller_rows
+    sizes = [(48, 27), (256, 256), (1024, 1024), (4096, 4096)]
+    sizes = [s for s in sizes if max(s) <= args.max_size]
+    print(f"  {'algorithm':<12} {'size':>10} {'Mcells/s':>9} {'peak MiB':>9}")
+    for name, gen in MAZE_GENERATORS.items():
+        for w, h in sizes:
+            random.seed(args.seed)
+            t0 = time.perf_counter()
+            maze = gen(w, h)
+            elapsed = time.perf_counter()-t0
+            del maze
+            tracemalloc.start()
+            random.seed(args.seed)
+            maze = gen(w, h)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            del maze
+            print(f"  {name:<12} {f'{w}x{h}':>10} {w*h/elapsed/1e6:9.2f} {peak/2**20:9.3f}")
+    # Eller consumed as a stream: memory stays O(width)
+    for w, h in sizes:
+        t0 = time.perf_counter()
+        for _row in iter_eller_rows(w, h):
+            pass
+        elapsed = time.perf_counter()-t0
+        tracemalloc.start()
+        for _row in iter_eller_rows(w, h):
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"  {'eller/stream':<12} {f'{w}x{h}':>10} {w*h/elapsed/1e6:9.2f} {peak/2**20:9.3f}")
+
+# -------------------------------------------------------------------------
+def _legacy_spawn(maze, count, tries_limit=5000):
+    """The old rejection-sampling spawn loop, kept here for comparison."""
+    h = len(maze)
+    w = len(maze[0])
+    found = []
+    tries = 0
+    while len(found) < count and tries < tries_limit:
+        tries += 1
+        tx = random.randint(1, w-2)
+        ty = random.randint(1, h-2)
+        if maze[ty][tx] == 0:
+            found.append((tx, ty))
+    return found
+
+@benchmark("spawning")
+def bench_spawning(args):
+    from maze import generate_maze, carve_rooms, free_floor_tiles, take_random_tiles
+    random.seed(args.seed)
+    dense = generate_maze(48, 27)
+    carve_rooms(dense, room_count=12, max_room_size=8)
+    # sparse: a large grid with ~0.2% floor
+    sparse = [[1]*400 for _ in range(400)]
+    for _ in range(300):
+        sparse[random.randint(1, 398)][random.randint(1, 398)] = 0
+    count = 16
+    for label, maze in (("dense 48x27", dense), ("sparse 400x400", sparse)):
+        floor = sum(row.count(0) for row in maze)
+        got = len(_legacy_spawn(maze, count))
+        print(f"  {label}: {floor} floor tiles, spawning {count} (legacy got {got})")
+        n = max(1, args.number // 100)
+        report("rejection loop (legacy)",
+               time_per_call(lambda: _legacy_spawn(maze, count), n))
+        report("free_floor_tiles scan",
+               time_per_call(lambda: free_floor_tiles(maze), n))
+        free = free_floor_tiles(maze)
+        report("take_random_tiles from prebuilt list",
+               time_per_call(lambda: take_random_tiles(list(free), count), n))
+    report("carve_rooms, 5 rooms (slice writes)",
+           time_per_call(lambda: carve_rooms([[1]*48 for _ in range(27)]), args.number//10))
+
+# -------------------------------------------------------------------------
+@benchmark("navigation")
+def bench_navigation(args):
+    from game_logic import create_level_until_valid
+    from navigation import NavCache
+    random.seed(args.seed)
+    maze, items = create_level_until_valid(4)
+    report("NavCache build (all key states)",
+           time_per_call(lambda: NavCache(maze, items), 5, 3))
+    nav = NavCache(maze, items)
+    floor = [(x, y) for y, row in enumerate(maze) for x, tv in enumerate(row) if tv != 1]
+    a, b = floor[len(floor)//3], floor[2*len(floor)//3]
+    report("distance(start, tile), field lookup",
+           time_per_call(lambda: nav.distance((1, 1), b, 7), args.number))
+    report("lower_bound(tile, tile), ALT",
+           time_per_call(lambda: nav.lower_bound(a, b, 7), args.number))
+    report("distance(tile, tile), first A* query",
+           time_per_call(lambda: (nav.pair_cache.clear(), nav.distance(a, b, 7)), 200))
+    report("distance(tile, tile), memoised",
+           time_per_call(lambda: nav.distance(a, b, 7), args.number))
+    print(f"  {len(nav.fields)} fields, {len(nav.to_bytes())/1024:.0f} KiB persisted")
+
+# -------------------------------------------------------------------------
+def _state_space_valid(maze, items):
+    """Reference validation: BFS over (tile, held-keys) states."""
+    from collections import deque
+    from entities import ItemType
+    w = len(maze[0])
+    key_at = {}
+    for it in items:
+        if it.kind == ItemType.KEY:
+            key_at[(int(it.x//TILE_SIZE), int(it.y//TILE_SIZE))] = 1 << it.key
+    seen = {(1, 1, 0)}
+    queue = deque(seen)
+    reached = set()
+    while queue:
+        x, y, keys = queue.popleft()
+        reached.add(y*w+x)
+        keys |= key_at.get((x, y), 0)
+        for nx, ny in ((x-1, y), (x+1, y), (x, y-1), (x, y+1)):
+            tv = maze[ny][nx]
+            if tv == 1 or (tv >= 2 and not keys >> (tv-2) & 1):
+                continue
+            if (nx, ny, keys) not in seen:
+                seen.add((nx, ny, keys))
+                queue.append((nx, ny, keys))
+    return len(seen)
+
+@benchmark("keys")
+def bench_keys(args):
+    from game_logic import create_level_until_valid, is_level_valid
+    for size in ((48, 27), (96, 54)):
+        for key_types in (3, 8, 16, 32):
+            random.seed(args.seed)
+            stats = {}
+            t0 = time.perf_counter()
+            maze, items = create_level_until_valid(2, *size, door_count=key_types,
+                                                   key_types=key_types, stats=stats)
+            gen = time.perf_counter()-t0
+            n = max(1, args.number // 200)
+            label = f"{size[0]}x{size[1]}, {key_types} key types"
+            report(f"is_level_valid, {label}",
+                   time_per_call(lambda: is_level_valid(maze, items), n, 3))
+            if key_types <= 8:
+                t0 = time.perf_counter()
+                states = _state_space_valid(maze, items)
+                report(f"  (tile, keys) state BFS, {states} states", time.perf_counter()-t0)
+            print(f"  generated in {gen*1e3:.0f} ms, {stats['attempts']} attempts")
+
+# -------------------------------------------------------------------------
+@benchmark("fov")
+def bench_fov(args):
+    from game_logic import setup_level, update_fog_of_war_permanent
+    from fov import FieldOfView
+    size = min(args.max_size, 500)
+    random.seed(args.seed)
+    maze, _items, _bg, _e, _fog, _p, _k, _nav = setup_level(6, (size, size), nav=False)
+    room = [[0]*size for _ in range(size)]   # worst case: nothing blocks sight
+    discovered = [[False]*size for _ in range(size)]
+    for name, grid in (("maze", maze), ("open room", room)):
+        # tiles the player might step onto
+        floor = [(x, y) for y, row in enumerate(grid) for x, tv in enumerate(row) if tv != 1]
+        walk = random.sample(floor, min(200, len(floor)))
+        print(f"  {size}x{size} {name}, per move:")
+        for radius in (5, 10, 15, 20):
+            fov = FieldOfView(grid, radius)
+            it = iter(walk*1000)
+            def move():
+                fov.cache.clear()
+                fov.visible(*next(it))
+            report(f"shadowcast r={radius}, new tile", time_per_call(move, len(walk), 3))
+            it = iter(walk*1000)
+            report(f"shadowcast r={radius}, cached tile",
+                   time_per_call(lambda: fov.visible(*next(it)), len(walk), 3))
+            it = iter(walk*1000)
+            report(f"radius disc r={radius} (no line of sight)", time_per_call(
+                lambda: update_fog_of_war_permanent(
+                    discovered, *[(c+0.5)*TILE_SIZE for c in next(it)], radius), len(walk), 3))
+
+# -------------------------------------------------------------------------
+@benchmark("visibility")
+def bench_visibility(args):
+    from game_logic import (
+        setup_level, update_fog_of_war_permanent, update_fog_of_war_ephemeral
+    )
+    from fov import VisibilityTable
+    random.seed(args.seed)
+    for size in ((48, 27), (100, 100)):
+        maze, _items, _bg, _e, _fog, _p, _k, _nav = setup_level(6, size, nav=False)
+        w, h = size
+        floor = [(x, y) for y, row in enumerate(maze) for x, tv in enumerate(row) if tv != 1]
+        walk = random.sample(floor, min(200, len(floor)))
+        print(f"  {w}x{h}, {len(floor)} floor tiles:")
+        for los in (False, True):
+            name = "line of sight" if los else "radius"
+            t0 = time.perf_counter()
+            table = VisibilityTable(maze, 5, los)
+            table.fill()
+            report(f"fill table ({name})", time.perf_counter()-t0)
+            print(f"  {sum(len(table.to_bytes(m)) for m in table.masks if m)/1024:.0f} KiB of masks")
+        state = {"bits": 0}
+        it = iter(walk*1000)
+        def table_or():
+            state["bits"] |= table.mask(*next(it))
+            table.to_bytes(state["bits"])
+        report("level 5 update, table OR", time_per_call(table_or, len(walk), 3))
+        it = iter(walk*1000)
+        report("level 6 update, table swap", time_per_call(
+            lambda: table.to_bytes(table.mask(*next(it))), len(walk), 3))
+        discovered = [[False]*w for _ in range(h)]
+        it = iter(walk*1000)
+        report("level 5 update, radius loop", time_per_call(
+            lambda: update_fog_of_war_permanent(
+                discovered, *[(c+0.5)*TILE_SIZE for c in next(it)], 5), len(walk), 3))
+        it = iter(walk*1000)
+        report("level 6 update, new grid", time_per_call(
+            lambda: update_fog_of_war_ephemeral(
+                *[(c+0.5)*TILE_SIZE for c in next(it)], 5, w, h), len(walk), 3))
+
+# -------------------------------------------------------------------------
+@benchmark("levelfile")
+def bench_levelfile(args):
+    import os
+    import tempfile
+    from game_logic import setup_level
+    from levelfile import LevelFile
+    size = min(args.max_size, 500)
+    random.seed(args.seed)
+    fd, path = tempfile.mkstemp(suffix=".cglv")
+    os.close(fd)
+    try:
+        t0 = time.perf_counter()
+        setup_level(6, (size, size), nav=False, export=path)
+        report(f"generate+export {size}x{size}", time.perf_counter()-t0)
+        print(f"  file size {os.path.getsize(path)/1024:.0f} KiB")
+        n = max(1, args.number // 1000)
+        report(f"setup_level from file {size}x{size}", time_per_call(
+            lambda: setup_level(6, nav=False, level_file=path), n, 3))
+        lf = LevelFile.open(path)
+        report("rows() (zero-copy)", time_per_call(lf.rows, n, 3))
+        report("maze() (list copy)", time_per_call(lf.maze, n, 3))
+        del lf
+    finally:
+        os.remove(path)
+
+# -------------------------------------------------------------------------
+@benchmark("fogrelight")
+def bench_fogrelight(args):
+    from game_logic import update_fog_of_war_ephemeral
+    from fov import disc_tiles
+    random.seed(args.seed)
+    for w, h in ((48, 27), (min(args.max_size, 500),)*2):
+        print(f"  {w}x{h}:")
+        walk = [(random.randrange(w), random.randrange(h)) for _ in range(200)]
+        it = iter(walk*1000)
+        report("level 6 fog update, new grid", time_per_call(
+            lambda: update_fog_of_war_ephemeral(
+                *[(c+0.5)*TILE_SIZE for c in next(it)], 5, w, h), len(walk), 3))
+        # what GameSession._update_fog does: unset the last view, set the new one
+        grid = [[False]*w for _ in range(h)]
+        state = {"lit": ()}
+        def relight():
+            for i in state["lit"]:
+                grid[i//w][i%w] = False
+            state["lit"] = disc_tiles(*next(it), 5, w, h)
+            for i in state["lit"]:
+                grid[i//w][i%w] = True
+        it = iter(walk*1000)
+        report("level 6 fog update, one grid relit", time_per_call(relight, len(walk), 3))
+
+def _headless_pygame(size):
+    import os
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    pygame.init()
+    return pygame.display.set_mode(size)
+
+@benchmark("scenes")
+def bench_scenes(args):
+    try:
+        import pygame
+    except ImportError:
+        print("  (pygame not installed: skipping)")
+        return
+    from types import SimpleNamespace
+    from scenes import MenuScene
+    from layout import Layout, layout_menu_buttons
+    from rendering import SurfaceCanvas
+    from utils import draw_button
+    screen = _headless_pygame((1920, 1080))
+    canvas = SurfaceCanvas.for_surface(screen)
+    font = pygame.font.SysFont(None, 32)
+    game = SimpleNamespace(canvas=canvas, font=font, profile={"display_mode": "maximized"},
+                           current_user="bench", data={"profiles": {}},
+                           layout=Layout(1920, 1080))
+    scene = MenuScene(game)
+    labels = ["Start Game","Select Level","Options","Game Rules","Exit","Switch User"]
+    # a click below the last button: every button is tested, none is hit
+    miss = (960, 1000)
+    event = pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=miss)
+
+    def legacy_click():
+        # the old loop: rebuild labels and rects, then test each rect
+        buttons = layout_menu_buttons(1920, 1080, list(labels))
+        for label, rect in buttons:
+            if rect.collidepoint(miss):
+                break
+
+    def legacy_render():
+        title = font.render("MAIN MENU", True, (255,255,255))
+        screen.blit(title, title.get_rect(center=(960, 80)))
+        user = font.render("Current user: bench", True, (255,255,255))
+        screen.blit(user, user.get_rect(center=(960, 130)))
+        for label, rect in layout_menu_buttons(1920, 1080, list(labels)):
+            draw_button(screen, rect, label, font)
+
+    scene.ensure_layout()
+    report("menu click, layout + linear hit test (legacy)",
+           time_per_call(legacy_click, args.number))
+    report("menu click, Scene.handle_event",
+           time_per_call(lambda: scene.handle_event(event), args.number))
+    frames = max(1, args.number // 100)
+    report("menu render, per-frame layout + text (legacy)",
+           time_per_call(legacy_render, frames))
+    report("menu render, MenuScene.draw",
+           time_per_call(lambda: scene.draw(canvas), frames))
+
+@benchmark("backbuffer")
+def bench_backbuffer(args):
+    try:
+        import pygame
+    except ImportError:
+        print("  (pygame not installed: skipping)")
+        return
+    from game_logic import setup_level
+    from rendering import draw_maze, draw_items, draw_enemies, SurfaceCanvas
+    from camera import Camera
+    from layout import Layout
+    screen = _headless_pygame((1, 1))
+    screen = pygame.Surface((3840, 2160))
+    random.seed(args.seed)
+    maze, items, _bg, enemies, _fog, _p, _k, _nav = setup_level(6, (500, 500), nav=False)
+    frames = max(1, args.number // 2000)
+    for render_height in (None, 1080, 540):
+        lay = Layout(3840, 2160, render_height)
+        camera = Camera(*lay.view_size, 500, 500)
+        camera.follow(250*TILE_SIZE, 250*TILE_SIZE)
+        if lay.scale > 1:
+            buffer = pygame.Surface(lay.view_size)
+            scaled = screen.subsurface(lay.maze_rect)
+        else:
+            buffer = screen
+        label = "native" if lay.scale == 1 else f"{lay.view_size[0]}x{lay.view_size[1]} x{lay.scale}"
+        # no fog, and level-6 style fog (only a small radius visible)
+        for fog_name, fog in (("", None),
+                              (", fog", lambda x, y: (x-250)**2+(y-250)**2 <= 25)):
+            def frame():
+                buffer.fill((20, 20, 20))
+                draw_maze(buffer, maze, camera, fog_check_fn=fog)
+                draw_items(buffer, items, camera, fog_check_fn=fog)
+                draw_enemies(buffer, enemies, camera, fog_check_fn=fog)
+                if buffer is not screen:
+                    pygame.transform.scale(buffer, scaled.get_size(), scaled)
+            report(f"3840x2160 frame, {label}{fog_name}", time_per_call(frame, frames))
+        if lay.scale > 1:
+            report(f"  of which the x{lay.scale} scale-up", time_per_call(
+                lambda: pygame.transform.scale(buffer, scaled.get_size(), scaled), frames))
+    capped = Layout(3840, 2160, 540, max_scale=SurfaceCanvas.MAX_SCALE)
+    print(f"  software canvas with --render-height 540 at 3840x2160: "
+          f"{capped.view_size[0]}x{capped.view_size[1]} x{capped.scale}")
+
+@benchmark("renderers")
+def bench_renderers(args):
+    try:
+        import pygame
+    except ImportError:
+        print("  (pygame not installed: skipping)")
+        return
+    from types import SimpleNamespace
+    from camera import Camera
+    from layout import Layout
+    from rendering import SurfaceCanvas
+    from scenes import GameScene
+    from session import GameSession
+    size = (1920, 1080)
+    canvases = [("software", SurfaceCanvas.for_surface(_headless_pygame(size)))]
+    try:
+        from rendering_sdl2 import TextureCanvas
+        for name, software in (("sdl2-software", True), ("sdl2", False)):
+            c = TextureCanvas("maximized", software=software)
+            c.window.size = size
+            canvases.append((name, c))
+    except (ImportError, pygame.error) as e:
+        print(f"  (sdl2 renderer unavailable: {e})")
+
+    frames = max(1, args.number // 1000)
+    for level in (2, 6):
+        session = GameSession((200, 200), nav=False)
+        session.start(level, args.seed)
+        session.player_x = session.player_y = 100*TILE_SIZE
+        session.fog_tile = None
+        session._update_fog()
+        for name, canvas in canvases:
+            layout = Layout(*size)
+            game = SimpleNamespace(canvas=canvas, font=pygame.font.SysFont(None, 32),
+                                   layout=layout, session=session, camera=Camera(*size, 0, 0),
+                                   profile=None, replay=None)
+            game.camera.set_world(200, 200)
+            scene = GameScene(game)
+            def frame():
+                canvas.fill((20, 20, 20))
+                scene.draw(canvas)
+                canvas.present()
+            report(f"level {level} frame 1920x1080, {name}", time_per_call(frame, frames))
+
+# -------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run hot-path benchmarks.")
+    parser.add_argument("names", nargs="*", help=f"one of {sorted(BENCHMARKS)}")
+    parser.add_argument("-n", "--number", type=int, default=20000,
+                        help="calls per timing run (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--max-size", type=int, default=1024,
+                        help="largest grid side for the generators benchmark (up to 4096)")
+    parser.add_argument("--entities", type=int, default=10000,
+                        help="entity count for the entities benchmark")
+    args = parser.parse_args(argv)
+    for name in args.names or BENCHMARKS:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark {name!r}")
+        print(f"[{name}]")
+        BENCHMARKS[name](args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+# bots.py
+#
+# Automated playtesting. A PathBot plays a GameSession through the same
+# per-tick inputs as a human: it walks downhill on the level's NavCache
+# distance fields towards the nearest remaining point or key (then the
+# portal) and waits when an enemy is about to cross its next tile. The
+# harness runs many bots in parallel processes, e.g.
+#   python bots.py --levels 1 2 3 4 5 6 --runs 200 --max-seconds 180
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from multiprocessing import Pool
+
+from config import TILE_SIZE, PLAYER_SPEED, TICK_RATE, MAX_LEVEL
+from entities import ItemType
+from session import (
+    GameSession, TICK_DT, EVENT_FINISHED,
+    INPUT_UP, INPUT_LEFT, INPUT_DOWN, INPUT_RIGHT
+)
+from analyze_levels import summarize
+
+DANGER_RADIUS = 1.5*TILE_SIZE   # wait if an enemy is this close to the next tile
+
+def _tile(x, y):
+    return int(x//TILE_SIZE), int(y//TILE_SIZE)
+
+class PathBot:
+    """Greedy route follower; call inputs() once per tick."""
+
+    def __init__(self, session, avoid_enemies=True):
+        self.session=session
+        self.avoid_enemies=avoid_enemies
+        self._seed=None
+        self.target=None
+
+    def _pick_target(self, here, keys):
+        s=self.session
+        nav=s.nav_cache
+        portal=None
+        best=None
+        for it in s.items:
+            if it.kind==ItemType.PORTAL:
+                portal=it
+                continue
+            d=nav.distance(here, _tile(it.x, it.y), keys)
+            if d is not None and (best is None or d<best[0]):
+                best=(d, it)
+        if best:
+            return best[1]
+        return portal
+
+    def inputs(self):
+        s=self.session
+        if s.seed!=self._seed:
+            # new level (start or after dying)
+            self._seed=s.seed
+            self.target=None
+        if self.target is None or self.target not in s.items:
+            self.target=None
+        here=_tile(s.player_x, s.player_y)
+        keys=s.keys
+        if self.target is None:
+            self.target=self._pick_target(here, keys)
+            if self.target is None:
+                return 0
+        goal=_tile(self.target.x, self.target.y)
+
+        # next tile: the neighbour one step closer to the goal
+        nxt=here
+        if here!=goal:
+            field=s.nav_cache.distance_field(goal, keys)
+            w=s.nav_cache.width
+            d=field[here[1]*w+here[0]]
+            if d>0:
+                for nx,ny in ((here[0]-1,here[1]),(here[0]+1,here[1]),
+                              (here[0],here[1]-1),(here[0],here[1]+1)):
+                    if field[ny*w+nx]==d-1:
+                        nxt=(nx,ny)
+                        break
+        cx=(nxt[0]+0.5)*TILE_SIZE
+        cy=(nxt[1]+0.5)*TILE_SIZE
+
+        if self.avoid_enemies and nxt!=here:
+            r_sq=DANGER_RADIUS**2
+            for e in s.enemies:
+                if (e.x-cx)**2+(e.y-cy)**2<r_sq:
+                    return 0
+
+        # steer towards the centre of the next tile; finish the
+        # perpendicular axis first so the footprint never clips a corner
+        dx=cx-s.player_x
+        dy=cy-s.player_y
+        half=PLAYER_SPEED/2
+        step_x=INPUT_RIGHT if dx>0 else INPUT_LEFT
+        step_y=INPUT_DOWN if dy>0 else INPUT_UP
+        if nxt[1]==here[1]:
+            # horizontal step (or already there): centre vertically first
+            if abs(dy)>half:
+                return step_y
+            return step_x if abs(dx)>half else 0
+        if abs(dx)>half:
+            return step_x
+        return step_y if abs(dy)>half else 0
+
+# -------------------------------------------------------------------------
+# Harness
+# -------------------------------------------------------------------------
+def play_one(task):
+    """Play one level (level, seed, max_ticks) with a bot and report."""
+    level, seed, max_ticks = task
+    session=GameSession(nav=True)
+    session.start(level, seed)
+    bot=PathBot(session)
+    t0=time.perf_counter()
+    completed=False
+    while session.tick<max_ticks:
+        event=session.step(bot.inputs(), TICK_DT)
+        if event==EVENT_FINISHED:
+            completed=True
+            break
+    return {
+        "completed": completed,
+        "ticks": session.tick,
+        "deaths": session.deaths,
+        "seconds": time.perf_counter()-t0,
+    }
+
+def run_playtest(levels, runs, workers=None, seed=0, max_ticks=180*TICK_RATE):
+    """Play `runs` levels per level number in parallel; JSON-able report."""
+    rng=random.Random(seed)
+    tasks=[(level, (level, rng.getrandbits(32), max_ticks))
+           for level in levels for _ in range(runs)]
+    workers=workers or os.cpu_count()
+    t0=time.perf_counter()
+    results={}
+    with Pool(workers) as pool:
+        chunk=max(1, len(tasks)//(workers*8))
+        played=pool.imap(play_one, [t[1] for t in tasks], chunksize=chunk)
+        for (level,_task),r in zip(tasks, played):
+            results.setdefault(level, []).append(r)
+    wall=time.perf_counter()-t0
+
+    total_ticks=sum(r["ticks"] for rows in results.values() for r in rows)
+    report={
+        "runs_per_level": runs,
+        "max_ticks": max_ticks,
+        "workers": workers,
+        "seconds": wall,
+        "ticks_per_sec": total_ticks/wall if wall>0 else 0.0,
+        "levels": [],
+    }
+    for level,rows in sorted(results.items()):
+        done=[r for r in rows if r["completed"]]
+        entry={
+            "level": level,
+            "completion_rate": len(done)/len(rows),
+            "deaths": summarize([r["deaths"] for r in rows]),
+        }
+        if done:
+            entry["seconds_to_complete"]=summarize([r["ticks"]/TICK_RATE for r in done])
+        report["levels"].append(entry)
+    return report
+
+# -------------------------------------------------------------------------
+def parse_args(argv=None):
+    parser=argparse.ArgumentParser(description="Bot playtesting of generated levels.")
+    parser.add_argument("--levels", type=int, nargs="+",
+                        default=list(range(1, MAX_LEVEL+1)))
+    parser.add_argument("--runs", type=int, default=100,
+                        help="levels played per level number (default: %(default)s)")
+    parser.add_argument("--max-seconds", type=float, default=180,
+                        help="game-time limit per level (default: %(default)s)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="playtest.json")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args=parse_args(argv)
+    report=run_playtest(args.levels, args.runs, args.workers, args.seed,
+                        int(args.max_seconds*TICK_RATE))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    for entry in report["levels"]:
+        t=entry.get("seconds_to_complete", {})
+        print(f"level {entry['level']}: {100*entry['completion_rate']:.1f}% completed, "
+              f"time {t.get('mean', 0):.1f}s (p90 {t.get('p90', 0):.1f}s), "
+              f"deaths {entry['deaths']['mean']:.2f}")
+    print(f"{report['ticks_per_sec']:.0f} ticks/s on {report['workers']} workers "
+          f"-> {args.output}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+# camera.py
+
+from config import TILE_SIZE
+
+class Camera:
+    """
+    Viewport onto the maze. Mazes smaller than the view are centred (as
+    before); larger ones scroll to keep the player in the middle, clamped
+    to the maze edges. A grid size of None means an endless world (see
+    chunks.py). offset_x/offset_y map world pixels to screen pixels.
+    """
+    __slots__ = ("view_w", "view_h", "world_w", "world_h",
+                 "offset_x", "offset_y")
+
+    def __init__(self, view_w, view_h, grid_w, grid_h):
+        self.view_w = view_w
+        self.view_h = view_h
+        self.offset_x = 0
+        self.offset_y = 0
+        self.set_world(grid_w, grid_h)
+
+    def resize(self, view_w, view_h):
+        self.view_w = view_w
+        self.view_h = view_h
+
+    def set_world(self, grid_w, grid_h):
+        self.world_w = None if grid_w is None else grid_w*TILE_SIZE
+        self.world_h = None if grid_h is None else grid_h*TILE_SIZE
+
+    def _axis_offset(self, view, world, pos):
+        if world is None:
+            return view//2-int(pos)
+        if world <= view:
+            return (view-world)//2
+        # keep pos centred, but never show past the maze edge
+        return -int(min(max(pos-view//2, 0), world-view))
+
+    def follow(self, px, py):
+        self.offset_x = self._axis_offset(self.view_w, self.world_w, px)
+        self.offset_y = self._axis_offset(self.view_h, self.world_h, py)
+
+    def visible_tiles(self):
+        """Tile range (tx0, ty0, tx1, ty1), end-exclusive, clipped to the maze."""
+        tx0 = -self.offset_x//TILE_SIZE
+        ty0 = -self.offset_y//TILE_SIZE
+        tx1 = (self.view_w-self.offset_x)//TILE_SIZE+1
+        ty1 = (self.view_h-self.offset_y)//TILE_SIZE+1
+        if self.world_w is None:
+            return tx0, ty0, tx1, ty1
+        return (max(0, tx0), max(0, ty0),
+                min(self.world_w//TILE_SIZE, tx1), min(self.world_h//TILE_SIZE, ty1))
+
+    def visible_rect(self, margin=0):
+        """World-pixel rect (x0, y0, x1, y1) that is on screen, grown by margin."""
+        return (-self.offset_x-margin, -self.offset_y-margin,
+                self.view_w-self.offset_x+margin, self.view_h-self.offset_y+margin)
@@ -0,0 +1,200 @@
+# chunks.py
+#
+# Chunked, endless maze storage. Chunks of CHUNK_SIZE x CHUNK_SIZE tiles are
+# generated on demand from (seed, cx, cy) alone, so any chunk can be
+# evicted and later regenerated identically.
+#
+# Layout inside a chunk: cells sit on odd local coordinates and are joined
+# by a DFS backtracker; local row/column 0 is the wall shared with the
+# north/west neighbour. Each chunk opens a few gaps in its own west and
+# north walls, which always lead into a cell of the neighbour (the
+# neighbour's last row/column is a cell row/column), so the world is
+# connected across chunk borders without looking at neighbouring chunks.
+#
+# EndlessSession walks a player through a ChunkedWorld and streams chunks
+# around it; scenes.EndlessScene plays it ("Endless Maze" in the menu).
+
+import math
+import time
+import random
+from array import array
+
+from config import TILE_SIZE, PLAYER_SPEED, PLAYER_HALF_SIZE
+from session import TICK_DT, INPUT_UP, INPUT_LEFT, INPUT_DOWN, INPUT_RIGHT
+
+CHUNK_SIZE = 64
+BORDER_OPENINGS = 2   # gaps per shared chunk edge
+
+def generate_chunk(seed, cx, cy, size=CHUNK_SIZE):
+    """Return the chunk's tiles as a bytearray (row-major, 1=wall, 0=floor)."""
+    rng=random.Random(f"{seed}:{cx}:{cy}")
+    tiles=bytearray(b"\x01")*(size*size)
+    cells=size//2  # cells per axis, at local 1,3,...,size-1
+
+    # DFS backtracker over the cell grid
+    visited=bytearray(cells*cells)
+    start=rng.randrange(cells*cells)
+    visited[start]=1
+    stack=[start]
+    while stack:
+        c=stack[-1]
+        x=c%cells
+        y=c//cells
+        neighbors=[]
+        if x>0 and not visited[c-1]:
+            neighbors.append(c-1)
+        if x<cells-1 and not visited[c+1]:
+            neighbors.append(c+1)
+        if y>0 and not visited[c-cells]:
+            neighbors.append(c-cells)
+        if y<cells-1 and not visited[c+cells]:
+            neighbors.append(c+cells)
+        tx=2*x+1
+        ty=2*y+1
+        tiles[ty*size+tx]=0
+        if neighbors:
+            n=rng.choice(neighbors)
+            visited[n]=1
+            nx=2*(n%cells)+1
+            ny=2*(n//cells)+1
+            tiles[((ty+ny)//2)*size+(tx+nx)//2]=0
+            stack.append(n)
+        else:
+            stack.pop()
+
+    # openings in the west (x=0) and north (y=0) walls
+    for _ in range(BORDER_OPENINGS):
+        tiles[(2*rng.randrange(cells)+1)*size]=0
+        tiles[2*rng.randrange(cells)+1]=0
+    return tiles
+
+class ChunkedWorld:
+    """
+    Endless maze made of lazily generated chunks. Call update_around() with
+    the player's tile each time it moves to stream chunks in and out.
+    """
+
+    def __init__(self, seed, chunk_size=CHUNK_SIZE, load_radius=1, keep_radius=2):
+        if chunk_size%2:
+            raise ValueError("chunk_size must be even")
+        self.seed=seed
+        self.chunk_size=chunk_size
+        self.load_radius=load_radius
+        self.keep_radius=max(keep_radius, load_radius)
+        self.chunks={}
+        self.gen_times=array("d")  # seconds per generated chunk
+        self.evicted=0
+        self._center=None
+
+    def chunk(self, cx, cy):
+        tiles=self.chunks.get((cx,cy))
+        if tiles is None:
+            t0=time.perf_counter()
+            tiles=generate_chunk(self.seed, cx, cy, self.chunk_size)
+            self.gen_times.append(time.perf_counter()-t0)
+            self.chunks[(cx,cy)]=tiles
+        return tiles
+
+    def get_tile(self, tx, ty):
+        s=self.chunk_size
+        cx, lx = divmod(tx, s)
+        cy, ly = divmod(ty, s)
+        return self.chunk(cx, cy)[ly*s+lx]
+
+    def passable(self, tx, ty):
+        return self.get_tile(tx, ty)!=1
+
+    def update_around(self, tx, ty):
+        """
+        Make sure every chunk within load_radius of tile (tx, ty) exists and
+        drop chunks farther than keep_radius. Returns the number generated.
+        """
+        center=(tx//self.chunk_size, ty//self.chunk_size)
+        if center==self._center:
+            return 0
+        self._center=center
+        ccx, ccy = center
+        before=len(self.gen_times)
+        r=self.load_radius
+        for cy in range(ccy-r, ccy+r+1):
+            for cx in range(ccx-r, ccx+r+1):
+                self.chunk(cx, cy)
+        k=self.keep_radius
+        far=[key for key in self.chunks
+             if abs(key[0]-ccx)>k or abs(key[1]-ccy)>k]
+        for key in far:
+            del self.chunks[key]
+        self.evicted+=len(far)
+        return len(self.gen_times)-before
+
+    def memory_bytes(self):
+        """Approximate bytes held by resident chunk tiles."""
+        return sum(len(t) for t in self.chunks.values())
+
+    def stats(self):
+        times=sorted(self.gen_times)
+        n=len(times)
+        return {
+            "resident_chunks": len(self.chunks),
+            "tile_bytes": self.memory_bytes(),
+            "generated": n,
+            "evicted": self.evicted,
+            "gen_ms_mean": 1000*sum(times)/n if n else 0.0,
+            "gen_ms_p99": 1000*times[min(n-1, int(n*0.99))] if n else 0.0,
+        }
+
+# -------------------------------------------------------------------------
+class EndlessSession:
+    """
+    A player in a ChunkedWorld, without pygame. step() takes the same
+    input bits as session.GameSession and calls update_around() whenever
+    the player enters a new tile. There are no items or enemies.
+    """
+
+    def __init__(self, seed=None, **world_args):
+        if seed is None:
+            seed=random.getrandbits(32)
+        self.seed=seed
+        self.world=ChunkedWorld(seed, **world_args)
+        self.tick=0
+        self.player_x=1.5*TILE_SIZE   # local cell (1,1) of chunk (0,0) is floor
+        self.player_y=1.5*TILE_SIZE
+        self.direction_degs=0
+        self._tile=None
+        self._enter_tile()
+
+    def _enter_tile(self):
+        tile=(int(self.player_x//TILE_SIZE), int(self.player_y//TILE_SIZE))
+        if tile!=self._tile:
+            self._tile=tile
+            self.world.update_around(*tile)
+
+    def _fits(self, px, py):
+        h=PLAYER_HALF_SIZE
+        passable=self.world.passable
+        for ty in range(int((py-h)//TILE_SIZE), int((py+h-1)//TILE_SIZE)+1):
+            for tx in range(int((px-h)//TILE_SIZE), int((px+h-1)//TILE_SIZE)+1):
+                if not passable(tx, ty):
+                    return False
+        return True
+
+    def step(self, inputs, dt=TICK_DT):
+        """Advance one tick with the given input bits."""
+        vel_x=vel_y=0
+        if inputs & INPUT_UP:
+            vel_y=-PLAYER_SPEED
+        if inputs & INPUT_DOWN:
+            vel_y=PLAYER_SPEED
+        if inputs & INPUT_LEFT:
+            vel_x=-PLAYER_SPEED
+        if inputs & INPUT_RIGHT:
+            vel_x=PLAYER_SPEED
+        if vel_x or vel_y:
+            self.direction_degs=math.degrees(math.atan2(vel_y,vel_x))
+        # X then Y, as move_player_with_diagonal does
+        if vel_x and self._fits(self.player_x+vel_x, self.player_y):
+            self.player_x+=vel_x
+        if vel_y and self._fits(self.player_x, self.player_y+vel_y):
+            self.player_y+=vel_y
+        self.tick+=1
+        self._enter_tile()
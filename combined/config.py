@@ -1,6 +1,7 @@
 # config.py
 
 import os
+import colorsys
 
 # -------------------------------------------------------------------------
 # GLOBAL CONFIG
@@ -9,7 +10,35 @@ GRID_WIDTH = 48
 GRID_HEIGHT = 27
 TILE_SIZE = 32
 
+# Per-level maze size override in tiles, e.g. {6: (200, 120)}. The camera
+# scrolls when a maze is larger than the window.
+LEVEL_GRID_SIZES = {}
+
 PLAYER_SPEED = 2.0  # constant speed for all levels
+PLAYER_HALF_SIZE = 10  # half extent of the player's collision box (px)
+
+# Gameplay runs in fixed ticks so a run can be replayed from seed + inputs;
+# PLAYER_SPEED is pixels per tick.
+TICK_RATE = 60
+
+# Fog on levels 5 and 6: "radius" reveals a disc of FOG_RADIUS tiles,
+# "shadowcast" only what is in line of sight within it (see fov.py).
+FOG_MODE = "radius"
+FOG_RADIUS = 5
+# Precompute what every floor tile sees (fov.VisibilityTable) on a
+# background thread. Each table entry is a bitset over the whole maze,
+# so larger mazes compute visibility lazily instead.
+FOG_PRECOMPUTE = True
+FOG_TABLE_MAX_TILES = 100*100
+
+# Draw the maze into a back buffer about this many pixels tall and scale it
+# up by an integer factor (None = draw at screen resolution).
+MAZE_RENDER_HEIGHT = None
+
+# drawing backend: "software" (pygame.draw), "sdl2" (GPU textures through
+# pygame._sdl2, falls back to software) or "sdl2-software" (SDL's software
+# renderer, for testing the sdl2 path without a GPU)
+RENDERER = "software"
 
 DOOR_COLORS = {
     2: (139, 69, 19),   # Brown door
@@ -18,11 +47,29 @@ DOOR_COLORS = {
 }
 
 KEY_COLORS = {
-    "key0": (255, 215, 0),   # Gold
-    "key1": (0,   255, 255), # Cyan
-    "key2": (255, 0,   255), # Magenta
+    0: (255, 215, 0),   # Gold
+    1: (0,   255, 255), # Cyan
+    2: (255, 0,   255), # Magenta
 }
 
+# Keys are held as a bitmask (bit k = key k), so there can be up to 32
+# key/door colours: key k opens door tiles of value k+2 (2..33).
+MAX_KEY_TYPES = 32
+KEY_TYPES = 3   # key/door colours in a generated level (2+)
+
+def _generated_key_colors(first, count):
+    # golden-ratio hue steps keep neighbouring indices far apart
+    colors={}
+    for k in range(first, count):
+        r,g,b=colorsys.hsv_to_rgb((k*0.618034)%1.0, 0.8, 1.0)
+        colors[k]=(int(r*255), int(g*255), int(b*255))
+    return colors
+
+KEY_COLORS.update(_generated_key_colors(len(KEY_COLORS), MAX_KEY_TYPES))
+# generated doors are a darker shade of their key
+DOOR_COLORS.update({k+2: tuple(c*2//3 for c in color)
+                    for k,color in KEY_COLORS.items() if k+2 not in DOOR_COLORS})
+
 WALL_COLOR = (0, 100, 0)
 POINT_COLOR = (255, 255, 0)
 FINISH_PORTAL_COLOR = (255, 0, 0)
@@ -44,12 +91,27 @@ TEXT_COLOR = (255, 255, 255)
 
 PROGRESS_FILE = "progress.json"
 
+# Curated levels: a directory or .zip of .cglv files (see levelpacks.py)
+# played instead of generated ones; None = generate every level.
+LEVEL_PACK = None
+# validity of pack levels by content hash, so each file is checked once
+LEVEL_VALIDATION_CACHE = "level_validation.json"
+# on-disk cache of level select previews of pack levels
+THUMBNAIL_DIR = "thumbnails"
+
+# local port for Prometheus metrics (see metrics.py); None = metrics off
+METRICS_PORT = None
+
 ROOM_COUNT = 5
 MAX_ROOM_SIZE = 8
 DOOR_COUNT = 3
 POINT_COUNT = 6
 MAX_LEVEL = 6
 
+# maze generator, one of maze.MAZE_GENERATORS:
+# backtracker, eller, wilson, kruskal, binary_tree, sidewinder
+MAZE_ALGORITHM = "backtracker"
+
 STATE_MENU = "menu"
 STATE_GAME = "game"
 STATE_OPTIONS = "options"
@@ -59,6 +121,7 @@ STATE_INGAME_MENU = "ingame_menu"
 STATE_END_LEVEL = "end_level"
 STATE_USER_SELECT = "user_select"
 STATE_NEW_USER = "new_user"
+STATE_ENDLESS = "endless"
 
 DISPLAY_MODES = ["maximized", "fullscreen"]  # no windowed
 
@@ -2,66 +2,66 @@
 
 import random
 from config import GRID_WIDTH, GRID_HEIGHT, TILE_SIZE, PLAYER_SPEED
+from entities import Enemy
+from maze import free_floor_tiles, take_random_tiles
 
-def spawn_enemies_for_level(maze, level):
-    """Spawn 'level' enemies if level >=3."""
+def spawn_enemies_for_level(maze, level, free_tiles=None):
+    """Spawn 'level' enemies if level >=3, on tiles taken from free_tiles."""
     if level < 3:
         return []
-    count = level
+    if free_tiles is None:
+        free_tiles=free_floor_tiles(maze)
     enemies = []
-    h=len(maze)
-    w=len(maze[0])
-    tries=0
-    while len(enemies)<count and tries<3000:
-        tries+=1
-        tx=random.randint(1,w-2)
-        ty=random.randint(1,h-2)
-        if maze[ty][tx]==0:
-            ex=tx*TILE_SIZE+TILE_SIZE//2
-            ey=ty*TILE_SIZE+TILE_SIZE//2
-            dx=random.choice([-1,0,1])
-            dy=random.choice([-1,0,1])
-            if dx==0 and dy==0:
-                dx=1
-            enemies.append({
-                'x':ex,'y':ey,
-                'dx':dx,'dy':dy,
-                'dir_change_cooldown':random.uniform(1.0,3.0)
-            })
+    for tx,ty in take_random_tiles(free_tiles, level):
+        ex=tx*TILE_SIZE+TILE_SIZE//2
+        ey=ty*TILE_SIZE+TILE_SIZE//2
+        dx=random.choice([-1,0,1])
+        dy=random.choice([-1,0,1])
+        if dx==0 and dy==0:
+            dx=1
+        enemies.append(Enemy(ex,ey,dx,dy,random.uniform(1.0,3.0)))
     return enemies
 
-def move_enemies(enemies, dt):
+def move_enemies(enemies, dt, width=GRID_WIDTH, height=GRID_HEIGHT):
+    """Wander; width/height are the maze size in tiles."""
     sp=PLAYER_SPEED*TILE_SIZE*0.5
+    max_x=width*TILE_SIZE
+    max_y=height*TILE_SIZE
+    choice=random.choice
+    dirs=(-1,0,1)
     for e in enemies:
-        e['dir_change_cooldown']-=dt
-        if e['dir_change_cooldown']<=0:
-            e['dx']=random.choice([-1,0,1])
-            e['dy']=random.choice([-1,0,1])
-            if e['dx']==0 and e['dy']==0:
-                e['dx']=1
-            e['dir_change_cooldown']=random.uniform(1.0,3.0)
+        e.dir_change_cooldown-=dt
+        if e.dir_change_cooldown<=0:
+            e.dx=choice(dirs)
+            e.dy=choice(dirs)
+            if e.dx==0 and e.dy==0:
+                e.dx=1
+            e.dir_change_cooldown=random.uniform(1.0,3.0)
 
-        e['x']+=e['dx']*sp*dt
-        e['y']+=e['dy']*sp*dt
+        x=e.x+e.dx*sp*dt
+        y=e.y+e.dy*sp*dt
 
         # keep them in-bounds
-        if e['x']<0:
-            e['x']=0
-            e['dx']=random.choice([-1,0,1])
-        elif e['x']>GRID_WIDTH*TILE_SIZE:
-            e['x']=GRID_WIDTH*TILE_SIZE
-            e['dx']=random.choice([-1,0,1])
-        if e['y']<0:
-            e['y']=0
-            e['dy']=random.choice([-1,0,1])
-        elif e['y']>GRID_HEIGHT*TILE_SIZE:
-            e['y']=GRID_HEIGHT*TILE_SIZE
-            e['dy']=random.choice([-1,0,1])
+        if x<0:
+            x=0
+            e.dx=choice(dirs)
+        elif x>max_x:
+            x=max_x
+            e.dx=choice(dirs)
+        if y<0:
+            y=0
+            e.dy=choice(dirs)
+        elif y>max_y:
+            y=max_y
+            e.dy=choice(dirs)
+        e.x=x
+        e.y=y
 
 def check_enemy_collision(px, py, enemies):
+    r_sq=(TILE_SIZE//2)**2
     for e in enemies:
-        ex, ey = e['x'], e['y']
-        dist_sq = (px - ex)**2 + (py - ey)**2
-        if dist_sq < (TILE_SIZE//2)**2:
+        dx=px-e.x
+        dy=py-e.y
+        if dx*dx+dy*dy < r_sq:
             return True
     return False
@@ -0,0 +1,34 @@
+# entities.py
+
+from enum import IntEnum
+
+class ItemType(IntEnum):
+    POINT = 0
+    KEY = 1
+    PORTAL = 2
+
+class Item:
+    """A pickup at pixel centre (x, y). `key` is the key index for KEY items."""
+    __slots__ = ("x", "y", "kind", "key")
+
+    def __init__(self, x, y, kind, key=-1):
+        self.x = x
+        self.y = y
+        self.kind = kind
+        self.key = key
+
+    def __repr__(self):
+        return f"Item({self.x}, {self.y}, {self.kind.name}, {self.key})"
+
+class Enemy:
+    __slots__ = ("x", "y", "dx", "dy", "dir_change_cooldown")
+
+    def __init__(self, x, y, dx, dy, dir_change_cooldown):
+        self.x = x
+        self.y = y
+        self.dx = dx
+        self.dy = dy
+        self.dir_change_cooldown = dir_change_cooldown
+
+    def __repr__(self):
+        return f"Enemy({self.x}, {self.y}, {self.dx}, {self.dy})"
@@ -0,0 +1,180 @@
+# fov.py
+#
+# Line-of-sight for the fog levels: recursive shadowcasting over the
+# maze walls (eight octants, scanned row by row outwards; a wall casts a
+# shadow that the rest of the octant is clipped against). The maze is
+# static within a level, so the visible set of every tile is cached and
+# revisiting a tile costs a dict lookup. Doors do not block sight, which
+# keeps the result independent of the keys held.
+#
+# VisibilityTable goes further for normal-sized mazes: the visible set of
+# every floor tile is precomputed (by a background thread) as an int
+# bitset over the whole maze, so a fog update is one OR or assignment.
+
+import threading
+from array import array
+
+# (xx, xy, yx, yy) transforms of the first octant onto all eight
+_OCTANTS = (
+    (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+    (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+)
+
+class FieldOfView:
+    """Visible tiles within `radius` of a tile, as flat indices y*width+x."""
+
+    def __init__(self, maze, radius=5):
+        self.height=len(maze)
+        self.width=len(maze[0])
+        self.radius=radius
+        self.opaque=bytes(tv==1 for row in maze for tv in row)
+        self.cache={}
+
+    def visible(self, tx, ty):
+        """array of the tile indices seen from (tx, ty), cached per tile."""
+        i=ty*self.width+tx
+        seen=self.cache.get(i)
+        if seen is None:
+            seen=array("I", sorted(self.compute(tx, ty)))
+            self.cache[i]=seen
+        return seen
+
+    def compute(self, tx, ty):
+        """Set of the tile indices seen from (tx, ty), not cached."""
+        out={ty*self.width+tx}
+        for octant in _OCTANTS:
+            self._cast(out, tx, ty, 1, 1.0, 0.0, *octant)
+        return out
+
+    def _cast(self, out, cx, cy, row, start, end, xx, xy, yx, yy):
+        if start<end:
+            return
+        w=self.width
+        h=self.height
+        opaque=self.opaque
+        radius=self.radius
+        r_sq=radius*radius
+        new_start=0.0
+        for j in range(row, radius+1):
+            dx=-j-1
+            dy=-j
+            blocked=False
+            while dx<=0:
+                dx+=1
+                # slopes of the tile's left and right edges
+                l_slope=(dx-0.5)/(dy+0.5)
+                r_slope=(dx+0.5)/(dy-0.5)
+                if start<r_slope:
+                    continue
+                if end>l_slope:
+                    break
+                x=cx+dx*xx+dy*xy
+                y=cy+dx*yx+dy*yy
+                inside=0<=x<w and 0<=y<h
+                if inside and dx*dx+dy*dy<=r_sq:
+                    out.add(y*w+x)
+                wall=not inside or opaque[y*w+x]
+                if blocked:
+                    if wall:
+                        new_start=r_slope
+                    else:
+                        blocked=False
+                        start=new_start
+                elif wall and j<radius:
+                    # scan the lit part beyond this wall, then continue in shadow
+                    blocked=True
+                    self._cast(out, cx, cy, j+1, start, l_slope, xx, xy, yx, yy)
+                    new_start=r_slope
+            if blocked:
+                break
+
+    # ---------------------------------------------------------------------
+    def reveal(self, discovered, tx, ty):
+        """Mark what (tx, ty) sees in a nested-list fog grid (level 5)."""
+        w=self.width
+        for i in self.visible(tx, ty):
+            discovered[i//w][i%w]=True
+
+    def grid(self, tx, ty):
+        """Nested-list fog grid of what (tx, ty) sees (level 6)."""
+        w=self.width
+        grid=[[False]*w for _ in range(self.height)]
+        for i in self.visible(tx, ty):
+            grid[i//w][i%w]=True
+        return grid
+
+def disc_tiles(tx, ty, radius, width, height):
+    """Tile indices within radius of (tx, ty), walls or not (the "radius" fog)."""
+    r_sq=radius*radius
+    return [yy*width+xx
+            for yy in range(max(0, ty-radius), min(height, ty+radius+1))
+            for xx in range(max(0, tx-radius), min(width, tx+radius+1))
+            if (xx-tx)**2+(yy-ty)**2<=r_sq]
+
+# -------------------------------------------------------------------------
+class VisibilityTable:
+    """
+    Visible tiles of every tile as an int with bit y*width+x set, either
+    in line of sight (FieldOfView) or the plain radius disc. start() fills
+    the floor tiles on a daemon thread; mask() computes any tile that is
+    not done yet on the spot, so the table is usable immediately. Every
+    mask is width*height bits long, which is why the session only builds
+    tables for mazes up to FOG_TABLE_MAX_TILES.
+    """
+
+    def __init__(self, maze, radius=5, line_of_sight=True):
+        self.height=len(maze)
+        self.width=len(maze[0])
+        self.radius=radius
+        self.nbytes=(self.width*self.height+7)//8
+        self.fov=FieldOfView(maze, radius) if line_of_sight else None
+        self.masks=[None]*(self.width*self.height)
+        self._floor=[i for i,tv in enumerate(tv for row in maze for tv in row) if tv!=1]
+        self._stop=False
+        self._thread=None
+
+    def _compute(self, i):
+        tx=i%self.width
+        ty=i//self.width
+        if self.fov:
+            seen=self.fov.compute(tx, ty)
+        else:
+            seen=disc_tiles(tx, ty, self.radius, self.width, self.height)
+        bits=bytearray(self.nbytes)
+        for j in seen:
+            bits[j>>3]|=1<<(j&7)
+        return int.from_bytes(bits, "little")
+
+    def mask(self, tx, ty):
+        i=ty*self.width+tx
+        m=self.masks[i]
+        if m is None:
+            m=self._compute(i)
+            self.masks[i]=m
+        return m
+
+    def fill(self):
+        """Compute every floor tile (what the background thread runs)."""
+        masks=self.masks
+        for i in self._floor:
+            if self._stop:
+                return
+            if masks[i] is None:
+                masks[i]=self._compute(i)  # single list store, no lock needed
+
+    def start(self):
+        self._thread=threading.Thread(target=self.fill, name="visibility", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Abandon the background fill (the level is being replaced)."""
+        self._stop=True
+
+    def wait(self):
+        """Block until the background fill has finished."""
+        if self._thread:
+            self._thread.join()
+
+    def to_bytes(self, mask):
+        """A mask as little-endian bytes, for bit tests in tile_visible."""
+        return mask.to_bytes(self.nbytes, "little")
@@ -1,123 +1,142 @@
 # game_logic.py
 
 import math
+import time
+from array import array
 from collections import defaultdict, deque
 from config import (
-    GRID_WIDTH, GRID_HEIGHT, TILE_SIZE, 
+    GRID_WIDTH, GRID_HEIGHT, TILE_SIZE, PLAYER_HALF_SIZE,
     POINT_COUNT, MAX_LEVEL,
-    LEVEL_BG_COLORS
+    ROOM_COUNT, MAX_ROOM_SIZE, DOOR_COUNT, KEY_TYPES, MAZE_ALGORITHM,
+    LEVEL_BG_COLORS, LEVEL_GRID_SIZES
+)
+from maze import (
+    MAZE_GENERATORS, START_TILE, carve_rooms, place_doors, free_floor_tiles
 )
-from maze import generate_maze, carve_rooms, place_doors
 from items import spawn_items, spawn_keys, spawn_finish_portal
 from enemies import spawn_enemies_for_level
+from entities import ItemType
+from navigation import NavCache
+from levelfile import LevelFile, write_level
+import metrics
 
 # -------------------------------------------------------------------------
 # BFS VALIDATION
 # -------------------------------------------------------------------------
-def can_pass_tile(tile_val, key_inv):
+def can_pass_tile(tile_val, keys):
+    """keys is the held-keys bitmask (bit k = key k opens door k+2)."""
     if tile_val == 1:
         return False
-    elif tile_val in (2,3,4):
-        needed_key = f"key{tile_val-2}"
-        return (key_inv[needed_key] > 0)
+    elif tile_val >= 2:
+        return bool(keys >> (tile_val-2) & 1)
     else:
         return True
 
 def is_level_valid(maze, items):
-    item_coords=[]
-    portal_coord=None
-    for (px,py,typ) in items:
-        tx=px//TILE_SIZE
-        ty=py//TILE_SIZE
-        item_coords.append((tx,ty,typ))
-        if typ=="finish_portal":
-            portal_coord=(tx,ty)
-
-    visited=set()
-    queue=deque()
-    start=(1,1,0,0,0)
-    visited.add(start)
-    queue.append(start)
-    found_items=set()
-    directions=[(-1,0),(1,0),(0,-1),(0,1)]
+    """
+    True if every floor tile, item and the portal can be reached from the
+    start. Keys are never used up, so picking up more keys only opens more
+    doors: one BFS that carries the bitmask of keys found so far reaches
+    exactly what any order of play can reach. Door tiles met while locked
+    are parked per key and join the BFS when that key turns up, so the
+    cost is linear in the maze whatever the number of key types.
+    """
+    h=len(maze)
+    w=len(maze[0])
+    tiles=[tv for row in maze for tv in row]
+    targets=[]
+    key_at={}   # tile index -> bits of the keys lying there
+    for it in items:
+        i=int(it.y//TILE_SIZE)*w+int(it.x//TILE_SIZE)
+        targets.append(i)
+        if it.kind==ItemType.KEY:
+            key_at[i]=key_at.get(i, 0) | (1 << it.key)
 
+    # 0 = unseen, 1 = reached, 2 = locked door waiting for its key
+    state=bytearray(w*h)
+    locked={}   # key index -> door tiles waiting for it
+    keys=0
+    start=1*w+1
+    state[start]=1
+    queue=deque([start])
     while queue:
-        cx,cy,k0,k1,k2=queue.popleft()
-        for (ix,iy,typ) in item_coords:
-            if (ix,iy)==(cx,cy) and (ix,iy) not in found_items:
-                found_items.add((ix,iy))
-                nk0,nk1,nk2=k0,k1,k2
-                if typ.startswith("key"):
-                    if typ=="key0": nk0=1
-                    if typ=="key1": nk1=1
-                    if typ=="key2": nk2=1
-                new_st=(cx,cy,nk0,nk1,nk2)
-                if new_st not in visited:
-                    visited.add(new_st)
-                    queue.append(new_st)
-
-        keys_dict={"key0":k0,"key1":k1,"key2":k2}
-        for dx,dy in directions:
-            nx,ny=cx+dx,cy+dy
-            if 0<=nx<GRID_WIDTH and 0<=ny<GRID_HEIGHT:
-                tile_val=maze[ny][nx]
-                # check pass
-                if tile_val==1:
-                    passable=False
-                elif tile_val in (2,3,4):
-                    needed_key=f"key{tile_val-2}"
-                    passable = (keys_dict[needed_key]>0)
-                else:
-                    passable=True
-
-                if passable:
-                    st=(nx,ny,k0,k1,k2)
-                    if st not in visited:
-                        visited.add(st)
-                        queue.append(st)
-
-    # check if all items (point/key) are found
-    for (ix,iy,typ) in item_coords:
-        if typ in ("point","key0","key1","key2") and (ix,iy) not in found_items:
-            return False
-
-    # check if finish portal is reachable
-    if portal_coord:
-        px,py=portal_coord
-        if not any((px,py,a,b,c) in visited for a in [0,1] for b in [0,1] for c in [0,1]):
-            return False
+        i=queue.popleft()
+        new=key_at.get(i, 0) & ~keys
+        if new:
+            keys|=new
+            for k in range(new.bit_length()):
+                if new >> k & 1:
+                    for door in locked.pop(k, ()):
+                        state[door]=1
+                        queue.append(door)
+        x=i%w
+        for n in (i-1 if x>0 else -1, i+1 if x<w-1 else -1, i-w, i+w):
+            if n<0 or n>=w*h or state[n]:
+                continue
+            tv=tiles[n]
+            if tv==1:
+                continue
+            if tv>=2 and not keys >> (tv-2) & 1:
+                state[n]=2
+                locked.setdefault(tv-2, []).append(n)
+                continue
+            state[n]=1
+            queue.append(n)
 
-    # ensure all floor tiles visited
-    for yy in range(GRID_HEIGHT):
-        for xx in range(GRID_WIDTH):
-            if maze[yy][xx]==0:
-                if not any((xx,yy,a,b,c) in visited for a in [0,1] for b in [0,1] for c in [0,1]):
-                    return False
-    return True
+    # all items (points, keys, portal) and all floor tiles reached
+    if any(state[i]!=1 for i in targets):
+        return False
+    return all(st==1 for st,tv in zip(state, tiles) if tv==0)
 
 # -------------------------------------------------------------------------
-def create_level_until_valid(level):
-    """Generate a random layout that BFS says is solvable."""
+def create_level_until_valid(level, width=GRID_WIDTH, height=GRID_HEIGHT,
+                             room_count=ROOM_COUNT,
+                             max_room_size=MAX_ROOM_SIZE,
+                             door_count=DOOR_COUNT, point_count=POINT_COUNT,
+                             key_types=KEY_TYPES,
+                             algorithm=MAZE_ALGORITHM, stats=None):
+    """
+    Generate a random layout that BFS says is solvable. Levels 2+ get
+    key_types key/door colours.
+    If a `stats` dict is given, stats["attempts"] is set to the number of
+    layouts generated.
+    """
+    generate=MAZE_GENERATORS[algorithm]
+    attempts=0
     while True:
-        maze=generate_maze(GRID_WIDTH, GRID_HEIGHT)
-        carve_rooms(maze)
+        attempts+=1
+        maze=generate(width, height)
+        carve_rooms(maze, room_count, max_room_size)
         if maze[1][1]==1:
             continue
         items=[]
         if level>=2:
-            place_doors(maze)
-            keys_ = spawn_keys(maze)
-            pts_ = spawn_items(maze, POINT_COUNT, "point")
+            place_doors(maze, door_count, key_types)
+            free=free_floor_tiles(maze)
+            keys_ = spawn_keys(maze, free, key_types)
+            pts_ = spawn_items(maze, point_count, ItemType.POINT, free_tiles=free)
             items = keys_ + pts_
         else:
-            pts_ = spawn_items(maze, POINT_COUNT, "point")
+            free=free_floor_tiles(maze)
+            pts_ = spawn_items(maze, point_count, ItemType.POINT, free_tiles=free)
             items = pts_
 
-        finish_p = spawn_finish_portal(maze)
+        finish_p = spawn_finish_portal(maze, free)
         if finish_p:
             items.append(finish_p)
 
-        if is_level_valid(maze, items):
+        if metrics.enabled:
+            t0=time.perf_counter()
+            valid=is_level_valid(maze, items)
+            metrics.VALIDATION_SECONDS.observe(time.perf_counter()-t0)
+        else:
+            valid=is_level_valid(maze, items)
+        if valid:
+            if stats is not None:
+                stats["attempts"]=attempts
+            if metrics.enabled:
+                metrics.LEVELS_GENERATED.inc()
+                metrics.GENERATION_ATTEMPTS.observe(attempts)
             return maze, items
 
 # -------------------------------------------------------------------------
@@ -126,84 +145,217 @@ def create_level_until_valid(level):
 def update_fog_of_war_permanent(discovered,px,py,radius=5):
     tile_x=int(px//TILE_SIZE)
     tile_y=int(py//TILE_SIZE)
+    h=len(discovered)
+    w=len(discovered[0])
     for yy in range(tile_y-radius, tile_y+radius+1):
         for xx in range(tile_x-radius, tile_x+radius+1):
-            if 0<=xx<GRID_WIDTH and 0<=yy<GRID_HEIGHT:
+            if 0<=xx<w and 0<=yy<h:
                 dist_sq=(xx-tile_x)**2+(yy-tile_y)**2
                 if dist_sq<=radius**2:
                     discovered[yy][xx]=True
 
-def update_fog_of_war_ephemeral(px,py,radius=5):
+def update_fog_of_war_ephemeral(px,py,radius=5,width=GRID_WIDTH,height=GRID_HEIGHT):
     tile_x=int(px//TILE_SIZE)
     tile_y=int(py//TILE_SIZE)
-    ephemeral=[[False for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+    ephemeral=[[False]*width for _ in range(height)]
     for yy in range(tile_y-radius, tile_y+radius+1):
         for xx in range(tile_x-radius, tile_x+radius+1):
-            if 0<=xx<GRID_WIDTH and 0<=yy<GRID_HEIGHT:
+            if 0<=xx<width and 0<=yy<height:
                 dist_sq=(xx-tile_x)**2+(yy-tile_y)**2
                 if dist_sq<=radius**2:
                     ephemeral[yy][xx]=True
     return ephemeral
 
 # -------------------------------------------------------------------------
-def setup_level(level):
-    maze, items = create_level_until_valid(level)
-    enemies = spawn_enemies_for_level(maze, level)
+def setup_level(level, grid_size=None, nav=False, level_file=None, export=None,
+                **generation):
+    """
+    Build everything a level needs. grid_size is (width, height) in tiles
+    and defaults to LEVEL_GRID_SIZES / GRID_WIDTH x GRID_HEIGHT. With nav,
+    a navigation.NavCache is built for the level (else None); only the
+    bots and level tools ask for it. Other
+    keyword arguments (room_count, max_room_size, door_count, point_count,
+    algorithm, stats) are passed on to create_level_until_valid.
+
+    level_file (a path or levelfile.LevelFile) loads the level instead of
+    generating it; the maze is then a list of read-only memoryview rows.
+    export is a path the level is written to (with the NavCache, if any).
+    """
+    if level_file is not None:
+        if not isinstance(level_file, LevelFile):
+            level_file=LevelFile.open(level_file)
+        maze=level_file.rows()
+        items=level_file.items()
+        enemies=level_file.enemies()
+        width, height = level_file.width, level_file.height
+    else:
+        width, height = grid_size or LEVEL_GRID_SIZES.get(level, (GRID_WIDTH, GRID_HEIGHT))
+        maze, items = create_level_until_valid(level, width, height, **generation)
+        occupied={START_TILE}
+        occupied.update((int(i.x//TILE_SIZE), int(i.y//TILE_SIZE)) for i in items)
+        enemies = spawn_enemies_for_level(maze, level, free_floor_tiles(maze, exclude=occupied))
     bg_color = LEVEL_BG_COLORS.get(level,(100,100,100))
     fog_discovered=None
     if level==5 or level==6:
-        fog_discovered=[[False for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+        fog_discovered=[[False]*width for _ in range(height)]
 
-    points_in_level = sum(1 for i in items if i[2]=="point")
-    keys_in_level   = sum(1 for i in items if i[2].startswith("key"))
-    return maze, items, bg_color, enemies, fog_discovered, points_in_level, keys_in_level
+    points_in_level = sum(1 for i in items if i.kind==ItemType.POINT)
+    keys_in_level   = sum(1 for i in items if i.kind==ItemType.KEY)
+    nav_cache=None
+    if nav:
+        if level_file is not None:
+            nav_cache=level_file.nav_cache(maze)
+        if nav_cache is None:
+            nav_cache=NavCache(maze, items)
+    if export:
+        write_level(export, level, maze, items, enemies, nav_cache)
+    return (maze, items, bg_color, enemies, fog_discovered,
+            points_in_level, keys_in_level, nav_cache)
 
 # -------------------------------------------------------------------------
 # Movement logic with Ghost skill usage (like original)
 # -------------------------------------------------------------------------
-def tile_passable_with_ghost(maze, tx, ty, key_inventory,
+def tile_passable_with_ghost(maze, tx, ty, keys,
                              ghost_active, ghost_skill_wall_passed):
-    if not (0<=tx<GRID_WIDTH and 0<=ty<GRID_HEIGHT):
+    if not (0<=tx<len(maze[0]) and 0<=ty<len(maze)):
         return False
     tv = maze[ty][tx]
     if tv==0:
         return True
-    elif tv in (2,3,4):
-        needed_key=f"key{tv-2}"
-        return (key_inventory[needed_key]>0)
+    elif tv>=2:
+        return bool(keys >> (tv-2) & 1)
     elif tv==1:
         if ghost_active and not ghost_skill_wall_passed:
             return True
         return False
     return True
 
+# Tile flag bits: bit 0 = wall, bit (v-1) = door with tile value v.
+# A door of value v needs key index v-2, so the door bits are (keys << 1).
+TILE_WALL_BIT = 1
+
+def tile_flag(tv):
+    if tv==1:
+        return TILE_WALL_BIT
+    elif tv>=2:
+        return 1 << (tv-1)
+    return 0
+
+class PassabilityMask:
+    """
+    Per-level collision mask. The tile flags are built once from the
+    (static) maze; the blocked-bits mask is only recomputed when the key
+    inventory changes, so a passability test is a single AND.
+    """
+    __slots__ = ("width", "height", "flags", "all_bits", "blocked")
+
+    def __init__(self, maze, keys=0):
+        self.height = len(maze)
+        self.width = len(maze[0])
+        self.flags = array("Q", [tile_flag(tv) for row in maze for tv in row])
+        self.all_bits = TILE_WALL_BIT
+        for f in set(self.flags):
+            self.all_bits |= f
+        self.blocked = self.all_bits
+        self.update_keys(keys)
+
+    def update_keys(self, keys):
+        """Call with the held-keys bitmask after it changed."""
+        self.blocked = self.all_bits & ~(keys << 1)
+
+    def passable(self, tx, ty, ghost=False):
+        if not (0<=tx<self.width and 0<=ty<self.height):
+            return False
+        blocked = self.blocked & ~TILE_WALL_BIT if ghost else self.blocked
+        return not (self.flags[ty*self.width+tx] & blocked)
+
+    def is_wall(self, tx, ty):
+        return bool(self.flags[ty*self.width+tx] & TILE_WALL_BIT)
+
+def player_overlaps_wall(mask, px, py):
+    h = PLAYER_HALF_SIZE
+    for ty in range(int((py-h)//TILE_SIZE), int((py+h-1)//TILE_SIZE)+1):
+        for tx in range(int((px-h)//TILE_SIZE), int((px+h-1)//TILE_SIZE)+1):
+            if not (0<=tx<mask.width and 0<=ty<mask.height) or mask.is_wall(tx, ty):
+                return True
+    return False
+
+def _sweep_axis(mask, x0, y0, x1, y1, ghost_active, ghost_skill_wall_passed):
+    """
+    Test the player's AABB at (x1,y1) against every tile it overlaps.
+    Wall tiles already overlapped at (x0,y0) stay passable while the ghost
+    skill is active, so the player can walk through the one wall it entered.
+    Returns (allowed, entered_new_wall).
+    """
+    h = PLAYER_HALF_SIZE
+    w = mask.width
+    flags = mask.flags
+    blocked = mask.blocked
+    tx0 = int((x1-h)//TILE_SIZE)
+    tx1 = int((x1+h-1)//TILE_SIZE)
+    ty0 = int((y1-h)//TILE_SIZE)
+    ty1 = int((y1+h-1)//TILE_SIZE)
+    if tx0<0 or ty0<0 or tx1>=w or ty1>=mask.height:
+        return False, False
+
+    # fast path: nothing blocking under the footprint
+    hit = 0
+    for ty in range(ty0, ty1+1):
+        base = ty*w
+        for tx in range(tx0, tx1+1):
+            hit |= flags[base+tx]
+    if not (hit & blocked):
+        return True, False
+    if not ghost_active or (hit & blocked & ~TILE_WALL_BIT):
+        return False, False
+
+    # ghost: only walls block; allow the walls we are already inside.
+    # New wall tiles may be entered once, and only if every wall tile
+    # under the footprint is then in one row or one column, so a step
+    # into a corner cannot start inside two walls at once.
+    ox0 = int((x0-h)//TILE_SIZE)
+    ox1 = int((x0+h-1)//TILE_SIZE)
+    oy0 = int((y0-h)//TILE_SIZE)
+    oy1 = int((y0+h-1)//TILE_SIZE)
+    entered = False
+    wall_cols = set()
+    wall_rows = set()
+    for ty in range(ty0, ty1+1):
+        for tx in range(tx0, tx1+1):
+            if flags[ty*w+tx] & TILE_WALL_BIT:
+                wall_cols.add(tx)
+                wall_rows.add(ty)
+                if not (ox0<=tx<=ox1 and oy0<=ty<=oy1):
+                    entered = True
+    if not entered:
+        return True, False
+    if ghost_skill_wall_passed or (len(wall_cols)>1 and len(wall_rows)>1):
+        return False, False
+    return True, True
+
 def move_player_with_diagonal(player_x, player_y, vel_x, vel_y,
-                              maze, key_inventory,
+                              passability,
                               ghost_active, ghost_skill_wall_passed):
-    old_px = player_x
-    old_py = player_y
-
+    """Move X then Y, sweeping the player's footprint against the mask."""
     # X movement
-    temp_x = player_x + vel_x
-    temp_y = player_y
-    tx=int(temp_x//TILE_SIZE)
-    ty=int(temp_y//TILE_SIZE)
-    if tile_passable_with_ghost(maze, tx, ty, key_inventory,
-                                ghost_active, ghost_skill_wall_passed):
-        # If it's a wall, consume pass
-        if maze[ty][tx]==1 and ghost_active and not ghost_skill_wall_passed:
-            ghost_skill_wall_passed=True
-        player_x = temp_x
+    if vel_x:
+        ok, entered = _sweep_axis(passability, player_x, player_y,
+                                  player_x+vel_x, player_y,
+                                  ghost_active, ghost_skill_wall_passed)
+        if ok:
+            # If it's a wall, consume pass
+            if entered:
+                ghost_skill_wall_passed=True
+            player_x += vel_x
 
     # Y movement
-    temp_x = player_x
-    temp_y = player_y + vel_y
-    tx=int(temp_x//TILE_SIZE)
-    ty=int(temp_y//TILE_SIZE)
-    if tile_passable_with_ghost(maze, tx, ty, key_inventory,
-                                ghost_active, ghost_skill_wall_passed):
-        if maze[ty][tx]==1 and ghost_active and not ghost_skill_wall_passed:
-            ghost_skill_wall_passed=True
-        player_y = temp_y
+    if vel_y:
+        ok, entered = _sweep_axis(passability, player_x, player_y,
+                                  player_x, player_y+vel_y,
+                                  ghost_active, ghost_skill_wall_passed)
+        if ok:
+            if entered:
+                ghost_skill_wall_passed=True
+            player_y += vel_y
 
     return player_x, player_y, ghost_skill_wall_passed
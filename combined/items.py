@@ -1,40 +1,33 @@
 # items.py
 
-import random
-from config import GRID_WIDTH, GRID_HEIGHT, TILE_SIZE, POINT_COUNT
+from config import TILE_SIZE, POINT_COUNT, KEY_TYPES
+from entities import Item, ItemType
+from maze import free_floor_tiles, take_random_tiles
 
-def spawn_items(maze, count, item_type):
-    """Spawn 'count' items of given type in empty tiles."""
+def spawn_items(maze, count, item_type, key=-1, free_tiles=None):
+    """
+    Spawn 'count' items of given type in empty tiles. Used tiles are
+    removed from free_tiles (see maze.free_floor_tiles) when it is given.
+    """
+    if free_tiles is None:
+        free_tiles=free_floor_tiles(maze)
     items=[]
-    h=len(maze)
-    w=len(maze[0])
-    tries=0
-    while len(items)<count and tries<5000:
-        tries+=1
-        tx=random.randint(1,w-2)
-        ty=random.randint(1,h-2)
-        if maze[ty][tx]==0:
-            px=tx*TILE_SIZE + TILE_SIZE//2
-            py=ty*TILE_SIZE + TILE_SIZE//2
-            items.append([px,py,item_type])
+    for tx,ty in take_random_tiles(free_tiles, count):
+        px=tx*TILE_SIZE + TILE_SIZE//2
+        py=ty*TILE_SIZE + TILE_SIZE//2
+        items.append(Item(px,py,item_type,key))
     return items
 
-def spawn_keys(maze):
+def spawn_keys(maze, free_tiles=None, key_types=KEY_TYPES):
+    """One key of each of the key_types colours."""
+    if free_tiles is None:
+        free_tiles=free_floor_tiles(maze)
     all_keys=[]
-    for kt in ["key0","key1","key2"]:
-        one=spawn_items(maze,1,kt)
+    for k in range(key_types):
+        one=spawn_items(maze,1,ItemType.KEY,k,free_tiles)
         all_keys.extend(one)
     return all_keys
 
-def spawn_finish_portal(maze):
-    tries=0
-    while tries<5000:
-        tries+=1
-        import random
-        tx=random.randint(1,GRID_WIDTH-2)
-        ty=random.randint(1,GRID_HEIGHT-2)
-        if maze[ty][tx]==0:
-            px=tx*TILE_SIZE+TILE_SIZE//2
-            py=ty*TILE_SIZE+TILE_SIZE//2
-            return [px,py,"finish_portal"]
-    return None
+def spawn_finish_portal(maze, free_tiles=None):
+    one=spawn_items(maze,1,ItemType.PORTAL,free_tiles=free_tiles)
+    return one[0] if one else None
@@ -0,0 +1,76 @@
+# layout.py
+#
+# Screen geometry, computed once per window size. main.py calls resize()
+# on VIDEORESIZE (and after display mode changes); scenes read their rects
+# from here instead of asking the screen every frame.
+
+import pygame
+
+BUTTON_WIDTH=220
+BUTTON_HEIGHT=50
+BUTTON_SPACING=10
+HUD_LINE_HEIGHT=30
+
+def layout_menu_buttons(width, height, labels):
+    """Centred column of (label, rect) buttons for a width x height screen."""
+    total_height=len(labels)*(BUTTON_HEIGHT+BUTTON_SPACING)
+    start_y=(height-total_height)//2
+    result=[]
+    for i,txt in enumerate(labels):
+        rect=pygame.Rect(0,0,BUTTON_WIDTH,BUTTON_HEIGHT)
+        rect.centerx=width//2
+        rect.y=start_y + i*(BUTTON_HEIGHT+BUTTON_SPACING)
+        result.append((txt,rect))
+    return result
+
+class Layout:
+    """
+    Cached rects for one window size. With render_height set, the maze is
+    drawn into a back buffer about that many pixels tall and scaled up by
+    an integer factor, at most max_scale (the canvas's limit), so fill
+    cost no longer grows with the monitor.
+    """
+
+    def __init__(self, width, height, render_height=None, max_scale=None):
+        self.render_height=render_height
+        self.max_scale=max_scale
+        self.generation=0
+        self.resize(width, height)
+
+    def resize(self, width, height):
+        self.width=width
+        self.height=height
+        self.center_x=width//2
+        self.generation+=1
+        self._columns={}
+
+        self.back_rect=pygame.Rect(20,20,100,40)
+        self.game_menu_rect=pygame.Rect(10,10,80,40)
+        self.hud_lines=[(10, 60+i*HUD_LINE_HEIGHT) for i in range(4)]
+
+        # maze view: screen size, or a smaller buffer scaled up
+        scale=1
+        if self.render_height:
+            scale=max(1, height//self.render_height)
+            if self.max_scale:
+                scale=min(scale, self.max_scale)
+        self.scale=scale
+        self.view_size=(width//scale, height//scale)
+        # where the scaled buffer lands; the leftover border is < scale px
+        self.maze_rect=pygame.Rect(0,0,self.view_size[0]*scale,self.view_size[1]*scale)
+        self.maze_rect.center=(width//2, height//2)
+
+    def menu_column(self, labels):
+        """layout_menu_buttons for this size, cached per label list."""
+        labels=tuple(labels)
+        buttons=self._columns.get(labels)
+        if buttons is None:
+            buttons=layout_menu_buttons(self.width, self.height, labels)
+            self._columns[labels]=buttons
+        # copies, so callers can extend the list
+        return list(buttons)
+
+    def centered_rect(self, w, h, cy):
+        r=pygame.Rect(0,0,w,h)
+        r.center=(self.center_x, cy)
+        return r
@@ -0,0 +1,170 @@
+# levelfile.py
+#
+# Binary level files (.cglv) for curated levels and very large mazes:
+# a header, the grid as one uint8 per tile (row-major), an item table, an
+# enemy table and optionally the level's NavCache bytes. LevelFile mmaps
+# the file, so nothing is parsed up front: the maze rows handed to the game
+# are memoryview slices of the mapping. Export and inspect with
+#   python levelfile.py export 3 -o level3.cglv --seed 1 --nav
+#   python levelfile.py info level3.cglv
+
+import sys
+import mmap
+import hashlib
+import struct
+import random
+import argparse
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from entities import Item, Enemy, ItemType
+from navigation import NavCache
+
+LEVEL_MAGIC = b"CGLV"
+LEVEL_VERSION = 1
+_HEADER = "<HHHHIII"   # version, level, width, height, items, enemies, nav bytes
+_ITEM = "<iiBb"        # pixel x, pixel y, kind, key
+_ENEMY = "<ddddd"      # x, y, dx, dy, direction change cooldown
+
+def level_to_bytes(level, maze, items, enemies=(), nav_cache=None):
+    """Serialise a level; nav_cache (a NavCache) is embedded if given."""
+    nav=nav_cache.to_bytes() if nav_cache is not None else b""
+    out=[LEVEL_MAGIC, struct.pack(_HEADER, LEVEL_VERSION, level, len(maze[0]), len(maze),
+                                  len(items), len(enemies), len(nav))]
+    out.extend(bytes(row) for row in maze)
+    for it in items:
+        out.append(struct.pack(_ITEM, int(it.x), int(it.y), it.kind, it.key))
+    for e in enemies:
+        out.append(struct.pack(_ENEMY, e.x, e.y, e.dx, e.dy, e.dir_change_cooldown))
+    out.append(nav)
+    return b"".join(out)
+
+def write_level(path, level, maze, items, enemies=(), nav_cache=None):
+    with open(path, "wb") as f:
+        f.write(level_to_bytes(level, maze, items, enemies, nav_cache))
+
+class LevelFile:
+    """
+    A level file in memory (from_bytes) or mapped from disk (open). The
+    grid is exposed without copying: `grid` is a flat memoryview, rows()
+    gives one memoryview per row (indexable like the maze lists) and
+    array() a NumPy view if NumPy is installed. Items and enemies are
+    decoded into fresh objects on every call, since the game mutates them.
+    Rows handed out keep the mapping alive after the LevelFile is gone.
+    """
+
+    def __init__(self, data):
+        buf=memoryview(data)
+        if buf[:4]!=LEVEL_MAGIC:
+            raise ValueError("not a level file")
+        (version, self.level, self.width, self.height,
+         self.item_count, self.enemy_count, nav_size) = struct.unpack_from(_HEADER, buf, 4)
+        if version!=LEVEL_VERSION:
+            raise ValueError(f"unsupported level file version {version}")
+        off=4+struct.calcsize(_HEADER)
+        self.grid=buf[off:off+self.width*self.height]
+        off+=self.width*self.height
+        self._items_at=off
+        off+=self.item_count*struct.calcsize(_ITEM)
+        self._enemies_at=off
+        off+=self.enemy_count*struct.calcsize(_ENEMY)
+        self._nav=buf[off:off+nav_size] if nav_size else None
+        if len(buf)<off+nav_size:
+            raise ValueError("level file is truncated")
+        self._buf=buf
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(data)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            try:
+                data=mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                raise ValueError("not a level file") from None
+        return cls(data)
+
+    # grid -----------------------------------------------------------------
+    def tile(self, x, y):
+        return self.grid[y*self.width+x]
+
+    def rows(self):
+        """The maze as a list of read-only memoryview rows (no copy)."""
+        w=self.width
+        grid=self.grid
+        return [grid[y*w:(y+1)*w] for y in range(self.height)]
+
+    def maze(self):
+        """The maze as nested lists (a copy), for code that edits it."""
+        return [list(row) for row in self.rows()]
+
+    def array(self):
+        """(height, width) uint8 NumPy view of the grid."""
+        if numpy is None:
+            raise ImportError("numpy is not installed")
+        return numpy.frombuffer(self.grid, dtype=numpy.uint8).reshape(self.height, self.width)
+
+    # entities -------------------------------------------------------------
+    def items(self):
+        end=self._enemies_at
+        return [Item(x, y, ItemType(kind), key)
+                for x,y,kind,key in struct.iter_unpack(_ITEM, self._buf[self._items_at:end])]
+
+    def enemies(self):
+        end=self._enemies_at+self.enemy_count*struct.calcsize(_ENEMY)
+        return [Enemy(*fields)
+                for fields in struct.iter_unpack(_ENEMY, self._buf[self._enemies_at:end])]
+
+    def nav_cache(self, maze=None):
+        """The embedded NavCache, or None if the file has none."""
+        if self._nav is None:
+            return None
+        return NavCache.from_bytes(maze if maze is not None else self.rows(), self._nav)
+
+    def digest(self):
+        """sha256 hex digest of the whole file."""
+        return hashlib.sha256(self._buf).hexdigest()
+
+    @property
+    def has_nav(self):
+        return self._nav is not None
+
+# -------------------------------------------------------------------------
+def parse_args(argv=None):
+    parser=argparse.ArgumentParser(description="Export or inspect binary level files.")
+    sub=parser.add_subparsers(dest="command", required=True)
+    exp=sub.add_parser("export", help="generate a level and write it")
+    exp.add_argument("level", type=int)
+    exp.add_argument("-o", "--output", required=True)
+    exp.add_argument("--seed", type=int, default=None)
+    exp.add_argument("--grid", type=int, nargs=2, metavar=("W", "H"), default=None)
+    exp.add_argument("--nav", action="store_true",
+                     help="embed the navigation cache")
+    info=sub.add_parser("info", help="print a level file's contents")
+    info.add_argument("path")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args=parse_args(argv)
+    if args.command=="export":
+        from game_logic import setup_level
+        if args.seed is not None:
+            random.seed(args.seed)
+        setup_level(args.level, args.grid, nav=args.nav, export=args.output)
+        print(f"level {args.level} -> {args.output}")
+        return 0
+    lf=LevelFile.open(args.path)
+    kinds=[it.kind for it in lf.items()]
+    print(f"level {lf.level}, {lf.width}x{lf.height} tiles")
+    print(f"  points {kinds.count(ItemType.POINT)}, keys {kinds.count(ItemType.KEY)}, "
+          f"portal {kinds.count(ItemType.PORTAL)}, enemies {lf.enemy_count}")
+    print(f"  navigation cache: {'yes' if lf.has_nav else 'no'}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
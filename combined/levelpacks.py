@@ -0,0 +1,124 @@
+# levelpacks.py
+#
+# Hand-authored level packs: a directory or .zip of .cglv level files
+# (see levelfile.py), played in file name order. Opening a pack only lists
+# the file names; a level is read when it is played. Each level is checked
+# with is_level_valid once, and the result is cached on disk by content
+# hash (LEVEL_VALIDATION_CACHE). Warm the cache before shipping a pack with
+#   python levelpacks.py validate levels/
+# so players never pay for validation.
+
+import os
+import sys
+import json
+import time
+import zipfile
+import argparse
+
+from config import LEVEL_VALIDATION_CACHE
+from levelfile import LevelFile
+from game_logic import is_level_valid
+import metrics
+
+LEVEL_SUFFIX = ".cglv"
+CACHE_VERSION = 1
+
+class ValidationCache:
+    """Level validity by sha256 digest, persisted as JSON."""
+
+    def __init__(self, path=LEVEL_VALIDATION_CACHE):
+        self.path=path
+        self.results={}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    data=json.load(f)
+                if data.get("version")==CACHE_VERSION:
+                    self.results=data.get("levels", {})
+            except (OSError, ValueError):
+                pass  # rebuilt as levels are checked
+
+    def check(self, lf):
+        """Is LevelFile lf valid? Validates and records it on a miss."""
+        digest=lf.digest()
+        valid=self.results.get(digest)
+        if valid is None:
+            t0=time.perf_counter()
+            valid=is_level_valid(lf.rows(), lf.items())
+            if metrics.enabled:
+                metrics.VALIDATION_SECONDS.observe(time.perf_counter()-t0)
+            self.results[digest]=valid
+            self.save()
+        return valid
+
+    def save(self):
+        if self.path:
+            with open(self.path, "w") as f:
+                json.dump({"version": CACHE_VERSION, "levels": self.results}, f)
+
+class LevelPack:
+    """
+    The levels of a pack, numbered from 1. load(n) reads only level n and
+    raises ValueError if it is not a valid level.
+    """
+
+    def __init__(self, path, cache=None):
+        self.path=path
+        self.cache=cache if cache is not None else ValidationCache()
+        self.is_zip=zipfile.is_zipfile(path)
+        if self.is_zip:
+            with zipfile.ZipFile(path) as z:
+                names=[n for n in z.namelist() if n.endswith(LEVEL_SUFFIX)]
+        else:
+            names=[n for n in os.listdir(path) if n.endswith(LEVEL_SUFFIX)]
+        self.names=sorted(names)
+        if not self.names:
+            raise ValueError(f"no {LEVEL_SUFFIX} files in {path}")
+
+    def __len__(self):
+        return len(self.names)
+
+    def title(self, n):
+        """Display name of level n (its file name without the suffix)."""
+        return os.path.basename(self.names[n-1])[:-len(LEVEL_SUFFIX)]
+
+    def read(self, n):
+        """LevelFile of level n, without validating it."""
+        name=self.names[n-1]
+        if self.is_zip:
+            with zipfile.ZipFile(self.path) as z:
+                return LevelFile.from_bytes(z.read(name))
+        return LevelFile.open(os.path.join(self.path, name))
+
+    def load(self, n):
+        lf=self.read(n)
+        if not self.cache.check(lf):
+            raise ValueError(f"{self.names[n-1]} is not a valid level")
+        return lf
+
+# -------------------------------------------------------------------------
+def parse_args(argv=None):
+    parser=argparse.ArgumentParser(description="Check level packs.")
+    sub=parser.add_subparsers(dest="command", required=True)
+    val=sub.add_parser("validate", help="validate every level and fill the cache")
+    val.add_argument("pack", help="directory or .zip of level files")
+    val.add_argument("--cache", default=LEVEL_VALIDATION_CACHE)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args=parse_args(argv)
+    pack=LevelPack(args.pack, ValidationCache(args.cache))
+    bad=0
+    for n in range(1, len(pack)+1):
+        try:
+            pack.load(n)
+            status="ok"
+        except ValueError as e:
+            status=str(e)
+            bad+=1
+        print(f"{n:3d} {pack.names[n-1]}: {status}")
+    print(f"{len(pack)-bad}/{len(pack)} levels valid -> {args.cache}")
+    return 1 if bad else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
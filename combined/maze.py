@@ -3,7 +3,7 @@
 import random
 from config import (
     GRID_WIDTH, GRID_HEIGHT,
-    ROOM_COUNT, MAX_ROOM_SIZE, DOOR_COUNT
+    ROOM_COUNT, MAX_ROOM_SIZE, DOOR_COUNT, KEY_TYPES
 )
 
 def generate_maze(width, height):
@@ -37,6 +37,202 @@ def generate_maze(width, height):
         maze[j][width-1]=1
     return maze
 
+# -------------------------------------------------------------------------
+# Alternative generators. All of them use the same layout as generate_maze:
+# cells on odd (x, y), walls everywhere else, border left as wall, so rooms,
+# doors and validation work unchanged.
+# -------------------------------------------------------------------------
+def _cell_dims(width, height):
+    return (width-1)//2, (height-1)//2
+
+def _wall_grid(width, height):
+    return [[1]*width for _ in range(height)]
+
+def iter_eller_rows(width, height):
+    """
+    Eller's algorithm, yielding the maze one tile row at a time.
+    Only the current cell row's set labels are kept: O(width) memory.
+    """
+    cw, ch = _cell_dims(width, height)
+    yield [1]*width
+    sets=[0]*cw
+    members={}
+    next_id=1
+    for i in range(cw):
+        sets[i]=next_id
+        members[next_id]=[i]
+        next_id+=1
+    for j in range(ch):
+        last=(j==ch-1)
+        row=[1]*width
+        for i in range(cw):
+            row[2*i+1]=0
+        # join neighbours horizontally (always on the last row)
+        for i in range(cw-1):
+            a=sets[i]
+            b=sets[i+1]
+            if a!=b and (last or random.random()<0.5):
+                row[2*i+2]=0
+                if len(members[a])<len(members[b]):
+                    a,b=b,a
+                for c in members[b]:
+                    sets[c]=a
+                members[a].extend(members.pop(b))
+        yield row
+
+        below=[1]*width
+        if not last:
+            # every set carries on downwards at least once
+            keep=set()
+            for cells in members.values():
+                down=[c for c in cells if random.random()<0.5]
+                if not down:
+                    down=[random.choice(cells)]
+                keep.update(down)
+            members={}
+            for i in range(cw):
+                if i in keep:
+                    below[2*i+1]=0
+                else:
+                    sets[i]=next_id
+                    next_id+=1
+                members.setdefault(sets[i], []).append(i)
+        yield below
+    for _ in range(height-1-2*ch):
+        yield [1]*width
+
+def generate_maze_eller(width, height):
+    return list(iter_eller_rows(width, height))
+
+def generate_maze_wilson(width, height):
+    """Wilson's algorithm: loop-erased random walks, uniform spanning tree."""
+    cw, ch = _cell_dims(width, height)
+    n=cw*ch
+    maze=_wall_grid(width, height)
+    in_tree=bytearray(n)
+    step=bytearray(n)  # direction last taken out of each cell during a walk
+    moves=((1,0),(-1,0),(0,1),(0,-1))
+    root=random.randrange(n)
+    in_tree[root]=1
+    maze[2*(root//cw)+1][2*(root%cw)+1]=0
+    for start in range(n):
+        if in_tree[start]:
+            continue
+        # random walk until the tree is hit, remembering the last exit
+        c=start
+        while not in_tree[c]:
+            x=c%cw
+            y=c//cw
+            while True:
+                d=random.randrange(4)
+                dx,dy=moves[d]
+                if 0<=x+dx<cw and 0<=y+dy<ch:
+                    break
+            step[c]=d
+            c=(y+dy)*cw+x+dx
+        # retrace the loop-erased path and carve it
+        c=start
+        while not in_tree[c]:
+            in_tree[c]=1
+            x=c%cw
+            y=c//cw
+            dx,dy=moves[step[c]]
+            maze[2*y+1][2*x+1]=0
+            maze[2*y+1+dy][2*x+1+dx]=0
+            c=(y+dy)*cw+x+dx
+    return maze
+
+def generate_maze_kruskal(width, height):
+    """Randomised Kruskal with a union-find over cells."""
+    cw, ch = _cell_dims(width, height)
+    maze=_wall_grid(width, height)
+    parent=list(range(cw*ch))
+
+    def find(c):
+        while parent[c]!=c:
+            parent[c]=parent[parent[c]]
+            c=parent[c]
+        return c
+
+    for y in range(ch):
+        row=maze[2*y+1]
+        for x in range(cw):
+            row[2*x+1]=0
+    # edge e: cell e//2, east if e is even, south if odd
+    edges=[]
+    for c in range(cw*ch):
+        if c%cw<cw-1:
+            edges.append(2*c)
+        if c//cw<ch-1:
+            edges.append(2*c+1)
+    random.shuffle(edges)
+    for e in edges:
+        c=e>>1
+        other=c+1 if not e&1 else c+cw
+        a=find(c)
+        b=find(other)
+        if a!=b:
+            parent[a]=b
+            x=c%cw
+            y=c//cw
+            if e&1:
+                maze[2*y+2][2*x+1]=0
+            else:
+                maze[2*y+1][2*x+2]=0
+    return maze
+
+def generate_maze_binary_tree(width, height):
+    """Binary tree: every cell opens north or east. Rows are independent."""
+    cw, ch = _cell_dims(width, height)
+    maze=_wall_grid(width, height)
+    east=[2*x+2 for x in range(cw-1)]
+    for y in range(ch):
+        row=maze[2*y+1]
+        row[1:2*cw:2]=[0]*cw
+        if y==0:
+            for tx in east:
+                row[tx]=0
+            continue
+        north=maze[2*y]
+        bits=random.getrandbits(cw)
+        for x in range(cw-1):
+            if bits>>x & 1:
+                row[2*x+2]=0
+            else:
+                north[2*x+1]=0
+        north[2*cw-1]=0  # east column always opens north
+    return maze
+
+def generate_maze_sidewinder(width, height):
+    """Sidewinder: runs of east passages, each closed by one opening north."""
+    cw, ch = _cell_dims(width, height)
+    maze=_wall_grid(width, height)
+    for y in range(ch):
+        row=maze[2*y+1]
+        row[1:2*cw:2]=[0]*cw
+        if y==0:
+            row[1:2*cw]=[0]*(2*cw-1)
+            continue
+        north=maze[2*y]
+        run_start=0
+        for x in range(cw):
+            if x<cw-1 and random.random()<0.5:
+                row[2*x+2]=0
+            else:
+                c=random.randint(run_start, x)
+                north[2*c+1]=0
+                run_start=x+1
+    return maze
+
+MAZE_GENERATORS = {
+    "backtracker": generate_maze,
+    "eller": generate_maze_eller,
+    "wilson": generate_maze_wilson,
+    "kruskal": generate_maze_kruskal,
+    "binary_tree": generate_maze_binary_tree,
+    "sidewinder": generate_maze_sidewinder,
+}
+
 def carve_rooms(maze, room_count=ROOM_COUNT, max_room_size=MAX_ROOM_SIZE):
     h=len(maze)
     w=len(maze[0])
@@ -45,21 +241,49 @@ def carve_rooms(maze, room_count=ROOM_COUNT, max_room_size=MAX_ROOM_SIZE):
         rh=random.randint(3, max_room_size)
         x=random.randint(2, w-rw-2)
         y=random.randint(2, h-rh-2)
+        floor=[0]*rw
         for ry in range(y,y+rh):
-            for rx in range(x,x+rw):
-                maze[ry][rx]=0
+            maze[ry][x:x+rw]=floor
 
-def place_doors(maze, door_count=DOOR_COUNT):
-    door_vals=[2,3,4]
-    random.shuffle(door_vals)
+# -------------------------------------------------------------------------
+# Spawn sampling: pick from the list of free floor tiles instead of
+# retrying random positions, so it is O(k) and never comes up short
+# while space exists.
+# -------------------------------------------------------------------------
+START_TILE = (1, 1)
+
+def free_floor_tiles(maze, margin=1, exclude=(START_TILE,)):
+    """All (tx, ty) floor tiles at least `margin` from the edge, minus `exclude`."""
     h=len(maze)
     w=len(maze[0])
-    placed=0
-    tries=0
-    while placed<door_count and tries<1000:
-        tries+=1
-        xx=random.randint(2,w-3)
-        yy=random.randint(2,h-3)
-        if maze[yy][xx]==0:
-            maze[yy][xx]=door_vals[placed]
-            placed+=1
+    skip={}
+    for x,y in exclude:
+        skip.setdefault(y, set()).add(x)
+    free=[]
+    for y in range(margin, h-margin):
+        cols=[x for x,tv in enumerate(maze[y][margin:w-margin], margin) if tv==0]
+        if y in skip:
+            cols=[x for x in cols if x not in skip[y]]
+        free.extend([(x,y) for x in cols])
+    return free
+
+def take_random_tiles(free, k):
+    """
+    Remove and return up to k random tiles from `free` (without
+    replacement). Swap-removes, so each pick is O(1).
+    """
+    picked=[]
+    for _ in range(min(k, len(free))):
+        i=random.randrange(len(free))
+        free[i], free[-1] = free[-1], free[i]
+        picked.append(free.pop())
+    return picked
+
+def place_doors(maze, door_count=DOOR_COUNT, key_types=KEY_TYPES):
+    """At most one door per colour; door value k+2 is opened by key k."""
+    door_vals=list(range(2, key_types+2))
+    random.shuffle(door_vals)
+    door_count=min(door_count, len(door_vals))
+    spots=take_random_tiles(free_floor_tiles(maze, margin=2), door_count)
+    for (xx,yy),val in zip(spots, door_vals):
+        maze[yy][xx]=val
@@ -0,0 +1,153 @@
+# memdiag.py
+#
+# Memory diagnostics for long kiosk sessions. A MemoryTracker takes a
+# tracemalloc snapshot after every level load and reports the biggest
+# allocation sites and what grew since the first snapshot. In the game:
+#   python main.py --memdiag           (report printed on exit)
+# Headless, over many level resets:
+#   python memdiag.py --resets 200
+#   python memdiag.py --check          (1000 resets; exit 1 if memory grows)
+# --check compares each level with itself, after a warm-up, because a
+# level 6 maze is bigger than a level 1 maze. tests/test_memory_resets.py
+# runs the same check. --nav also builds the bots' NavCache (much slower).
+
+import gc
+import sys
+import argparse
+import tracemalloc
+
+from config import MAX_LEVEL
+from session import GameSession
+
+_IGNORED = (
+    tracemalloc.__file__,
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+    "<unknown>",
+    __file__,   # the tracker's own history
+)
+_FILTERS = [tracemalloc.Filter(False, name) for name in _IGNORED]
+
+def _traced_size(snap):
+    # grouping by file is much cheaper than filter_traces() on every snapshot
+    return sum(stat.size for stat in snap.statistics("filename")
+               if stat.traceback[0].filename not in _IGNORED)
+
+class MemoryTracker:
+    """
+    tracemalloc snapshots labelled by the caller. Keeps the traced size
+    at every snapshot (history) but only the first and latest snapshots.
+    """
+
+    def __init__(self, frames=1):
+        self.frames=frames
+        self.history=[]   # (label, traced bytes)
+        self.first=None
+        self.last=None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def stop(self):
+        tracemalloc.stop()
+
+    def snapshot(self, label):
+        gc.collect()   # count only what is still reachable
+        snap=tracemalloc.take_snapshot()
+        self.history.append((label, _traced_size(snap)))
+        if self.first is None:
+            self.first=snap
+        self.last=snap
+
+    def rebase(self):
+        """Measure growth from the latest snapshot on (after a warm-up)."""
+        self.first=self.last
+
+    def report(self, top=10):
+        if not self.history:
+            return "no snapshots"
+        sizes=[size for _label,size in self.history]
+        first_label=self.history[0][0]
+        last_label=self.history[-1][0]
+        lines=[
+            f"{len(sizes)} snapshots: first {sizes[0]/1024:.0f} KiB ({first_label}), "
+            f"last {sizes[-1]/1024:.0f} KiB ({last_label}), "
+            f"min {min(sizes)/1024:.0f} KiB, max {max(sizes)/1024:.0f} KiB",
+            f"top {top} allocation sites now:",
+        ]
+        first=self.first.filter_traces(_FILTERS)
+        last=self.last.filter_traces(_FILTERS)
+        for stat in last.statistics("lineno")[:top]:
+            lines.append(f"  {stat.size/1024:9.1f} KiB {stat.count:8d} blocks  {stat.traceback}")
+        lines.append(f"top {top} growth since the first snapshot:")
+        for stat in last.compare_to(first, "lineno")[:top]:
+            lines.append(f"  {stat.size_diff/1024:+9.1f} KiB {stat.count_diff:+8d} blocks  "
+                         f"{stat.traceback}")
+        return "\n".join(lines)
+
+# -------------------------------------------------------------------------
+def run_resets(resets, levels, nav=False, tracker=None, warmup=0):
+    """
+    Load `resets` levels headless, cycling through `levels`, with a
+    snapshot after each. Returns {level: [traced bytes after each load]}.
+    The tracker is rebased after the first `warmup` loads.
+    """
+    tracker=tracker or MemoryTracker()
+    tracker.start()
+    session=GameSession(nav=nav)
+    sizes={}
+    for i in range(resets):
+        level=levels[i%len(levels)]
+        session.start(level, seed=i)
+        if session.visibility:
+            session.visibility.wait()   # measure the finished table, not a partial one
+        tracker.snapshot(f"reset {i+1}, level {level}")
+        sizes.setdefault(level, []).append(tracker.history[-1][1])
+        if i+1==warmup:
+            tracker.rebase()
+    return sizes
+
+def parse_args(argv=None):
+    parser=argparse.ArgumentParser(description="Track memory across level resets.")
+    parser.add_argument("--levels", type=int, nargs="+",
+                        default=list(range(1, MAX_LEVEL+1)))
+    parser.add_argument("--resets", type=int, default=None,
+                        help="levels to load (default: 100, or 1000 with --check)")
+    parser.add_argument("--warmup", type=int, default=None,
+                        help="loads before measuring growth (default: a tenth)")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--nav", action="store_true",
+                        help="also build the navigation cache, as the bots do")
+    parser.add_argument("--check", action="store_true",
+                        help="fail if any level grew by more than --limit-kb")
+    parser.add_argument("--limit-kb", type=float, default=256)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args=parse_args(argv)
+    resets=args.resets or (1000 if args.check else 100)
+    warmup=args.warmup if args.warmup is not None else max(len(args.levels), resets//10)
+    tracker=MemoryTracker()
+    sizes=run_resets(resets, args.levels, args.nav, tracker, warmup)
+    tracker.stop()
+    print(tracker.report(args.top))
+
+    per_level=len(args.levels)
+    worst=0
+    print("growth per level after the warm-up:")
+    for level,values in sorted(sizes.items()):
+        start=values[min(len(values)-1, warmup//per_level)]
+        growth=values[-1]-start
+        worst=max(worst, growth)
+        print(f"  level {level}: {start/1024:8.0f} -> {values[-1]/1024:8.0f} KiB ({growth/1024:+.1f})")
+    if args.check:
+        if worst>args.limit_kb*1024:
+            print(f"FAIL: memory grew by {worst/1024:.1f} KiB over {resets} resets "
+                  f"(limit {args.limit_kb:g} KiB)")
+            return 1
+        print(f"OK: growth at most {worst/1024:.1f} KiB over {resets} resets")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+# metrics.py
+#
+# Optional live telemetry for kiosk machines. The instruments below
+# (counters, gauges, histograms) are module globals. Code that records
+# them checks `metrics.enabled` first, so a normal run pays one attribute
+# lookup at each site and nothing else. enable() turns recording on, and
+# serve() exposes it in the Prometheus text format on a local HTTP port,
+# from a daemon thread:
+#   python main.py --metrics-port 9100
+#   curl http://127.0.0.1:9100/metrics
+# Without the game, play a few bot levels in-process and print the result:
+#   python metrics.py --levels 2 5 --runs 2
+
+import sys
+import math
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+enabled=False
+_registry=[]
+
+def _format(value):
+    if value==math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic count."""
+    kind="counter"
+
+    def __init__(self, name, help):
+        self.name=name
+        self.help=help
+        self.value=0
+        _registry.append(self)
+
+    def inc(self, amount=1):
+        self.value+=amount
+
+    def samples(self):
+        yield self.name, "", self.value
+
+class Gauge(Counter):
+    """Value that goes up and down."""
+    kind="gauge"
+
+    def set(self, value):
+        self.value=value
+
+class Histogram:
+    """Observations counted into cumulative `le` buckets, Prometheus style."""
+    kind="histogram"
+
+    def __init__(self, name, help, buckets):
+        self.name=name
+        self.help=help
+        self.bounds=tuple(sorted(buckets))+(math.inf,)
+        self.counts=[0]*len(self.bounds)
+        self.sum=0.0
+        self.count=0
+        self._lock=threading.Lock()   # observe() and samples() run on different threads
+        _registry.append(self)
+
+    def observe(self, value):
+        with self._lock:
+            for i,bound in enumerate(self.bounds):
+                if value<=bound:
+                    self.counts[i]+=1
+                    break
+            self.sum+=value
+            self.count+=1
+
+    def samples(self):
+        with self._lock:
+            counts=list(self.counts)
+            total, count = self.sum, self.count
+        running=0
+        for bound,n in zip(self.bounds, counts):
+            running+=n
+            yield self.name+"_bucket", f'{{le="{_format(bound)}"}}', running
+        yield self.name+"_sum", "", total
+        yield self.name+"_count", "", count
+
+# -------------------------------------------------------------------------
+# Instruments
+# -------------------------------------------------------------------------
+_SECONDS=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+FRAME_SECONDS=Histogram("game_frame_seconds", "Time between displayed frames.",
+                        (0.008, 0.0167, 0.025, 0.0334, 0.05, 0.1, 0.25))
+LEVELS_GENERATED=Counter("game_levels_generated_total", "Levels generated.")
+GENERATION_ATTEMPTS=Histogram("game_level_generation_attempts",
+                              "Layouts generated per valid level.",
+                              (1, 2, 3, 5, 10, 20, 50, 100))
+VALIDATION_SECONDS=Histogram("game_level_validation_seconds",
+                             "Time spent in is_level_valid per layout.", _SECONDS)
+PROFILE_SAVE_SECONDS=Histogram("game_profile_save_seconds",
+                               "Time to write the profiles file.", _SECONDS)
+POINTS_COLLECTED=Counter("game_points_collected_total", "Point items picked up.")
+KEYS_COLLECTED=Counter("game_keys_collected_total", "Keys picked up.")
+LEVELS_FINISHED=Counter("game_levels_finished_total", "Levels finished through the portal.")
+ENEMY_COLLISIONS=Counter("game_enemy_collisions_total", "Deaths by touching an enemy.")
+LEVEL=Gauge("game_level", "Level being played.")
+ENEMIES=Gauge("game_enemies", "Enemies in the current level.")
+
+def enable():
+    global enabled
+    enabled=True
+
+def render():
+    """Every instrument in the Prometheus text exposition format."""
+    out=[]
+    for metric in _registry:
+        out.append(f"# HELP {metric.name} {metric.help}")
+        out.append(f"# TYPE {metric.name} {metric.kind}")
+        for name,labels,value in metric.samples():
+            out.append(f"{name}{labels} {_format(value)}")
+    return "\n".join(out)+"\n"
+
+# -------------------------------------------------------------------------
+# Endpoint
+# -------------------------------------------------------------------------
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body=render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep scrapes out of the console
+
+def serve(port, host="127.0.0.1"):
+    """
+    enable() and serve /metrics on host:port from a daemon thread. Port 0
+    picks a free port; the server is returned (server_address, shutdown()).
+    """
+    enable()
+    server=ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads=True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+# -------------------------------------------------------------------------
+def parse_args(argv=None):
+    parser=argparse.ArgumentParser(description="Record metrics over bot-played levels.")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--runs", type=int, default=1,
+                        help="levels played per level number (default: %(default)s)")
+    parser.add_argument("--max-seconds", type=float, default=180)
+    parser.add_argument("--port", type=int, default=None,
+                        help="also serve the result on this port until Ctrl+C")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    from config import TICK_RATE
+    from bots import play_one
+    args=parse_args(argv)
+    enable()
+    for level in args.levels:
+        for seed in range(args.runs):
+            play_one((level, seed, int(args.max_seconds*TICK_RATE)))
+    sys.stdout.write(render())
+    if args.port is not None:
+        server=serve(args.port)
+        print(f"serving on http://{server.server_address[0]}:{server.server_address[1]}/metrics")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+# navigation.py
+#
+# Per-level distance cache, built by setup_level(nav=True) for the bots
+# and level tools (the game itself never needs it). It stores BFS
+# distance fields for every key-inventory state of the level from each
+# point of interest (start tile, items) and a few landmarks; levels with
+# more than EAGER_MAX_KEYS key types build fields on first use. Any query with
+# one endpoint on a field source is a single array lookup; other pairs use
+# A* with the landmark (ALT) lower bound and are memoised.
+
+import sys
+import heapq
+import struct
+from array import array
+
+from config import TILE_SIZE
+from entities import ItemType
+
+NAV_MAGIC = b"CGNV"
+NAV_VERSION = 2
+UNREACHABLE = -1
+EAGER_MAX_KEYS = 4   # with more key types, fields are only built on demand
+
+def _key_subsets(keys):
+    """All subsets of the key bitmask `keys`."""
+    states=[0]
+    for k in range(keys.bit_length()):
+        if keys>>k & 1:
+            states+=[s | (1<<k) for s in states]
+    return states
+
+class NavCache:
+    """
+    Distance queries over a static maze. `keys` arguments are bitmasks of
+    held key indices (bit k = key k), so doors of value k+2 are open when
+    bit k is set. Tiles are (tx, ty) tuples.
+    """
+
+    def __init__(self, maze, items=(), landmarks=4, eager=True):
+        self.height=len(maze)
+        self.width=len(maze[0])
+        self.tiles=array("B", [tv for row in maze for tv in row])
+        self.fields={}   # (keys, source index) -> array of distances
+        self.pair_cache={}
+        self._adj=None
+        level_keys=0
+        sources=[(1,1)]
+        for it in items:
+            sources.append((int(it.x//TILE_SIZE), int(it.y//TILE_SIZE)))
+            if it.kind==ItemType.KEY:
+                level_keys|=1<<it.key
+        self.level_keys=level_keys
+        self.sources=[]
+        for s in sources:
+            if s not in self.sources:
+                self.sources.append(s)
+        self.landmarks=self._pick_landmarks(landmarks)
+        self.source_index={s:i for i,s in enumerate(self.sources)}
+        if eager:
+            self._fill()
+
+    def _fill(self):
+        # every key subset (2^keys of them), so only for a few key types
+        if bin(self.level_keys).count("1")<=EAGER_MAX_KEYS:
+            for keys in _key_subsets(self.level_keys):
+                for i in range(len(self.sources)):
+                    self._field(keys, i)
+
+    # ---------------------------------------------------------------------
+    def _passable(self, tv, keys):
+        return tv==0 or (tv>=2 and (keys>>(tv-2)) & 1)
+
+    def _adjacency(self):
+        """Non-wall neighbours of every tile, built once per level."""
+        w=self.width
+        h=self.height
+        tiles=self.tiles
+        adj=[()]*(w*h)
+        for i,tv in enumerate(tiles):
+            if tv==1:
+                continue
+            x=i%w
+            adj[i]=tuple(n for n in (i-1 if x>0 else -1, i+1 if x<w-1 else -1, i-w, i+w)
+                         if 0<=n<w*h and tiles[n]!=1)
+        return adj
+
+    def _bfs(self, start, keys):
+        if self._adj is None:
+            self._adj=self._adjacency()
+        adj=self._adj
+        tiles=self.tiles
+        # 1 where passable for this key state (doors of held keys)
+        open_vals=bytes(1 if self._passable(v, keys) else 0 for v in range(256))
+        dist=array("i", [UNREACHABLE])*len(tiles)
+        sx,sy=start
+        s=sy*self.width+sx
+        dist[s]=0
+        frontier=[s]
+        d=0
+        while frontier:
+            d+=1
+            nxt=[]
+            for i in frontier:
+                for n in adj[i]:
+                    if dist[n]<0 and open_vals[tiles[n]]:
+                        dist[n]=d
+                        nxt.append(n)
+            frontier=nxt
+        return dist
+
+    def _field(self, keys, i):
+        f=self.fields.get((keys,i))
+        if f is None:
+            f=self._bfs(self.sources[i], keys)
+            self.fields[(keys,i)]=f
+        return f
+
+    def _pick_landmarks(self, count):
+        """Farthest-point sampling with all keys held; landmarks become sources."""
+        chosen=[]
+        mins=None
+        seed=self.sources[0]
+        for _ in range(count):
+            if seed not in self.sources:
+                self.sources.append(seed)
+            d=self._field(self.level_keys, self.sources.index(seed))
+            if mins is None:
+                mins=array("i", d)
+            else:
+                for j,v in enumerate(d):
+                    if v<mins[j]:
+                        mins[j]=v
+            best=max(range(len(mins)), key=mins.__getitem__)
+            if mins[best]<=0:
+                break
+            seed=(best%self.width, best//self.width)
+            chosen.append(seed)
+            if seed not in self.sources:
+                self.sources.append(seed)
+        return chosen
+
+    def _key_state(self, keys):
+        # keys not used in this level make no difference
+        return keys & self.level_keys
+
+    # ---------------------------------------------------------------------
+    def distance(self, a, b, keys=0):
+        """Shortest walk length in tiles from a to b, or None if unreachable."""
+        keys=self._key_state(keys)
+        w=self.width
+        i=self.source_index.get(a)
+        if i is not None:
+            d=self._field(keys, i)[b[1]*w+b[0]]
+            return d if d>=0 else None
+        j=self.source_index.get(b)
+        if j is not None:
+            # the maze is undirected, so d(a, b) == d(b, a)
+            d=self._field(keys, j)[a[1]*w+a[0]]
+            return d if d>=0 else None
+        cache_key=(keys, a, b) if a<=b else (keys, b, a)
+        if cache_key not in self.pair_cache:
+            self.pair_cache[cache_key]=self._astar(a, b, keys)
+        return self.pair_cache[cache_key]
+
+    def distance_field(self, source, keys=0):
+        """The whole distance array from a point of interest (flat, row-major)."""
+        return self._field(self._key_state(keys), self.source_index[source])
+
+    def lower_bound(self, a, b, keys=0):
+        """ALT heuristic: max over landmarks of |d(L, a) - d(L, b)|."""
+        keys=self._key_state(keys)
+        w=self.width
+        ia=a[1]*w+a[0]
+        ib=b[1]*w+b[0]
+        best=0
+        for lm in self.landmarks:
+            f=self._field(keys, self.source_index[lm])
+            da=f[ia]
+            db=f[ib]
+            if da>=0 and db>=0:
+                best=max(best, abs(da-db))
+        return best
+
+    def _astar(self, a, b, keys):
+        w=self.width
+        h=self.height
+        tiles=self.tiles
+        goal=b[1]*w+b[0]
+        start=a[1]*w+a[0]
+        lm_fields=[self._field(keys, self.source_index[lm]) for lm in self.landmarks]
+        goal_d=[f[goal] for f in lm_fields]
+
+        def heuristic(i):
+            best=abs(i%w-b[0])+abs(i//w-b[1])
+            for f,gd in zip(lm_fields, goal_d):
+                di=f[i]
+                if di>=0 and gd>=0 and abs(di-gd)>best:
+                    best=abs(di-gd)
+            return best
+
+        g={start:0}
+        heap=[(heuristic(start), 0, start)]
+        while heap:
+            _f, gi, i=heapq.heappop(heap)
+            if i==goal:
+                return gi
+            if gi>g[i]:
+                continue
+            x=i%w
+            for n in (i-1 if x>0 else -1, i+1 if x<w-1 else -1, i-w, i+w):
+                if 0<=n<w*h and self._passable(tiles[n], keys):
+                    ng=gi+1
+                    if ng<g.get(n, ng+1):
+                        g[n]=ng
+                        heapq.heappush(heap, (ng+heuristic(n), ng, n))
+        return None
+
+    # ---------------------------------------------------------------------
+    # Persistence: header, source list, then every field as (key state,
+    # source index, int32 distances), so a saved level never has to
+    # recompute BFS. With few key types that is every key state.
+    # ---------------------------------------------------------------------
+    def to_bytes(self):
+        self._fill()
+        out=[NAV_MAGIC, struct.pack("<HHHIHHI", NAV_VERSION, self.width, self.height,
+                                    self.level_keys, len(self.sources), len(self.landmarks),
+                                    len(self.fields))]
+        for x,y in self.sources:
+            out.append(struct.pack("<HH", x, y))
+        for x,y in self.landmarks:
+            out.append(struct.pack("<HH", x, y))
+        for (keys,i),f in sorted(self.fields.items()):
+            out.append(struct.pack("<IH", keys, i))
+            if sys.byteorder=="big":
+                f=array("i", f)
+                f.byteswap()
+            out.append(f.tobytes())
+        return b"".join(out)
+
+    @classmethod
+    def from_bytes(cls, maze, data):
+        if data[:4]!=NAV_MAGIC:
+            raise ValueError("not a navigation cache")
+        version,w,h,level_keys,n_src,n_lm,n_fields=struct.unpack_from("<HHHIHHI", data, 4)
+        if version!=NAV_VERSION:
+            raise ValueError(f"unsupported navigation cache version {version}")
+        if (w,h)!=(len(maze[0]), len(maze)):
+            raise ValueError("navigation cache does not match the maze size")
+        nav=cls.__new__(cls)
+        nav.width=w
+        nav.height=h
+        nav.tiles=array("B", [tv for row in maze for tv in row])
+        nav.pair_cache={}
+        nav._adj=None
+        nav.level_keys=level_keys
+        off=4+struct.calcsize("<HHHIHHI")
+        pts=[struct.unpack_from("<HH", data, off+4*i) for i in range(n_src+n_lm)]
+        off+=4*(n_src+n_lm)
+        nav.sources=pts[:n_src]
+        nav.landmarks=pts[n_src:]
+        nav.source_index={s:i for i,s in enumerate(nav.sources)}
+        nav.fields={}
+        size=4*w*h
+        for _ in range(n_fields):
+            keys,i=struct.unpack_from("<IH", data, off)
+            off+=6
+            f=array("i")
+            f.frombytes(data[off:off+size])
+            if sys.byteorder=="big":
+                f.byteswap()
+            nav.fields[(keys,i)]=f
+            off+=size
+        return nav
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, maze, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(maze, f.read())
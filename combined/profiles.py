@@ -2,7 +2,9 @@
 
 import json
 import os
+import time
 from config import PROGRESS_FILE, MAX_LEVEL, DEFAULT_DISPLAY_MODE
+import metrics
 
 def load_profiles():
     """Load the JSON containing multiple user profiles."""
@@ -15,8 +17,11 @@ def load_profiles():
     return {"profiles": {}}
 
 def save_profiles(data):
+    t0=time.perf_counter()
     with open(PROGRESS_FILE, "w") as f:
         json.dump(data, f)
+    if metrics.enabled:
+        metrics.PROFILE_SAVE_SECONDS.observe(time.perf_counter()-t0)
 
 def get_or_create_profile(data, username):
     """
@@ -0,0 +1,218 @@
+# profiling.py
+#
+# Profile one screen at a time. A StateProfiler is told the game state and
+# level every frame. It starts profiling when they match the chosen ones
+# (e.g. only STATE_GAME on level 6) and writes a file when they stop
+# matching:
+#   python main.py --profile cprofile --profile-state game --profile-level 6
+#   python profiling.py profiles/game-level6-20240101-120000.prof
+# Modes: "cprofile" writes pstats .prof files, "pyinstrument" (if
+# installed) and "sample" write speedscope JSON (https://www.speedscope.app).
+# "sample" is built in: a daemon thread records the main thread's stack
+# every few milliseconds, so the game itself runs unchanged.
+#
+# Only the standard library is used, so main2.py (and its PyInstaller
+# build) imports this module too.
+
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import argparse
+import threading
+
+try:
+    import pyinstrument
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:
+    pyinstrument = None
+
+PROFILE_DIR = "profiles"
+SAMPLE_INTERVAL = 0.005   # seconds between stack samples
+PROFILE_MODES = ("cprofile", "pyinstrument", "sample")
+
+class _CProfile:
+    suffix=".prof"
+
+    def __init__(self, interval):
+        self.profiler=cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self, path):
+        self.profiler.disable()
+        self.profiler.dump_stats(path)
+
+class _Pyinstrument:
+    suffix=".speedscope.json"
+
+    def __init__(self, interval):
+        self.profiler=pyinstrument.Profiler(interval=interval)
+
+    def start(self):
+        self.profiler.start()
+
+    def stop(self, path):
+        self.profiler.stop()
+        with open(path, "w") as f:
+            f.write(self.profiler.output(SpeedscopeRenderer()))
+
+class _Sampler:
+    """Stack samples of the calling thread, taken from a daemon thread."""
+    suffix=".speedscope.json"
+
+    def __init__(self, interval):
+        self.interval=interval
+        self.target=None      # thread id of the sampled thread
+        self.frames=[]        # speedscope frame table
+        self.frame_index={}   # (name, file, line) -> index in frames
+        self.samples=[]       # stacks of frame indices, outermost first
+        self.weights=[]       # seconds each sample stands for
+        self._stop=threading.Event()
+        self._thread=None
+
+    def start(self):
+        self.target=threading.get_ident()
+        self._stop.clear()
+        self._thread=threading.Thread(target=self._run, name="sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        last=time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame=sys._current_frames().get(self.target)
+            now=time.perf_counter()
+            if frame is None:
+                continue
+            stack=[]
+            while frame is not None:
+                code=frame.f_code
+                key=(code.co_name, code.co_filename, code.co_firstlineno)
+                i=self.frame_index.get(key)
+                if i is None:
+                    i=len(self.frames)
+                    self.frame_index[key]=i
+                    self.frames.append({"name": key[0], "file": key[1], "line": key[2]})
+                stack.append(i)
+                frame=frame.f_back
+            stack.reverse()
+            self.samples.append(stack)
+            self.weights.append(now-last)
+            last=now
+
+    def stop(self, path):
+        self._stop.set()
+        self._thread.join()
+        name=os.path.basename(path)
+        doc={
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "profiling.py",
+            "shared": {"frames": self.frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(self.weights),
+                "samples": self.samples,
+                "weights": self.weights,
+            }],
+        }
+        with open(path, "w") as f:
+            json.dump(doc, f)
+
+_BACKENDS = {"cprofile": _CProfile, "pyinstrument": _Pyinstrument, "sample": _Sampler}
+
+# -------------------------------------------------------------------------
+class StateProfiler:
+    """
+    Profiles the frames spent in `state` on `level` (None = any), one file
+    per visit, named <state>-level<level>-<time>. Call update() once per
+    frame from the main loop and close() on exit.
+    """
+
+    def __init__(self, mode="cprofile", state=None, level=None,
+                 out_dir=PROFILE_DIR, interval=SAMPLE_INTERVAL):
+        if mode=="pyinstrument" and pyinstrument is None:
+            raise ImportError("pyinstrument is not installed")
+        self.backend=_BACKENDS[mode]
+        self.state=state
+        self.level=level
+        self.out_dir=out_dir
+        self.interval=interval
+        self.current=None   # (state, level) being profiled
+        self.profiler=None
+        self.written=[]
+
+    def update(self, state, level):
+        wanted=((self.state is None or state==self.state)
+                and (self.level is None or level==self.level))
+        key=(state, level) if wanted else None
+        if key==self.current:
+            return
+        self._finish()
+        if key:
+            self.current=key
+            self.profiler=self.backend(self.interval)
+            self.profiler.start()
+
+    def close(self):
+        self._finish()
+
+    def _finish(self):
+        if self.profiler is None:
+            return
+        state, level = self.current
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp=time.strftime("%Y%m%d-%H%M%S")
+        base=os.path.join(self.out_dir, f"{state}-level{level}-{stamp}")
+        path=base+self.profiler.suffix
+        n=1
+        while os.path.exists(path):   # several visits within one second
+            n+=1
+            path=f"{base}-{n}{self.profiler.suffix}"
+        self.profiler.stop(path)
+        print(f"profile of {state} on level {level} -> {path}")
+        self.written.append(path)
+        self.profiler=None
+        self.current=None
+
+def add_arguments(parser):
+    """The --profile options, shared by main.py and main2.py."""
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None,
+                        help="profile the chosen state/level and write files to --profile-dir")
+    parser.add_argument("--profile-state", metavar="STATE", default=None,
+                        help="only profile this game state, e.g. game (default: all)")
+    parser.add_argument("--profile-level", metavar="N", type=int, default=None,
+                        help="only profile while level N is loaded (default: all)")
+    parser.add_argument("--profile-dir", metavar="DIR", default=PROFILE_DIR)
+    parser.add_argument("--sample-interval", metavar="SEC", type=float, default=SAMPLE_INTERVAL,
+                        help="seconds between stacks in sample/pyinstrument mode")
+
+def from_args(args):
+    """StateProfiler for parsed --profile options, or None."""
+    if not args.profile:
+        return None
+    return StateProfiler(args.profile, args.profile_state, args.profile_level,
+                         args.profile_dir, args.sample_interval)
+
+# -------------------------------------------------------------------------
+def parse_args(argv=None):
+    parser=argparse.ArgumentParser(description="Summarise a .prof file.")
+    parser.add_argument("path")
+    parser.add_argument("--sort", default="cumulative",
+                        help="pstats sort key (default: %(default)s)")
+    parser.add_argument("-n", type=int, default=30, help="rows to show")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args=parse_args(argv)
+    pstats.Stats(args.path).strip_dirs().sort_stats(args.sort).print_stats(args.n)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,73 +2,323 @@
 
 import pygame
 from config import (
-    GRID_WIDTH, GRID_HEIGHT, TILE_SIZE,
+    TILE_SIZE,
     WALL_COLOR, DOOR_COLORS, KEY_COLORS,
     POINT_COLOR, FINISH_PORTAL_COLOR, ENEMY_COLOR
 )
 from utils import draw_player_as_triangle
+from entities import ItemType
 
-def draw_maze(screen, maze, offset_x, offset_y, fog_check_fn=None):
-    for yy in range(GRID_HEIGHT):
-        for xx in range(GRID_WIDTH):
+def draw_maze(screen, maze, camera, fog_check_fn=None):
+    """Draw the tiles that intersect the camera view."""
+    offset_x=camera.offset_x
+    offset_y=camera.offset_y
+    tx0, ty0, tx1, ty1 = camera.visible_tiles()
+    for yy in range(ty0, ty1):
+        row=maze[yy]
+        ry=offset_y+yy*TILE_SIZE
+        for xx in range(tx0, tx1):
             rx=offset_x+xx*TILE_SIZE
-            ry=offset_y+yy*TILE_SIZE
-            visible=True
             if fog_check_fn and not fog_check_fn(xx, yy):
-                visible=False
-            if not visible:
                 pygame.draw.rect(screen,(0,0,0),(rx,ry,TILE_SIZE,TILE_SIZE))
                 continue
 
-            tv=maze[yy][xx]
+            tv=row[xx]
             if tv==1:
                 pygame.draw.rect(screen,WALL_COLOR,(rx,ry,TILE_SIZE,TILE_SIZE))
-            elif tv in (2,3,4):
+            elif tv>=2:
                 pygame.draw.rect(screen, DOOR_COLORS[tv],(rx,ry,TILE_SIZE,TILE_SIZE))
 
-def draw_items(screen, items, offset_x, offset_y,
+def draw_world(screen, world, camera):
+    """Draw a chunks.ChunkedWorld, one visible chunk slice at a time."""
+    offset_x=camera.offset_x
+    offset_y=camera.offset_y
+    size=world.chunk_size
+    tx0, ty0, tx1, ty1 = camera.visible_tiles()
+    for cy in range(ty0//size, (ty1-1)//size+1):
+        for cx in range(tx0//size, (tx1-1)//size+1):
+            tiles=world.chunk(cx, cy)
+            bx=cx*size
+            by=cy*size
+            for ly in range(max(ty0-by, 0), min(ty1-by, size)):
+                ry=offset_y+(by+ly)*TILE_SIZE
+                base=ly*size
+                for lx in range(max(tx0-bx, 0), min(tx1-bx, size)):
+                    if tiles[base+lx]==1:
+                        pygame.draw.rect(screen, WALL_COLOR,
+                                         (offset_x+(bx+lx)*TILE_SIZE, ry, TILE_SIZE, TILE_SIZE))
+
+def draw_items(screen, items, camera,
                fog_check_fn=None,
                points_in_level=0, points_collected=0,
                reveal_active=False):
-    for (ix, iy, typ) in items:
-        tx=int(ix//TILE_SIZE)
-        ty=int(iy//TILE_SIZE)
-
+    offset_x=camera.offset_x
+    offset_y=camera.offset_y
+    x0, y0, x1, y1 = camera.visible_rect(TILE_SIZE)
+    radius=TILE_SIZE//4
+    portal_open=points_collected >= points_in_level
+    for it in items:
+        ix=it.x
+        iy=it.y
+        if not (x0<=ix<x1 and y0<=iy<y1):
+            continue
         if not reveal_active and fog_check_fn:
-            if not fog_check_fn(tx, ty):
+            if not fog_check_fn(int(ix//TILE_SIZE), int(iy//TILE_SIZE)):
                 continue
 
-        sx=offset_x+(ix - TILE_SIZE//2)
-        sy=offset_y+(iy - TILE_SIZE//2)
-        if typ=="point":
-            pygame.draw.circle(screen, POINT_COLOR,
-                               (sx+TILE_SIZE//2, sy+TILE_SIZE//2),
-                               TILE_SIZE//4)
-        elif typ.startswith("key"):
-            c=KEY_COLORS[typ]
-            pygame.draw.circle(screen, c,
-                               (sx+TILE_SIZE//2, sy+TILE_SIZE//2),
-                               TILE_SIZE//4)
-        elif typ=="finish_portal":
-            if points_collected >= points_in_level:
-                pygame.draw.rect(screen, FINISH_PORTAL_COLOR,
-                                 (sx+TILE_SIZE//2-8, sy+TILE_SIZE//2-8,16,16))
-
-def draw_enemies(screen, enemies, offset_x, offset_y,
+        cx=offset_x+ix
+        cy=offset_y+iy
+        kind=it.kind
+        if kind==ItemType.POINT:
+            pygame.draw.circle(screen, POINT_COLOR, (cx, cy), radius)
+        elif kind==ItemType.KEY:
+            pygame.draw.circle(screen, KEY_COLORS[it.key], (cx, cy), radius)
+        elif portal_open:
+            pygame.draw.rect(screen, FINISH_PORTAL_COLOR, (cx-8, cy-8, 16, 16))
+
+def draw_fog(screen, camera, fog_check_fn):
+    """Cover hidden tiles in black; drawn over the maze and items."""
+    offset_x=camera.offset_x
+    offset_y=camera.offset_y
+    tx0, ty0, tx1, ty1 = camera.visible_tiles()
+    for yy in range(ty0, ty1):
+        ry=offset_y+yy*TILE_SIZE
+        for xx in range(tx0, tx1):
+            if not fog_check_fn(xx, yy):
+                pygame.draw.rect(screen,(0,0,0),(offset_x+xx*TILE_SIZE,ry,TILE_SIZE,TILE_SIZE))
+
+class ItemLayer:
+    """
+    Points, keys and the portal pre-rendered onto transparent surfaces,
+    one per CHUNK x CHUNK tile area that holds items, each cropped to the
+    tiles its items cover. A frame blits the on-screen part of each, so
+    the cost follows what is visible rather than the item count. sync()
+    notices pickups by the item count changing and clears just those
+    tiles; the portal is drawn once, when it unlocks.
+
+    Blitting a mostly transparent surface costs about as much as drawing
+    a thousand circles, so SurfaceCanvas uses the layer only from
+    MIN_ITEMS items on.
+    """
+    CHUNK=32
+    MIN_ITEMS=1500
+
+    def __init__(self, items, points_in_level):
+        self.items=items
+        self.points_in_level=points_in_level
+        self.chunks={}   # key -> (surface, world x, world y)
+        self.drawn=set()
+        self.count=len(items)
+        self.portal=None
+        bounds={}   # key -> [tx0, ty0, tx1, ty1], inclusive
+        for it in items:
+            tx=int(it.x//TILE_SIZE)
+            ty=int(it.y//TILE_SIZE)
+            key=(tx//self.CHUNK, ty//self.CHUNK)
+            b=bounds.get(key)
+            if b is None:
+                bounds[key]=[tx, ty, tx, ty]
+            else:
+                b[0]=min(b[0], tx)
+                b[1]=min(b[1], ty)
+                b[2]=max(b[2], tx)
+                b[3]=max(b[3], ty)
+        for key,(tx0, ty0, tx1, ty1) in bounds.items():
+            surf=pygame.Surface(((tx1-tx0+1)*TILE_SIZE, (ty1-ty0+1)*TILE_SIZE), pygame.SRCALPHA)
+            self.chunks[key]=(surf, tx0*TILE_SIZE, ty0*TILE_SIZE)
+        for it in items:
+            if it.kind==ItemType.PORTAL:
+                self.portal=it
+            else:
+                self._draw(it)
+
+    def _locate(self, it):
+        """(surface, x, y) of the item's tile on its chunk surface."""
+        tx=int(it.x//TILE_SIZE)
+        ty=int(it.y//TILE_SIZE)
+        surf, ox, oy = self.chunks[(tx//self.CHUNK, ty//self.CHUNK)]
+        return surf, tx*TILE_SIZE-ox, ty*TILE_SIZE-oy
+
+    def _draw(self, it):
+        surf, lx, ly = self._locate(it)
+        # item centre relative to its tile
+        cx=lx+it.x-int(it.x//TILE_SIZE)*TILE_SIZE
+        cy=ly+it.y-int(it.y//TILE_SIZE)*TILE_SIZE
+        if it.kind==ItemType.POINT:
+            pygame.draw.circle(surf, POINT_COLOR, (cx, cy), TILE_SIZE//4)
+        elif it.kind==ItemType.KEY:
+            pygame.draw.circle(surf, KEY_COLORS[it.key], (cx, cy), TILE_SIZE//4)
+        else:
+            pygame.draw.rect(surf, FINISH_PORTAL_COLOR, (cx-8, cy-8, 16, 16))
+        self.drawn.add(it)
+
+    def _erase(self, it):
+        surf, lx, ly = self._locate(it)
+        surf.fill((0,0,0,0), (lx, ly, TILE_SIZE, TILE_SIZE))
+        self.drawn.discard(it)
+
+    def sync(self, points_collected):
+        if len(self.items)!=self.count:
+            self.count=len(self.items)
+            for it in self.drawn.difference(self.items):
+                self._erase(it)
+        portal=self.portal
+        if portal is not None and points_collected>=self.points_in_level:
+            self.portal=None
+            if portal in self.items:
+                self._draw(portal)
+
+    def draw(self, screen, camera):
+        span=self.CHUNK*TILE_SIZE
+        x0, y0, x1, y1 = camera.visible_rect()
+        for cy in range(int(y0//span), int((y1-1)//span)+1):
+            for cx in range(int(x0//span), int((x1-1)//span)+1):
+                chunk=self.chunks.get((cx,cy))
+                if chunk is None:
+                    continue
+                surf, ox, oy = chunk
+                w,h=surf.get_size()
+                # the part of the surface inside the view, in surface pixels
+                ax0=max(x0-ox, 0)
+                ay0=max(y0-oy, 0)
+                ax1=min(x1-ox, w)
+                ay1=min(y1-oy, h)
+                if ax1>ax0 and ay1>ay0:
+                    screen.blit(surf, (camera.offset_x+ox+ax0, camera.offset_y+oy+ay0),
+                                (ax0, ay0, ax1-ax0, ay1-ay0))
+
+def draw_enemies(screen, enemies, camera,
                  fog_check_fn=None, reveal_active=False):
+    offset_x=camera.offset_x
+    offset_y=camera.offset_y
+    x0, y0, x1, y1 = camera.visible_rect(TILE_SIZE)
     for e in enemies:
-        ex, ey = e['x'], e['y']
-        tx=int(ex//TILE_SIZE)
-        ty=int(ey//TILE_SIZE)
+        ex, ey = e.x, e.y
+        if not (x0<=ex<x1 and y0<=ey<y1):
+            continue
         if not reveal_active and fog_check_fn:
-            if not fog_check_fn(tx,ty):
+            if not fog_check_fn(int(ex//TILE_SIZE), int(ey//TILE_SIZE)):
                 continue
         sx=offset_x+(ex -TILE_SIZE//2)
         sy=offset_y+(ey -TILE_SIZE//2)
         pygame.draw.rect(screen, ENEMY_COLOR, (sx, sy, TILE_SIZE, TILE_SIZE))
 
-def draw_player(screen, px, py, direction_degs,
-                offset_x, offset_y):
-    sx=offset_x+px
-    sy=offset_y+py
+def draw_player(screen, px, py, direction_degs, camera):
+    sx=camera.offset_x+px
+    sy=camera.offset_y+py
     draw_player_as_triangle(screen, sx, sy, direction_degs)
+
+# -------------------------------------------------------------------------
+# Canvas: what scenes draw on. SurfaceCanvas is the software path onto the
+# display surface; rendering_sdl2.TextureCanvas has the same methods.
+# -------------------------------------------------------------------------
+def apply_display_mode(mode):
+    """Apply display mode: 'maximized' or 'fullscreen'."""
+    if mode == "fullscreen":
+        return pygame.display.set_mode((0,0), pygame.FULLSCREEN)
+    else:
+        # default to 'maximized'
+        info=pygame.display.Info()
+        return pygame.display.set_mode((info.current_w, info.current_h), pygame.RESIZABLE)
+
+class SurfaceCanvas:
+    """
+    Software drawing with pygame.draw onto the display surface. Between
+    begin_world() and end_world() the level is drawn into the layout's
+    back buffer when it is scaled (see layout.Layout).
+
+    The scale-up writes every screen pixel on the CPU: at 3840x2160 and
+    x3 or x4 it alone costs about as much as drawing the whole frame
+    natively. MAX_SCALE keeps it at x2, where the smaller buffer still
+    pays for it on fog levels (benchmarks.py backbuffer).
+    """
+    name="software"
+    MAX_SCALE=2
+
+    def __init__(self, mode):
+        self.set_display_mode(mode)
+
+    @classmethod
+    def for_surface(cls, surface):
+        """Canvas onto an off-screen surface (benchmarks)."""
+        canvas=cls.__new__(cls)
+        canvas.screen=canvas.target=surface
+        canvas._buffer_gen=None
+        canvas._item_layer=None
+        return canvas
+
+    def set_display_mode(self, mode):
+        self.screen=apply_display_mode(mode)
+        self.target=self.screen
+        self._buffer_gen=None
+        self._item_layer=None
+
+    def resize(self):
+        self.screen=pygame.display.get_surface()
+        self.target=self.screen
+
+    def get_size(self):
+        return self.screen.get_size()
+
+    def present(self):
+        pygame.display.flip()
+
+    # ui
+    def fill(self, color):
+        self.target.fill(color)
+
+    def fill_rect(self, color, rect):
+        pygame.draw.rect(self.target, color, rect)
+
+    def outline_rect(self, color, rect, width=1):
+        pygame.draw.rect(self.target, color, rect, width)
+
+    def blit(self, surface, pos):
+        self.target.blit(surface, pos)
+
+    # level
+    def begin_world(self, lay):
+        if lay.scale==1:
+            return
+        if self._buffer_gen!=lay.generation:
+            self._buffer_gen=lay.generation
+            self._buffer=pygame.Surface(lay.view_size)
+            self._scaled=self.screen.subsurface(lay.maze_rect)
+        self.target=self._buffer
+        self.target.fill((20,20,20))
+
+    def end_world(self):
+        if self.target is not self.screen:
+            # scale straight into the screen, no intermediate surface
+            pygame.transform.scale(self.target, self._scaled.get_size(), self._scaled)
+            self.target=self.screen
+
+    def draw_maze(self, maze, camera, fog_check_fn=None):
+        draw_maze(self.target, maze, camera, fog_check_fn)
+
+    def draw_world(self, world, camera):
+        draw_world(self.target, world, camera)
+
+    def draw_fog(self, camera, fog_check_fn, fog_version=None):
+        draw_fog(self.target, camera, fog_check_fn)
+
+    def draw_items(self, items, camera, points_in_level=0, points_collected=0):
+        """
+        Items one by one, or through the cached ItemLayer when there are
+        many of them; fog is drawn over them.
+        """
+        if len(items)<ItemLayer.MIN_ITEMS:
+            draw_items(self.target, items, camera,
+                       points_in_level=points_in_level, points_collected=points_collected)
+            return
+        layer=self._item_layer
+        if layer is None or layer.items is not items:
+            layer=self._item_layer=ItemLayer(items, points_in_level)
+        layer.sync(points_collected)
+        layer.draw(self.target, camera)
+
+    def draw_enemies(self, enemies, camera, **kw):
+        draw_enemies(self.target, enemies, camera, **kw)
+
+    def draw_player(self, px, py, direction_degs, camera):
+        draw_player(self.target, px, py, direction_degs, camera)
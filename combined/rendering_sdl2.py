@@ -0,0 +1,304 @@
+# rendering_sdl2.py
+#
+# Hardware-accelerated canvas on pygame._sdl2.video (Renderer/Texture).
+# Sprites and text are uploaded as textures once; the maze and fog are
+# drawn as cached runs of filled tiles, rebuilt only when the visible
+# tiles (or the fog) change, so the renderer does all fills. Same methods as
+# rendering.SurfaceCanvas. Also runs on SDL's software renderer
+# (--renderer sdl2-software), which is how it is tested without a GPU.
+
+import weakref
+import pygame
+
+try:
+    from pygame._sdl2 import video
+except ImportError:  # very old pygame builds
+    video = None
+
+from config import (
+    TILE_SIZE,
+    WALL_COLOR, DOOR_COLORS, KEY_COLORS,
+    POINT_COLOR, FINISH_PORTAL_COLOR, ENEMY_COLOR
+)
+from entities import ItemType
+
+FLOOR_COLOR=(20,20,20)   # the cleared background
+
+def _circle_surface(color, radius):
+    surf=pygame.Surface((2*radius, 2*radius), pygame.SRCALPHA)
+    pygame.draw.circle(surf, color, (radius, radius), radius)
+    return surf
+
+def _player_surface():
+    # the triangle of utils.draw_player_as_triangle, pointing right (0 deg)
+    size=int(TILE_SIZE*0.7)
+    half=size//2
+    surf=pygame.Surface((size, size), pygame.SRCALPHA)
+    pygame.draw.polygon(surf, (255,0,0), [
+        (half+half, half),
+        (0, half+int(0.6*half)),
+        (0, half-int(0.6*half)),
+    ])
+    return surf
+
+class TextureCanvas:
+    """
+    Canvas that draws through an SDL2 Renderer into its own window.
+    Raises pygame.error if no renderer can be created.
+    """
+    name="sdl2"
+    MAX_SCALE=None   # the renderer scales draw calls for free
+
+    def __init__(self, mode, software=False):
+        if video is None:
+            raise pygame.error("pygame._sdl2 is not available")
+        info=pygame.display.Info()
+        self.window=video.Window("Christmas Game", size=(info.current_w, info.current_h),
+                                 resizable=True)
+        index=-1
+        if software:
+            names=[d.name for d in video.get_drivers()]
+            if "software" not in names:
+                raise pygame.error("no software SDL renderer")
+            index=names.index("software")
+        self.renderer=video.Renderer(self.window, index=index, accelerated=0 if software else -1)
+        self._textures=weakref.WeakKeyDictionary()  # surface -> texture
+        self._maze=None
+        self._maze_runs={}   # color -> [(world x, world y, width)] for _maze_key
+        self._maze_key=None   # visible tiles of _maze_runs
+        self._chunk_tex={}   # (cx, cy) -> (tiles, texture) for draw_world
+        self._fog_runs=()
+        self._fog_key=None   # (visible tiles, fog_version) of _fog_runs
+        self._sprites=None
+        self.set_display_mode(mode)
+
+    def set_display_mode(self, mode):
+        if mode=="fullscreen":
+            self.window.set_fullscreen(desktop=True)
+        else:
+            self.window.set_windowed()
+            self.window.maximize()
+
+    def resize(self):
+        pass  # the renderer follows the window
+
+    def get_size(self):
+        return self.window.size
+
+    def present(self):
+        self.renderer.present()
+
+    # textures -------------------------------------------------------------
+    def texture(self, surface):
+        """Texture for a surface, uploaded on first use."""
+        tex=self._textures.get(surface)
+        if tex is None:
+            tex=video.Texture.from_surface(self.renderer, surface)
+            self._textures[surface]=tex
+        return tex
+
+    def _sprite_textures(self):
+        if self._sprites is None:
+            radius=TILE_SIZE//4
+            portal=pygame.Surface((16,16))
+            portal.fill(FINISH_PORTAL_COLOR)
+            enemy=pygame.Surface((TILE_SIZE,TILE_SIZE))
+            enemy.fill(ENEMY_COLOR)
+            surfaces={
+                "point": _circle_surface(POINT_COLOR, radius),
+                "portal": portal,
+                "enemy": enemy,
+                "player": _player_surface(),
+            }
+            for k,color in KEY_COLORS.items():
+                surfaces[k]=_circle_surface(color, radius)
+            self._sprites={k: video.Texture.from_surface(self.renderer, s)
+                           for k,s in surfaces.items()}
+        return self._sprites
+
+    def _maze_row_runs(self, maze, tx0, ty0, tx1, ty1):
+        # runs of equal wall/door tiles per row; floor is the cleared background
+        key=(tx0, ty0, tx1, ty1)
+        if maze is not self._maze or key!=self._maze_key:
+            colors={1: tuple(WALL_COLOR)}
+            for v,color in DOOR_COLORS.items():
+                colors[v]=tuple(color)
+            runs={}
+            for yy in range(ty0, ty1):
+                row=maze[yy]
+                xx=tx0
+                while xx<tx1:
+                    tv=row[xx]
+                    start=xx
+                    xx+=1
+                    while xx<tx1 and row[xx]==tv:
+                        xx+=1
+                    color=colors.get(tv)
+                    if color is not None:
+                        runs.setdefault(color, []).append(
+                            (start*TILE_SIZE, yy*TILE_SIZE, (xx-start)*TILE_SIZE))
+            self._maze_runs=runs
+            self._maze=maze
+            self._maze_key=key
+        return self._maze_runs
+
+    def _chunk_texture(self, world, cx, cy):
+        # one texel per tile, scaled up on draw; dropped with evicted chunks
+        tiles=world.chunk(cx, cy)
+        cached=self._chunk_tex.get((cx,cy))
+        if cached is None or cached[0] is not tiles:
+            if len(self._chunk_tex)>len(world.chunks):
+                self._chunk_tex={k: v for k,v in self._chunk_tex.items()
+                                 if world.chunks.get(k) is v[0]}
+            wall=bytes(WALL_COLOR)
+            floor=bytes(FLOOR_COLOR)
+            data=b"".join(wall if tv==1 else floor for tv in tiles)
+            size=world.chunk_size
+            surf=pygame.image.frombuffer(data, (size, size), "RGB")
+            cached=(tiles, video.Texture.from_surface(self.renderer, surf))
+            self._chunk_tex[(cx,cy)]=cached
+        return cached[1]
+
+    # ui -------------------------------------------------------------------
+    def fill(self, color):
+        self.renderer.draw_color=pygame.Color(color)
+        self.renderer.clear()
+
+    def fill_rect(self, color, rect):
+        self.renderer.draw_color=pygame.Color(color)
+        self.renderer.fill_rect(rect)
+
+    def outline_rect(self, color, rect, width=1):
+        self.renderer.draw_color=pygame.Color(color)
+        r=pygame.Rect(rect)
+        for _ in range(width):
+            self.renderer.draw_rect(r)
+            r.inflate_ip(-2,-2)
+
+    def blit(self, surface, pos):
+        w,h=surface.get_size()
+        if w and h:  # SDL cannot make empty textures (e.g. empty text)
+            self.texture(surface).draw(dstrect=(pos[0], pos[1], w, h))
+
+    # level ----------------------------------------------------------------
+    def begin_world(self, lay):
+        # integer scaling is free here: scale the draw calls
+        self.renderer.scale=(lay.scale, lay.scale)
+
+    def end_world(self):
+        self.renderer.scale=(1,1)
+
+    def draw_maze(self, maze, camera, fog_check_fn=None):
+        """
+        One opaque fill per run of wall or door tiles in a row, cached until
+        the visible tile range changes; the software renderer is about four
+        times slower stretching a one-texel-per-tile maze texture instead.
+        """
+        tx0, ty0, tx1, ty1 = camera.visible_tiles()
+        if tx1<=tx0 or ty1<=ty0:
+            return
+        renderer=self.renderer
+        ox=camera.offset_x
+        oy=camera.offset_y
+        for color, runs in self._maze_row_runs(maze, tx0, ty0, tx1, ty1).items():
+            renderer.draw_color=pygame.Color(color)
+            for x, y, w in runs:
+                renderer.fill_rect((ox+x, oy+y, w, TILE_SIZE))
+        if fog_check_fn is not None:
+            self.draw_fog(camera, fog_check_fn)
+
+    def draw_world(self, world, camera):
+        """A chunks.ChunkedWorld, one scaled copy per visible chunk slice."""
+        tx0, ty0, tx1, ty1 = camera.visible_tiles()
+        size=world.chunk_size
+        for cy in range(ty0//size, (ty1-1)//size+1):
+            for cx in range(tx0//size, (tx1-1)//size+1):
+                bx=cx*size
+                by=cy*size
+                lx0=max(tx0-bx, 0)
+                ly0=max(ty0-by, 0)
+                lx1=min(tx1-bx, size)
+                ly1=min(ty1-by, size)
+                self._chunk_texture(world, cx, cy).draw(
+                    srcrect=(lx0, ly0, lx1-lx0, ly1-ly0),
+                    dstrect=(camera.offset_x+(bx+lx0)*TILE_SIZE, camera.offset_y+(by+ly0)*TILE_SIZE,
+                             (lx1-lx0)*TILE_SIZE, (ly1-ly0)*TILE_SIZE))
+
+    def draw_fog(self, camera, fog_check_fn, fog_version=None):
+        """
+        Black over hidden tiles, one opaque fill per run of hidden tiles in
+        a row (the software renderer blends and stretches a fog texture far
+        slower). With a fog_version (GameSession.fog_version) the runs are
+        only rebuilt when the fog or the visible tile range changes.
+        """
+        tx0, ty0, tx1, ty1 = camera.visible_tiles()
+        if tx1<=tx0 or ty1<=ty0:
+            return
+        key=(tx0, ty0, tx1, ty1, fog_version)
+        if fog_version is None or key!=self._fog_key:
+            runs=[]   # (world x, world y, width) in pixels
+            for yy in range(ty0, ty1):
+                start=None
+                for xx in range(tx0, tx1):
+                    if not fog_check_fn(xx, yy):
+                        if start is None:
+                            start=xx
+                    elif start is not None:
+                        runs.append((start*TILE_SIZE, yy*TILE_SIZE, (xx-start)*TILE_SIZE))
+                        start=None
+                if start is not None:
+                    runs.append((start*TILE_SIZE, yy*TILE_SIZE, (tx1-start)*TILE_SIZE))
+            self._fog_runs=runs
+            self._fog_key=key if fog_version is not None else None
+        renderer=self.renderer
+        renderer.draw_color=pygame.Color(0, 0, 0)
+        ox=camera.offset_x
+        oy=camera.offset_y
+        for x, y, w in self._fog_runs:
+            renderer.fill_rect((ox+x, oy+y, w, TILE_SIZE))
+
+    def draw_items(self, items, camera, points_in_level=0, points_collected=0):
+        """One textured quad per item; fog is drawn over them."""
+        sprites=self._sprite_textures()
+        offset_x=camera.offset_x
+        offset_y=camera.offset_y
+        x0, y0, x1, y1 = camera.visible_rect(TILE_SIZE)
+        radius=TILE_SIZE//4
+        portal_open=points_collected >= points_in_level
+        for it in items:
+            ix=it.x
+            iy=it.y
+            if not (x0<=ix<x1 and y0<=iy<y1):
+                continue
+            cx=offset_x+ix
+            cy=offset_y+iy
+            kind=it.kind
+            if kind==ItemType.POINT:
+                sprites["point"].draw(dstrect=(cx-radius, cy-radius, 2*radius, 2*radius))
+            elif kind==ItemType.KEY:
+                sprites[it.key].draw(dstrect=(cx-radius, cy-radius, 2*radius, 2*radius))
+            elif portal_open:
+                sprites["portal"].draw(dstrect=(cx-8, cy-8, 16, 16))
+
+    def draw_enemies(self, enemies, camera,
+                     fog_check_fn=None, reveal_active=False):
+        tex=self._sprite_textures()["enemy"]
+        offset_x=camera.offset_x
+        offset_y=camera.offset_y
+        x0, y0, x1, y1 = camera.visible_rect(TILE_SIZE)
+        for e in enemies:
+            ex, ey = e.x, e.y
+            if not (x0<=ex<x1 and y0<=ey<y1):
+                continue
+            if not reveal_active and fog_check_fn:
+                if not fog_check_fn(int(ex//TILE_SIZE), int(ey//TILE_SIZE)):
+                    continue
+            tex.draw(dstrect=(offset_x+ex-TILE_SIZE//2, offset_y+ey-TILE_SIZE//2,
+                              TILE_SIZE, TILE_SIZE))
+
+    def draw_player(self, px, py, direction_degs, camera):
+        tex=self._sprite_textures()["player"]
+        w=tex.width
+        h=tex.height
+        tex.draw(dstrect=(camera.offset_x+px-w/2, camera.offset_y+py-h/2, w, h),
+                 angle=direction_degs)
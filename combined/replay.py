@@ -0,0 +1,129 @@
+# replay.py
+#
+# Compact run recordings: the level, grid size and seed a GameSession was
+# started with, plus one input byte (session.INPUT_* bits) per tick,
+# run-length encoded. Playing the inputs back into a fresh session
+# reproduces the run exactly. Headless fast-forward from the command line:
+#   python replay.py run.cgrp --tick 3600
+
+import sys
+import time
+import struct
+import argparse
+
+from session import GameSession, TICK_DT
+
+REPLAY_MAGIC = b"CGRP"
+REPLAY_VERSION = 2   # 2: level validation accepts more layouts, so seeds map to new levels
+_HEADER = "<HHHHII"   # version, level, grid w, grid h (0 = default), seed, ticks
+_RUN = "<BH"          # input byte, repeat count
+_MAX_RUN = 0xFFFF
+
+class Recorder:
+    """Collects per-tick inputs of one run."""
+
+    def __init__(self, level, seed, grid_size=None):
+        self.level=level
+        self.seed=seed
+        self.grid_size=grid_size
+        self.runs=[]   # [input, count] pairs
+        self.ticks=0
+
+    def add(self, inputs):
+        runs=self.runs
+        if runs and runs[-1][0]==inputs and runs[-1][1]<_MAX_RUN:
+            runs[-1][1]+=1
+        else:
+            runs.append([inputs, 1])
+        self.ticks+=1
+
+    def to_bytes(self):
+        w,h=self.grid_size or (0,0)
+        out=[REPLAY_MAGIC, struct.pack(_HEADER, REPLAY_VERSION, self.level, w, h,
+                                       self.seed, self.ticks)]
+        out.extend(struct.pack(_RUN, b, n) for b,n in self.runs)
+        return b"".join(out)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+class Replay:
+    """A loaded recording; `inputs` holds one byte per tick."""
+
+    def __init__(self, level, seed, grid_size, inputs):
+        self.level=level
+        self.seed=seed
+        self.grid_size=grid_size
+        self.inputs=inputs
+
+    def __len__(self):
+        return len(self.inputs)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:4]!=REPLAY_MAGIC:
+            raise ValueError("not a replay file")
+        version,level,w,h,seed,ticks=struct.unpack_from(_HEADER, data, 4)
+        if version!=REPLAY_VERSION:
+            raise ValueError(f"unsupported replay version {version}")
+        inputs=bytearray()
+        for b,n in struct.iter_unpack(_RUN, data[4+struct.calcsize(_HEADER):]):
+            inputs+=bytes((b,))*n
+        if len(inputs)!=ticks:
+            raise ValueError("replay is truncated")
+        return cls(level, seed, (w,h) if w else None, inputs)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def new_session(self, nav=False):
+        """A session at tick 0 of this replay."""
+        session=GameSession(self.grid_size, nav=nav)
+        session.start(self.level, self.seed)
+        return session
+
+    def fast_forward(self, session, tick):
+        """Step `session` with recorded inputs until it reaches `tick`."""
+        inputs=self.inputs
+        end=min(tick, len(inputs))
+        while session.tick<end and not session.finished:
+            session.step(inputs[session.tick], TICK_DT)
+        return session
+
+# -------------------------------------------------------------------------
+def parse_args(argv=None):
+    parser=argparse.ArgumentParser(description="Play a replay headless at full speed.")
+    parser.add_argument("replay")
+    parser.add_argument("--tick", type=int, default=None,
+                        help="stop at this tick (default: end of the recording)")
+    parser.add_argument("--verify", action="store_true",
+                        help="play twice and check both runs end in the same state")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args=parse_args(argv)
+    rep=Replay.load(args.replay)
+    target=len(rep) if args.tick is None else args.tick
+    t0=time.perf_counter()
+    session=rep.fast_forward(rep.new_session(nav=False), target)
+    elapsed=time.perf_counter()-t0
+    snap=session.snapshot()
+    print(f"level {rep.level} seed {rep.seed}: {len(rep)} ticks recorded")
+    for k,v in snap.items():
+        if k!="enemies":
+            print(f"  {k}: {v}")
+    print(f"{session.tick} ticks in {elapsed:.2f}s "
+          f"({session.tick/elapsed if elapsed>0 else 0:.0f} ticks/s)")
+    if args.verify:
+        again=rep.fast_forward(rep.new_session(nav=False), target).snapshot()
+        if again!=snap:
+            print("replay is NOT deterministic")
+            return 1
+        print("replay is deterministic")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
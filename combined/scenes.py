@@ -0,0 +1,603 @@
+# scenes.py
+#
+# One Scene per game state. A scene lays out its buttons from the game's
+# Layout once per window size (cached until the next resize or
+# invalidate()), files them in a ButtonGrid for hit-testing, and
+# dispatches input through dictionaries: event type -> handler, key ->
+# handler, button label -> handler. Scenes share state through the `game`
+# object from main.py and draw on its canvas (rendering.SurfaceCanvas or
+# rendering_sdl2.TextureCanvas).
+
+import pygame
+
+from config import (
+    TILE_SIZE, DISPLAY_MODES, MAX_LEVEL, BUTTON_BG, BUTTON_TEXT, KEY_COLORS,
+    STATE_MENU, STATE_GAME, STATE_OPTIONS, STATE_GAME_RULES,
+    STATE_LEVEL_SELECT, STATE_INGAME_MENU, STATE_END_LEVEL,
+    STATE_USER_SELECT, STATE_NEW_USER, STATE_ENDLESS
+)
+from profiles import save_profiles
+from session import (
+    TICK_DT, EVENT_DIED, EVENT_FINISHED,
+    INPUT_UP, INPUT_LEFT, INPUT_DOWN, INPUT_RIGHT, INPUT_GHOST, INPUT_REVEAL
+)
+
+WHITE=(255,255,255)
+YELLOW=(255,255,0)
+
+def held_inputs():
+    """Input bits for the movement keys held down now."""
+    keys=pygame.key.get_pressed()
+    inputs=0
+    if keys[pygame.K_w]:
+        inputs|=INPUT_UP
+    if keys[pygame.K_a]:
+        inputs|=INPUT_LEFT
+    if keys[pygame.K_s]:
+        inputs|=INPUT_DOWN
+    if keys[pygame.K_d]:
+        inputs|=INPUT_RIGHT
+    return inputs
+
+class ButtonGrid:
+    """
+    Hit-testing through a coarse grid: every button is filed under each
+    CELL x CELL cell it overlaps, so a click only tests the few buttons
+    in its own cell.
+    """
+    CELL=64
+
+    def __init__(self, buttons):
+        c=self.CELL
+        self.cells={}
+        for label,rect in buttons:
+            for cy in range(rect.top//c, (rect.bottom-1)//c+1):
+                for cx in range(rect.left//c, (rect.right-1)//c+1):
+                    self.cells.setdefault((cx,cy), []).append((label,rect))
+
+    def hit(self, pos):
+        """Label of the button under pos, or None."""
+        for label,rect in self.cells.get((pos[0]//self.CELL, pos[1]//self.CELL), ()):
+            if rect.collidepoint(pos):
+                return label
+        return None
+
+# -------------------------------------------------------------------------
+class Scene:
+    """Base scene: cached layout, cached text and dictionary dispatch."""
+    state=None
+    TEXT_CACHE_SIZE=128
+
+    def __init__(self, game):
+        self.game=game
+        self.buttons=[]
+        self.grid=None
+        self._layout_gen=None
+        self._text={}
+        self.event_handlers={
+            pygame.KEYDOWN: self.on_key,
+            pygame.MOUSEBUTTONDOWN: self.on_mouse,
+        }
+        self.key_handlers={}     # pygame key constant -> fn(event)
+        self.click_handlers={}   # button label -> fn(label)
+
+    # layout ---------------------------------------------------------------
+    def layout(self, lay):
+        """Return the scene's buttons as (label, rect) pairs for Layout lay."""
+        return []
+
+    def invalidate(self):
+        self._layout_gen=None
+
+    def ensure_layout(self):
+        lay=self.game.layout
+        if lay.generation!=self._layout_gen:
+            self._layout_gen=lay.generation
+            self.buttons=self.layout(lay)
+            self.grid=ButtonGrid(self.buttons)
+
+    # input ----------------------------------------------------------------
+    def handle_event(self, event):
+        handler=self.event_handlers.get(event.type)
+        if handler:
+            handler(event)
+
+    def on_key(self, event):
+        handler=self.key_handlers.get(event.key)
+        if handler:
+            handler(event)
+
+    def on_mouse(self, event):
+        if event.button!=1:
+            return
+        self.ensure_layout()
+        label=self.grid.hit(event.pos)
+        if label is not None:
+            self.on_click(label)
+
+    def on_click(self, label):
+        handler=self.click_handlers.get(label)
+        if handler:
+            handler(label)
+
+    # drawing --------------------------------------------------------------
+    def text(self, s, color=WHITE):
+        """Rendered text surface, cached by (text, colour)."""
+        surf=self._text.get((s,color))
+        if surf is None:
+            if len(self._text)>=self.TEXT_CACHE_SIZE:
+                self._text.clear()
+            surf=self.game.font.render(s, True, color)
+            self._text[(s,color)]=surf
+        return surf
+
+    def blit_centered(self, canvas, s, y, color=WHITE):
+        surf=self.text(s, color)
+        canvas.blit(surf, surf.get_rect(center=(self.game.layout.center_x, y)))
+
+    def caption(self, label):
+        """Text shown on the button with this label."""
+        return label
+
+    def draw_button(self, canvas, rect, label, hovered):
+        bg,fg=(BUTTON_TEXT,BUTTON_BG) if hovered else (BUTTON_BG,BUTTON_TEXT)
+        canvas.fill_rect(bg, rect)
+        surf=self.text(self.caption(label), fg)
+        canvas.blit(surf, surf.get_rect(center=rect.center))
+
+    def draw_buttons(self, canvas):
+        hovered=self.grid.hit(pygame.mouse.get_pos())
+        for label,rect in self.buttons:
+            self.draw_button(canvas, rect, label, label==hovered)
+
+    def update(self, dt):
+        pass
+
+    def draw(self, canvas):
+        self.ensure_layout()
+        self.draw_buttons(canvas)
+
+    def go(self, state):
+        """Click handler factory: switch to another state."""
+        return lambda _label: self.game.switch(state)
+
+class BackScene(Scene):
+    """Scene with a Back button in the top-left corner."""
+    back_state=STATE_MENU
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.click_handlers["Back"]=self.go(self.back_state)
+
+    def layout(self, lay):
+        return [("Back", lay.back_rect)]
+
+# -------------------------------------------------------------------------
+class MenuScene(Scene):
+    state=STATE_MENU
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.click_handlers.update({
+            "Start Game": lambda _l: game.go_to_level(game.profile["highest_unlocked_level"]),
+            "Select Level": self.go(STATE_LEVEL_SELECT),
+            "Endless Maze": lambda _l: game.start_endless(),
+            "Options": self.go(STATE_OPTIONS),
+            "Game Rules": self.go(STATE_GAME_RULES),
+            "Exit": lambda _l: game.quit(),
+            "Switch User": self.go(STATE_USER_SELECT),
+        })
+
+    def layout(self, lay):
+        if self.game.profile:
+            labels=["Start Game","Select Level","Endless Maze","Options","Game Rules","Exit",
+                    "Switch User"]
+        else:
+            labels=["Switch User"]
+        return lay.menu_column(labels)
+
+    def draw(self, canvas):
+        self.blit_centered(canvas, "MAIN MENU", 80)
+        user=self.game.current_user
+        self.blit_centered(canvas, f"Current user: {user if user else 'None'}", 130)
+        super().draw(canvas)
+
+class LevelSelectScene(BackScene):
+    state=STATE_LEVEL_SELECT
+
+    def layout(self, lay):
+        labels=[f"Level {l}" for l in range(1,self.game.level_count()+1)]
+        return super().layout(lay)+lay.menu_column(labels)
+
+    def _highest(self):
+        profile=self.game.profile
+        return profile["highest_unlocked_level"] if profile else 1
+
+    def on_click(self, label):
+        if label.startswith("Level "):
+            lvl=int(label[6:])
+            if lvl<=self._highest():
+                self.game.go_to_level(lvl)
+        else:
+            super().on_click(label)
+
+    def draw(self, canvas):
+        self.ensure_layout()
+        canvas.blit(self.text("Select Level:"), (50,80))
+        hul=self._highest()
+        hovered=self.grid.hit(pygame.mouse.get_pos())
+        for label,rect in self.buttons:
+            if label.startswith("Level ") and int(label[6:])>hul:
+                canvas.fill_rect((150,150,150), rect)
+                surf=self.text(label, (80,80,80))
+                canvas.blit(surf, surf.get_rect(center=rect.center))
+            else:
+                self.draw_button(canvas, rect, label, label==hovered)
+        self.draw_thumbnails(canvas)
+
+    def draw_thumbnails(self, canvas):
+        # previews of pack levels, next to their buttons once the
+        # background worker has them
+        thumbs=self.game.thumbnails
+        if thumbs is None:
+            return
+        for label,rect in self.buttons:
+            if label.startswith("Level "):
+                surf=thumbs.get(int(label[6:]))
+                if surf is not None:
+                    canvas.blit(surf, surf.get_rect(midleft=(rect.right+10, rect.centery)))
+
+class OptionsScene(BackScene):
+    state=STATE_OPTIONS
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.click_handlers.update({
+            "Display Mode": self.cycle_display_mode,
+            "Reset Stats": self.reset_stats,
+            "Full Screen": lambda _l: game.set_display_mode("fullscreen"),
+            "Back To Menu": self.go(STATE_MENU),
+        })
+
+    def layout(self, lay):
+        labels=["Display Mode","Reset Stats","Full Screen","Back To Menu"]
+        return super().layout(lay)+lay.menu_column(labels)
+
+    def cycle_display_mode(self, _label):
+        current=self.game.profile.get("display_mode","maximized")
+        modes=DISPLAY_MODES
+        self.game.set_display_mode(modes[(modes.index(current)+1)%len(modes)])
+
+    def reset_stats(self, _label):
+        profile=self.game.profile
+        profile["score"]=0
+        profile["highest_unlocked_level"]=1
+        profile["level_scores"]=[0]*(MAX_LEVEL+1)
+        save_profiles(self.game.data)
+
+    def draw(self, canvas):
+        profile=self.game.profile
+        mode=profile.get("display_mode","maximized") if profile else "maximized"
+        self.blit_centered(canvas, f"Current Mode: {mode}", 150+self.game.font.get_height()//2)
+        super().draw(canvas)
+
+class RulesScene(BackScene):
+    state=STATE_GAME_RULES
+    LINES=[
+        "GAME RULES:",
+        "- Move with W/A/S/D.",
+        "- Collect ALL points before the finish portal is usable.",
+        "- Keys open colored doors.",
+        "- Fog: L5 = permanent, L6 = ephemeral.",
+        "- SPACE: pass 1 wall (2s, 15s cooldown, 3 uses).",
+        "- Q: reveal items for 5s (20s cooldown).",
+        "- Press 'Menu' in top-left while in game."
+    ]
+
+    def draw(self, canvas):
+        super().draw(canvas)
+        yy=80
+        for line in self.LINES:
+            canvas.blit(self.text(line), (50,yy))
+            yy+=40
+
+# -------------------------------------------------------------------------
+class GameScene(Scene):
+    """The level itself: fixed-tick simulation, maze and HUD."""
+    state=STATE_GAME
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.key_handlers.update({
+            pygame.K_SPACE: lambda _e: self.press(INPUT_GHOST),
+            pygame.K_q: lambda _e: self.press(INPUT_REVEAL),
+        })
+        self.click_handlers["Menu"]=self.go(STATE_INGAME_MENU)
+        self.pending_inputs=0   # skill key presses waiting for the next tick
+        self.tick_time=0.0      # real time not yet simulated
+
+    def layout(self, lay):
+        self.game.camera.resize(*lay.view_size)
+        return [("Menu", lay.game_menu_rect)]
+
+    def press(self, bit):
+        # skills fire on the next tick
+        self.pending_inputs|=bit
+
+    def reset_timing(self):
+        self.pending_inputs=0
+        self.tick_time=0.0
+
+    def read_inputs(self):
+        inputs=self.pending_inputs|held_inputs()
+        self.pending_inputs=0
+        return inputs
+
+    def update(self, dt):
+        game=self.game
+        if not (game.profile or game.replay):
+            return
+        session=game.session
+        self.tick_time=min(self.tick_time+dt, 5*TICK_DT)  # don't spiral after a stall
+        while self.tick_time>=TICK_DT and game.state==STATE_GAME:
+            self.tick_time-=TICK_DT
+            if game.replay:
+                if session.tick>=len(game.replay):
+                    game.switch(STATE_MENU)
+                    break
+                inputs=game.replay.inputs[session.tick]
+            else:
+                inputs=self.read_inputs()
+                if game.recorder:
+                    game.recorder.add(inputs)
+            event=session.step(inputs, TICK_DT)
+            if event==EVENT_DIED:
+                game.level_loaded()
+            elif event==EVENT_FINISHED:
+                game.finish_run()
+                game.switch(STATE_END_LEVEL)
+
+    def draw(self, canvas):
+        self.ensure_layout()
+        session=self.game.session
+        camera=self.game.camera
+        camera.follow(session.player_x, session.player_y)
+        fog_check_fn_tile=session.tile_visible
+
+        canvas.begin_world(self.game.layout)
+        canvas.draw_maze(session.maze, camera)
+        canvas.draw_items(session.items, camera,
+                          points_in_level=session.points_in_level,
+                          points_collected=session.points_collected)
+        if session.fog_active():
+            canvas.draw_fog(camera, fog_check_fn_tile, session.fog_version)
+        canvas.draw_enemies(session.enemies, camera,
+                            fog_check_fn=fog_check_fn_tile,
+                            reveal_active=session.reveal_skill_active)
+        canvas.draw_player(session.player_x, session.player_y,
+                           session.direction_degs, camera)
+        canvas.end_world()
+
+        # HUD at full resolution
+        self.draw_buttons(canvas)
+        points_pos, keys_pos, ghost_pos, reveal_pos = self.game.layout.hud_lines
+        canvas.blit(self.text(f"Points: {session.points_collected}/{session.points_in_level}"),
+                    points_pos)
+        keys_surf=self.text(f"Keys: {session.keys_collected}/{session.keys_in_level}")
+        canvas.blit(keys_surf, keys_pos)
+        # a swatch per held key, in the key's colour
+        x=keys_pos[0]+keys_surf.get_width()+10
+        keys=session.keys
+        for k in range(keys.bit_length()):
+            if keys>>k & 1:
+                canvas.fill_rect(KEY_COLORS[k], (x, keys_pos[1]+3, 14, 14))
+                x+=18
+
+        # ghost skill hud
+        if session.ghost_skill_cooldown>0:
+            ghost_str=f"Cooldown: {int(session.ghost_skill_cooldown)}s"
+        elif session.ghost_skill_uses_left<=0:
+            ghost_str="No uses left"
+        elif session.ghost_skill_active:
+            ghost_str=f"Ghost: {session.ghost_skill_timer:.1f}s"
+        else:
+            ghost_str="Ready"
+        canvas.blit(self.text(f"Wall-Pass: {ghost_str}", YELLOW), ghost_pos)
+
+        # reveal skill hud
+        if session.reveal_skill_cooldown>0:
+            reveal_str=f"Cooldown: {int(session.reveal_skill_cooldown)}s"
+        elif session.reveal_skill_active:
+            reveal_str=f"Reveal: {session.reveal_skill_timer:.1f}s"
+        else:
+            reveal_str="Ready"
+        canvas.blit(self.text(f"Reveal: {reveal_str}", YELLOW), reveal_pos)
+
+class EndlessScene(Scene):
+    """
+    Walk a chunks.EndlessSession: chunks stream in around the player as
+    it moves. No items, enemies or score; Menu or Escape leaves.
+    """
+    state=STATE_ENDLESS
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.key_handlers[pygame.K_ESCAPE]=lambda _e: game.switch(STATE_MENU)
+        self.click_handlers["Menu"]=self.go(STATE_MENU)
+        self.tick_time=0.0
+
+    def layout(self, lay):
+        self.game.camera.resize(*lay.view_size)
+        return [("Menu", lay.game_menu_rect)]
+
+    def update(self, dt):
+        endless=self.game.endless
+        self.tick_time=min(self.tick_time+dt, 5*TICK_DT)
+        while self.tick_time>=TICK_DT:
+            self.tick_time-=TICK_DT
+            endless.step(held_inputs(), TICK_DT)
+
+    def draw(self, canvas):
+        self.ensure_layout()
+        endless=self.game.endless
+        camera=self.game.camera
+        camera.follow(endless.player_x, endless.player_y)
+
+        canvas.begin_world(self.game.layout)
+        canvas.draw_world(endless.world, camera)
+        canvas.draw_player(endless.player_x, endless.player_y,
+                           endless.direction_degs, camera)
+        canvas.end_world()
+
+        self.draw_buttons(canvas)
+        tx=int(endless.player_x//TILE_SIZE)
+        ty=int(endless.player_y//TILE_SIZE)
+        stats=endless.world.stats()
+        pos_line, chunks_line = self.game.layout.hud_lines[:2]
+        canvas.blit(self.text(f"Seed {endless.seed}, tile ({tx}, {ty})"), pos_line)
+        canvas.blit(self.text(f"Chunks: {stats['resident_chunks']} resident, "
+                              f"{stats['generated']} generated", YELLOW), chunks_line)
+
+class InGameMenuScene(Scene):
+    state=STATE_INGAME_MENU
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.click_handlers.update({
+            "Resume": self.go(STATE_GAME),
+            "Reset Level": self.reset_level,
+            "Select Level": self.go(STATE_LEVEL_SELECT),
+            "Options": self.go(STATE_OPTIONS),
+            "Exit": lambda _l: game.quit(),
+        })
+
+    def layout(self, lay):
+        return lay.menu_column(["Resume","Reset Level","Select Level","Options","Exit"])
+
+    def reset_level(self, _label):
+        self.game.reset_level(self.game.current_level)
+        self.game.switch(STATE_GAME)
+
+    def draw(self, canvas):
+        canvas.fill((0,0,0))
+        t=self.text("In-Game Menu")
+        canvas.blit(t,(self.game.layout.center_x - t.get_width()//2,60))
+        super().draw(canvas)
+
+class UserSelectScene(BackScene):
+    state=STATE_USER_SELECT
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.click_handlers["New User"]=self.go(STATE_NEW_USER)
+
+    def layout(self, lay):
+        buttons=super().layout(lay)+lay.menu_column(["New User"])
+        yy=200
+        for usr in self.game.data["profiles"]:
+            # tuple labels, so a user called "Back" is still a user
+            buttons.append((("user", usr), lay.centered_rect(200, 40, yy+20)))
+            yy+=50
+        return buttons
+
+    def caption(self, label):
+        return label[1] if isinstance(label, tuple) else label
+
+    def on_click(self, label):
+        if isinstance(label, tuple):
+            self.game.switch_user(label[1])
+            save_profiles(self.game.data)
+            self.game.switch(STATE_MENU)
+        else:
+            super().on_click(label)
+
+    def draw(self, canvas):
+        super().draw(canvas)
+        t=self.text("Available Users:")
+        canvas.blit(t,(self.game.layout.center_x - t.get_width()//2, 160))
+
+class NewUserScene(Scene):
+    state=STATE_NEW_USER
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.new_user_text=""
+        self.user_message=""
+        self.key_handlers.update({
+            pygame.K_BACKSPACE: self.backspace,
+            pygame.K_RETURN: lambda _e: self.create(),
+        })
+        self.click_handlers["Create"]=lambda _l: self.create()
+
+    def layout(self, lay):
+        self.input_rect=lay.centered_rect(200, 40, 180)
+        return [("Create", lay.centered_rect(150, 40, 250))]
+
+    def on_key(self, event):
+        handler=self.key_handlers.get(event.key)
+        if handler:
+            handler(event)
+        elif len(self.new_user_text)<20 and event.unicode.isprintable():
+            self.new_user_text+=event.unicode
+
+    def backspace(self, _event):
+        self.new_user_text=self.new_user_text[:-1]
+
+    def create(self):
+        name=self.new_user_text.strip()
+        if not name:
+            return
+        if self.new_user_text in self.game.data["profiles"]:
+            self.user_message="Username already exists!"
+        else:
+            self.game.switch_user(name)
+            self.user_message="User created!"
+            self.game.switch(STATE_MENU)
+            save_profiles(self.game.data)
+
+    def draw(self, canvas):
+        self.blit_centered(canvas, "Enter username:", 120)
+        self.ensure_layout()
+        input_rect=self.input_rect
+        canvas.outline_rect(WHITE,input_rect,2)
+        canvas.blit(self.text(self.new_user_text),(input_rect.x+5,input_rect.y+5))
+        super().draw(canvas)
+        if self.user_message:
+            self.blit_centered(canvas, self.user_message, 300, (255,0,0))
+
+class EndLevelScene(Scene):
+    state=STATE_END_LEVEL
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.click_handlers.update({
+            "Next Level": self.next_level,
+            "Menu": self.go(STATE_MENU),
+        })
+
+    def layout(self, lay):
+        return lay.menu_column(["Next Level","Menu"])
+
+    def next_level(self, _label):
+        if self.game.current_level<self.game.level_count():
+            self.game.go_to_level(self.game.current_level+1)
+        else:
+            self.game.switch(STATE_MENU)
+
+    def draw(self, canvas):
+        cx=self.game.layout.center_x
+        canvas.blit(self.text("Level End Scoreboard"), (cx-100,50))
+        profile=self.game.profile
+        if profile:
+            ls=profile["level_scores"]
+            y=100
+            total=0
+            for lvl in range(1,MAX_LEVEL+1):
+                canvas.blit(self.text(f"Level {lvl} => {ls[lvl]} points"), (cx-100,y))
+                y+=30
+                total+=ls[lvl]
+            canvas.blit(self.text(f"Total = {total}", YELLOW), (cx-50,y))
+        super().draw(canvas)
+
+SCENES = (MenuScene, LevelSelectScene, OptionsScene, RulesScene, GameScene,
+          EndlessScene, InGameMenuScene, UserSelectScene, NewUserScene, EndLevelScene)
@@ -0,0 +1,341 @@
+# session.py
+#
+# In-level game state and the per-tick update, without pygame. main.py
+# feeds it one input bitmask per tick; replay.py feeds it recorded ones.
+# Given the level, seed and inputs, a run is fully deterministic: the
+# session keeps its own copy of the `random` state and swaps it in around
+# level generation and every tick.
+
+import math
+import random
+import itertools
+
+from config import (
+    TILE_SIZE, PLAYER_SPEED, TICK_RATE,
+    FOG_MODE, FOG_RADIUS, FOG_PRECOMPUTE, FOG_TABLE_MAX_TILES
+)
+from game_logic import (
+    setup_level, move_player_with_diagonal,
+    PassabilityMask, player_overlaps_wall,
+    update_fog_of_war_permanent
+)
+from enemies import move_enemies, check_enemy_collision
+from entities import ItemType
+from fov import FieldOfView, VisibilityTable, disc_tiles
+import metrics
+
+# per-tick input bits; movement keys are held, skills are key presses
+INPUT_UP = 1       # W
+INPUT_LEFT = 2     # A
+INPUT_DOWN = 4     # S
+INPUT_RIGHT = 8    # D
+INPUT_GHOST = 16   # SPACE
+INPUT_REVEAL = 32  # Q
+
+TICK_DT = 1.0/TICK_RATE
+
+EVENT_DIED = "died"
+EVENT_FINISHED = "finished"
+
+_fog_versions = itertools.count(1)   # fog_version values, unique across sessions
+
+def next_seed(seed):
+    """Seed of the level regenerated after dying on `seed`."""
+    return random.Random(seed).getrandbits(32)
+
+class GameSession:
+    """
+    One play-through of a level. reset_level() generates the level,
+    step() advances one tick and returns EVENT_DIED, EVENT_FINISHED or
+    None. Dying regenerates the level from next_seed(seed), or reloads
+    it when the run is on a levelfile.LevelFile.
+    """
+
+    def __init__(self, grid_size=None, nav=False, fog_mode=FOG_MODE):
+        self.grid_size=grid_size
+        self.nav=nav
+        self.fog_mode=fog_mode
+        self.level=1
+        self.seed=0
+        self.tick=0
+        self.deaths=0
+        self.finished=False
+        self.level_file=None
+        self.visibility=None
+        self.enemies=[]
+        self.fog_discovered=None
+        self.ephemeral_fog=None
+        self._lit=()   # tiles set in ephemeral_fog
+        self.fog_version=0   # changes whenever tile_visible() may answer differently
+        self._rng_state=None
+
+    def start(self, level, seed=None, level_file=None):
+        """
+        Begin a new run (tick and death counters restart). With a
+        level_file the level is loaded from it and `level` is ignored.
+        """
+        self.tick=0
+        self.deaths=0
+        self.level_file=level_file
+        if level_file is not None:
+            level=level_file.level
+        self.reset_level(level, seed)
+
+    def reset_level(self, level, seed=None):
+        if seed is None:
+            seed=random.getrandbits(32)
+        self.level=level
+        self.seed=seed
+
+        # reset skill
+        self.ghost_skill_active=False
+        self.ghost_skill_timer=0.0
+        self.ghost_skill_cooldown=0.0
+        self.ghost_skill_uses_left=3
+        self.ghost_skill_wall_passed=False
+
+        self.reveal_skill_active=False
+        self.reveal_skill_timer=0.0
+        self.reveal_skill_cooldown=0.0
+
+        self.keys=0   # held keys, bit k = key k
+        self.points_collected=0
+        self.keys_collected=0
+        self.direction_degs=0.0
+        self.finished=False
+
+        outer=random.getstate()
+        random.seed(seed)
+        (self.maze, self.items, self.background_color, self.enemies,
+         self.fog_discovered, self.points_in_level, self.keys_in_level,
+         self.nav_cache) = setup_level(level, self.grid_size, nav=self.nav,
+                                       level_file=self.level_file)
+        self._rng_state=random.getstate()
+        random.setstate(outer)
+
+        self.passability=PassabilityMask(self.maze, self.keys)
+        self.ephemeral_fog=None
+        self._lit=()
+        self.fog_tile=None
+        self.fog_bits=0
+        self.fog_bytes=None
+        self.fov=None
+        if self.visibility:
+            self.visibility.stop()
+            self.visibility=None
+        if level in (5, 6):
+            line_of_sight=self.fog_mode=="shadowcast"
+            if FOG_PRECOMPUTE and len(self.maze)*len(self.maze[0])<=FOG_TABLE_MAX_TILES:
+                # fog state is then the fog_bits bitset, not the nested lists
+                self.visibility=VisibilityTable(self.maze, FOG_RADIUS, line_of_sight)
+                self.visibility.start()
+                self.fog_discovered=None
+            elif line_of_sight:
+                self.fov=FieldOfView(self.maze, FOG_RADIUS)
+
+        self.player_x=1.5*TILE_SIZE
+        self.player_y=1.5*TILE_SIZE
+        self._update_fog()
+        if metrics.enabled:
+            metrics.LEVEL.set(level)
+            metrics.ENEMIES.set(len(self.enemies))
+
+    # ---------------------------------------------------------------------
+    def step(self, inputs, dt=TICK_DT):
+        """Advance one tick with the given input bits."""
+        if self.finished:
+            return None
+        outer=random.getstate()
+        random.setstate(self._rng_state)
+        event=None
+        try:
+            event=self._step(inputs, dt)
+        finally:
+            if event!=EVENT_DIED:
+                self._rng_state=random.getstate()
+            random.setstate(outer)
+        self.tick+=1
+        if event==EVENT_DIED:
+            self.deaths+=1
+            self.reset_level(self.level, next_seed(self.seed))
+        return event
+
+    def _step(self, inputs, dt):
+        if inputs & INPUT_GHOST:
+            if (not self.ghost_skill_active
+                and self.ghost_skill_cooldown<=0
+                and self.ghost_skill_uses_left>0):
+                self.ghost_skill_active=True
+                self.ghost_skill_timer=2.0
+                self.ghost_skill_cooldown=15.0
+                self.ghost_skill_uses_left-=1
+                self.ghost_skill_wall_passed=False
+        if inputs & INPUT_REVEAL:
+            if (not self.reveal_skill_active
+                and self.reveal_skill_cooldown<=0):
+                self.reveal_skill_active=True
+                self.reveal_skill_timer=5.0
+                self.reveal_skill_cooldown=20.0
+
+        # update skill timers
+        if self.ghost_skill_cooldown>0:
+            self.ghost_skill_cooldown-=dt
+            if self.ghost_skill_cooldown<0:
+                self.ghost_skill_cooldown=0
+        if self.ghost_skill_active:
+            self.ghost_skill_timer-=dt
+            if self.ghost_skill_timer<=0:
+                self.ghost_skill_active=False
+                # if still in wall, push out
+                if player_overlaps_wall(self.passability, self.player_x, self.player_y):
+                    tile_x=int(self.player_x//TILE_SIZE)
+                    tile_y=int(self.player_y//TILE_SIZE)
+                    if self.maze[tile_y][tile_x]==1:
+                        self.player_x=1.5*TILE_SIZE
+                        self.player_y=1.5*TILE_SIZE
+                    else:
+                        # snap to the centre of the floor tile
+                        self.player_x=(tile_x+0.5)*TILE_SIZE
+                        self.player_y=(tile_y+0.5)*TILE_SIZE
+                self.ghost_skill_wall_passed=False
+
+        if self.reveal_skill_cooldown>0:
+            self.reveal_skill_cooldown-=dt
+            if self.reveal_skill_cooldown<0:
+                self.reveal_skill_cooldown=0
+        if self.reveal_skill_active:
+            self.reveal_skill_timer-=dt
+            if self.reveal_skill_timer<=0:
+                self.reveal_skill_active=False
+
+        # movement
+        vel_x=vel_y=0
+        if inputs & INPUT_UP:
+            vel_y=-PLAYER_SPEED
+        if inputs & INPUT_DOWN:
+            vel_y=PLAYER_SPEED
+        if inputs & INPUT_LEFT:
+            vel_x=-PLAYER_SPEED
+        if inputs & INPUT_RIGHT:
+            vel_x=PLAYER_SPEED
+
+        if vel_x or vel_y:
+            self.direction_degs=math.degrees(math.atan2(vel_y,vel_x))
+
+        self.player_x, self.player_y, self.ghost_skill_wall_passed = \
+            move_player_with_diagonal(
+                self.player_x, self.player_y,
+                vel_x, vel_y,
+                self.passability,
+                self.ghost_skill_active, self.ghost_skill_wall_passed
+            )
+
+        # enemies
+        move_enemies(self.enemies, dt, len(self.maze[0]), len(self.maze))
+        if check_enemy_collision(self.player_x, self.player_y, self.enemies):
+            if metrics.enabled:
+                metrics.ENEMY_COLLISIONS.inc()
+            return EVENT_DIED
+
+        # item pickup
+        event=None
+        items=self.items
+        for it in items[:]:
+            dx=self.player_x-it.x
+            dy=self.player_y-it.y
+            if dx*dx+dy*dy<(TILE_SIZE//2)**2:
+                if it.kind==ItemType.POINT:
+                    items.remove(it)
+                    self.points_collected+=1
+                    if metrics.enabled:
+                        metrics.POINTS_COLLECTED.inc()
+                elif it.kind==ItemType.KEY:
+                    items.remove(it)
+                    self.keys_collected+=1
+                    self.keys|=1<<it.key
+                    self.passability.update_keys(self.keys)
+                    if metrics.enabled:
+                        metrics.KEYS_COLLECTED.inc()
+                elif it.kind==ItemType.PORTAL:
+                    if self.points_collected>=self.points_in_level:
+                        items.remove(it)
+                        self.finished=True
+                        event=EVENT_FINISHED
+                        if metrics.enabled:
+                            metrics.LEVELS_FINISHED.inc()
+
+        self._update_fog()
+        return event
+
+    def _update_fog(self):
+        # only recomputed when the player enters a new tile
+        new_tile=(int(self.player_x//TILE_SIZE), int(self.player_y//TILE_SIZE))
+        if new_tile==self.fog_tile:
+            return
+        self.fog_tile=new_tile
+        self.fog_version=next(_fog_versions)
+        if self.visibility:
+            mask=self.visibility.mask(*new_tile)
+            if self.level==5:
+                self.fog_bits|=mask
+            else:
+                self.fog_bits=mask
+            self.fog_bytes=self.visibility.to_bytes(self.fog_bits)
+        elif self.level==5 and self.fog_discovered:
+            # permanent
+            if self.fov:
+                self.fov.reveal(self.fog_discovered, *new_tile)
+            else:
+                update_fog_of_war_permanent(self.fog_discovered, self.player_x, self.player_y,
+                                            FOG_RADIUS)
+        elif self.level==6:
+            # one grid per level: unset the previous view, set the new one
+            w=len(self.maze[0])
+            grid=self.ephemeral_fog
+            if grid is None:
+                grid=self.ephemeral_fog=[[False]*w for _ in range(len(self.maze))]
+            for i in self._lit:
+                grid[i//w][i%w]=False
+            if self.fov:
+                self._lit=self.fov.visible(*new_tile)
+            else:
+                self._lit=disc_tiles(*new_tile, FOG_RADIUS, w, len(self.maze))
+            for i in self._lit:
+                grid[i//w][i%w]=True
+
+    # ---------------------------------------------------------------------
+    def fog_active(self):
+        """True if some tiles are currently hidden by fog."""
+        if self.reveal_skill_active:
+            return False
+        if self.fog_bytes is not None:
+            return True
+        return bool((self.level==5 and self.fog_discovered)
+                    or (self.level==6 and self.ephemeral_fog))
+
+    def tile_visible(self, x, y):
+        """Fog check for rendering: is tile (x, y) currently shown?"""
+        if self.reveal_skill_active:
+            return True
+        if self.fog_bytes is not None:
+            i=y*self.visibility.width+x
+            return self.fog_bytes[i>>3]>>(i&7) & 1
+        if self.level==5 and self.fog_discovered:
+            return self.fog_discovered[y][x]
+        elif self.level==6 and self.ephemeral_fog:
+            return self.ephemeral_fog[y][x]
+        return True
+
+    def snapshot(self):
+        """Small summary of the state, for comparing runs."""
+        return {
+            "level": self.level,
+            "seed": self.seed,
+            "tick": self.tick,
+            "deaths": self.deaths,
+            "finished": self.finished,
+            "player": (round(self.player_x, 3), round(self.player_y, 3)),
+            "points": self.points_collected,
+            "keys": self.keys_collected,
+            "enemies": [(round(e.x, 3), round(e.y, 3)) for e in self.enemies],
+        }
@@ -0,0 +1,107 @@
+# thumbnails.py
+#
+# Maze previews for the level select screen. A worker thread turns a
+# level's grid into a surface with one pixel per tile (a palette lookup,
+# through NumPy + pygame.surfarray when available, else bytes.translate),
+# scales it to the thumbnail box and caches the PNG on disk under the
+# level file's digest. The UI thread only asks for the finished surface,
+# so it never waits on disk or pixel work. Previews exist for pack levels
+# only: generating a procedural level would use the global `random`
+# state, which the running session owns.
+
+import os
+import queue
+import threading
+import pygame
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from config import WALL_COLOR, DOOR_COLORS, THUMBNAIL_DIR
+
+FLOOR_COLOR=(20,20,20)
+
+def _palette():
+    colors={0: FLOOR_COLOR, 1: WALL_COLOR}
+    colors.update(DOOR_COLORS)
+    return [colors.get(v, FLOOR_COLOR) for v in range(256)]
+
+PALETTE=_palette()
+# one translate table per channel for the fallback path
+_CHANNELS=[bytes(c[i] for c in PALETTE) for i in range(3)]
+
+def grid_surface(width, height, grid):
+    """Surface with one pixel per tile of a row-major uint8 grid."""
+    if numpy is not None:
+        tiles=numpy.frombuffer(grid, dtype=numpy.uint8).reshape(height, width)
+        rgb=numpy.array(PALETTE, dtype=numpy.uint8)[tiles]
+        return pygame.surfarray.make_surface(rgb.swapaxes(0, 1))
+    grid=bytes(grid)
+    rgb=bytearray(3*width*height)
+    for i,table in enumerate(_CHANNELS):
+        rgb[i::3]=grid.translate(table)
+    return pygame.image.frombuffer(bytes(rgb), (width, height), "RGB")
+
+def fit_size(width, height, box):
+    """Largest size with the grid's aspect ratio that fits in box."""
+    scale=min(box[0]/width, box[1]/height)
+    return max(1, int(width*scale)), max(1, int(height*scale))
+
+class Thumbnailer:
+    """
+    Background previews of a levelpacks.LevelPack. get(n) returns the
+    surface for level n, or None (and queues it) while it is not ready.
+    """
+
+    def __init__(self, pack, box=(96, 50), cache_dir=THUMBNAIL_DIR):
+        self.pack=pack
+        self.box=box
+        self.cache_dir=cache_dir
+        self.surfaces={}
+        self._queued=set()
+        self._jobs=queue.Queue()
+        self._thread=threading.Thread(target=self._work, name="thumbnails", daemon=True)
+        self._thread.start()
+
+    def get(self, n):
+        surf=self.surfaces.get(n)
+        if surf is None and n not in self._queued:
+            self._queued.add(n)
+            self._jobs.put(n)
+        return surf
+
+    def close(self):
+        self._jobs.put(None)
+
+    # worker ---------------------------------------------------------------
+    def _work(self):
+        while True:
+            n=self._jobs.get()
+            if n is None:
+                return
+            try:
+                surf=self._make(n)
+            except (OSError, ValueError, pygame.error) as e:
+                print(f"No thumbnail for level {n}: {e}")
+                continue
+            self.surfaces[n]=surf  # a single dict store: safe to read from the UI
+
+    def _make(self, n):
+        lf=self.pack.read(n)
+        path=None
+        if self.cache_dir:
+            path=os.path.join(self.cache_dir, f"{lf.digest()}_{self.box[0]}x{self.box[1]}.png")
+            if os.path.exists(path):
+                return pygame.image.load(path)
+        surf=grid_surface(lf.width, lf.height, lf.grid)
+        size=fit_size(lf.width, lf.height, self.box)
+        if size[0]<lf.width:
+            surf=pygame.transform.smoothscale(surf, size)  # keep thin walls visible
+        else:
+            surf=pygame.transform.scale(surf, size)
+        if path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            pygame.image.save(surf, path)
+        return surf
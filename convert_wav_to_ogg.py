@@ -1,8 +1,150 @@
 import os
-from tkinter import Tk, filedialog
-from pydub import AudioSegment
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Supported formats
+SUPPORTED_FORMATS = [".wav", ".aiff", ".mp3"]
+
+# Hash manifest written to the output directory so unchanged inputs are skipped
+MANIFEST_NAME = ".convert_manifest.json"
+
+DEFAULT_QUALITY = 5  # libvorbis -q:a, 0 (smallest) .. 10 (best)
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def output_path_for(input_path, output_dir):
+    base = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(output_dir, base + ".ogg")
+
+def convert_one(input_path, output_path, quality=DEFAULT_QUALITY):
+    """Convert a single file with pydub/ffmpeg. Returns (seconds, bytes_in)."""
+    # Imported here so worker processes pick it up and the module stays importable
+    from pydub import AudioSegment
+
+    start = time.perf_counter()
+    file_extension = os.path.splitext(input_path)[1].lower()
+    # Load the audio file based on its format (removes the dot, e.g. "wav")
+    audio = AudioSegment.from_file(input_path, format=file_extension[1:])
+    audio.export(output_path, format="ogg", codec="libvorbis",
+                 parameters=["-q:a", str(quality)])
+    return time.perf_counter() - start, os.path.getsize(input_path)
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    return {}
+
+def save_manifest(output_dir, manifest):
+    with open(os.path.join(output_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+def output_collisions(file_paths, output_dir):
+    """
+    {output path: [inputs]} for outputs that more than one input maps to,
+    e.g. a.wav and a.mp3 both -> a.ogg.
+    """
+    sources = {}
+    for input_path in file_paths:
+        if os.path.splitext(input_path)[1].lower() not in SUPPORTED_FORMATS:
+            continue
+        out = output_path_for(input_path, output_dir)
+        sources.setdefault(os.path.normcase(out), []).append(input_path)
+    return {out: inputs for out, inputs in sources.items() if len(inputs) > 1}
+
+def collect_inputs(input_dir):
+    paths = []
+    for name in sorted(os.listdir(input_dir)):
+        if os.path.splitext(name)[1].lower() in SUPPORTED_FORMATS:
+            paths.append(os.path.join(input_dir, name))
+    return paths
+
+def convert_batch(file_paths, output_dir, quality=DEFAULT_QUALITY,
+                  workers=None, force=False):
+    """
+    Convert files in parallel with a process pool.
+    Inputs whose content hash (and quality) match the manifest and whose
+    output still exists are skipped. Returns a summary dict. Raises
+    ValueError, before converting anything, if two inputs would write the
+    same output file.
+    """
+    collisions = output_collisions(file_paths, output_dir)
+    if collisions:
+        lines = [f"{out} <- {', '.join(os.path.basename(p) for p in inputs)}"
+                 for out, inputs in sorted(collisions.items())]
+        raise ValueError("inputs share an output name; rename one of each:\n  "
+                         + "\n  ".join(lines))
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+
+    jobs = []
+    skipped = 0
+    for input_path in file_paths:
+        file_name = os.path.basename(input_path)
+        if os.path.splitext(file_name)[1].lower() not in SUPPORTED_FORMATS:
+            print(f"Skipping unsupported file: {file_name}")
+            continue
+        out = output_path_for(input_path, output_dir)
+        digest = file_sha256(input_path)
+        entry = manifest.get(os.path.basename(out))
+        if (not force and entry and entry.get("sha256") == digest
+                and entry.get("quality") == quality and os.path.exists(out)):
+            print(f"Unchanged: {file_name}")
+            skipped += 1
+            continue
+        jobs.append((input_path, out, digest))
+
+    total_bytes = 0
+    converted = 0
+    failed = 0
+    wall_start = time.perf_counter()
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(convert_one, inp, out, quality): (inp, out, digest)
+                       for inp, out, digest in jobs}
+            for fut in as_completed(futures):
+                inp, out, digest = futures[fut]
+                name = os.path.basename(inp)
+                try:
+                    secs, size = fut.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"FAILED: {name}: {e}")
+                    continue
+                converted += 1
+                total_bytes += size
+                manifest[os.path.basename(out)] = {
+                    "source": name, "sha256": digest, "quality": quality
+                }
+                print(f"Converted: {name} -> {out} ({secs:.2f}s)")
+        save_manifest(output_dir, manifest)
+    wall = time.perf_counter() - wall_start
+
+    summary = {
+        "converted": converted, "skipped": skipped, "failed": failed,
+        "seconds": wall,
+        "files_per_sec": converted / wall if wall > 0 else 0.0,
+        "mb_per_sec": total_bytes / (1024 * 1024) / wall if wall > 0 else 0.0,
+    }
+    print(f"Done: {converted} converted, {skipped} unchanged, {failed} failed "
+          f"in {wall:.2f}s ({summary['files_per_sec']:.2f} files/s, "
+          f"{summary['mb_per_sec']:.2f} MB/s)")
+    return summary
+
+def convert_audio_to_ogg(quality=DEFAULT_QUALITY, workers=None):
+    """Tk front end: pick files and an output directory, then batch convert."""
+    from tkinter import Tk, filedialog
 
-def convert_audio_to_ogg():
     # Hide the Tkinter root window
     root = Tk()
     root.withdraw()
@@ -26,26 +168,40 @@ def convert_audio_to_ogg():
         print("No output directory selected. Exiting.")
         return
 
-    # Supported formats
-    supported_formats = [".wav", ".aiff", ".mp3"]
-
-    for input_path in file_paths:
-        file_name = os.path.basename(input_path)
-        file_extension = os.path.splitext(file_name)[1].lower()
-
-        if file_extension not in supported_formats:
-            print(f"Skipping unsupported file: {file_name}")
-            continue
-
-        output_path = os.path.join(output_dir, file_name.replace(file_extension, ".ogg"))
-
-        # Load the audio file based on its format
-        audio = AudioSegment.from_file(input_path, format=file_extension[1:])  # Removes the dot (e.g., "wav", "aiff", "mp3")
+    try:
+        convert_batch(file_paths, output_dir, quality=quality, workers=workers)
+    except ValueError as e:
+        print(f"Not converting: {e}")
 
-        # Export as .ogg
-        audio.export(output_path, format="ogg")
-        print(f"Converted: {file_name} -> {output_path}")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convert .wav/.aiff/.mp3 files to .ogg (needs ffmpeg). "
+                    "Without an input directory the Tk file dialogs are used.")
+    parser.add_argument("input_dir", nargs="?", help="directory of source audio files")
+    parser.add_argument("output_dir", nargs="?", help="directory for .ogg output")
+    parser.add_argument("-q", "--quality", type=int, default=DEFAULT_QUALITY,
+                        help="vorbis quality 0-10 (default: %(default)s)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true",
+                        help="re-encode even if the input hash is unchanged")
+    args = parser.parse_args(argv)
+    if args.input_dir and not args.output_dir:
+        parser.error("output_dir is required with input_dir")
+    if not 0 <= args.quality <= 10:
+        parser.error("quality must be between 0 and 10")
+    return args
 
 # Run the function
 if __name__ == "__main__":
-    convert_audio_to_ogg()
+    args = parse_args()
+    if args.input_dir:
+        try:
+            summary = convert_batch(collect_inputs(args.input_dir), args.output_dir,
+                                    quality=args.quality, workers=args.workers,
+                                    force=args.force)
+        except ValueError as e:
+            sys.exit(f"error: {e}")
+        sys.exit(1 if summary["failed"] else 0)
+    else:
+        convert_audio_to_ogg(quality=args.quality, workers=args.workers)
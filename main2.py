@@ -1,6 +1,8 @@
-# Linux: pyinstaller --onefile --icon=game_icon.ico --add-data "sounds:sounds" main2.py
+# Linux: pyinstaller --onefile --icon=game_icon.ico --add-data "sounds:sounds" --paths combined main2.py
 #
-# Win: pyinstaller --onefile --icon=game_icon.ico --add-data "sounds;sounds" main2.py
+# Win: pyinstaller --onefile --icon=game_icon.ico --add-data "sounds;sounds" --paths combined main2.py
+#
+# (or: pyinstaller main2.spec). Profiling options are those of combined/profiling.py.
 
 import pygame
 import sys
@@ -8,8 +10,12 @@ import random
 import json
 import os
 import math
+import argparse
 from collections import defaultdict, deque
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "combined"))
+import profiling
+
 # -------------------------------------------------------------------------
 # GLOBAL CONFIG
 # -------------------------------------------------------------------------
@@ -436,7 +442,16 @@ def draw_button(screen, rect, text, font,
     screen.blit(lbl, lbl_rect)
 
 # -------------------------------------------------------------------------
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Christmas Game")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.profile == "pyinstrument" and profiling.pyinstrument is None:
+        parser.error("--profile pyinstrument needs the pyinstrument package")
+    return args
+
+def main(argv=None):
+    profiler = profiling.from_args(parse_args(argv))
     pygame.init()          # <-- Add this line
     pygame.mixer.init()
 
@@ -476,9 +491,13 @@ def main():
     level_finish_sound = pygame.mixer.Sound(SFX_LEVEL_FIN)
     level_start_sound = pygame.mixer.Sound(SFX_LEVEL_START)
 
-    # A helper to start music
+    # A helper to start music; a file that is already loaded is just restarted
+    loaded_music = None
     def play_music(music_file, loop=-1, volume=1.0):
-        pygame.mixer.music.load(music_file)
+        nonlocal loaded_music
+        if music_file != loaded_music:
+            pygame.mixer.music.load(music_file)
+            loaded_music = music_file
         pygame.mixer.music.set_volume(volume)
         pygame.mixer.music.play(loop)
 
@@ -656,6 +675,8 @@ def main():
         now_time = pygame.time.get_ticks()/1000.0
         dt = now_time - prev_time
         prev_time = now_time
+        if profiler:
+            profiler.update(game_state, current_level)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -1279,6 +1300,8 @@ def main():
         pygame.display.flip()
         clock.tick(60)
 
+    if profiler:
+        profiler.close()
     save_profiles(data)
     pygame.quit()
     sys.exit()
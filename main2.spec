@@ -3,7 +3,7 @@
 
 a = Analysis(
     ['main2.py'],
-    pathex=[],
+    pathex=['combined'],
     binaries=[],
     datas=[('sounds', 'sounds')],
     hiddenimports=[],
@@ -0,0 +1,58 @@
+# test_ghost_walls.py
+#
+# The ghost skill lets the player through one wall per use. A step that
+# lands the player's box on a corner (an L of wall tiles) must not count
+# as entering one wall, or the next steps treat both arms as "already
+# inside" (see game_logic._sweep_axis).
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "combined"))
+
+from config import TILE_SIZE, PLAYER_HALF_SIZE, PLAYER_SPEED
+from game_logic import PassabilityMask, _sweep_axis, move_player_with_diagonal
+
+# 8x8 floor with an L of walls: corner (4,4), arms (4,5) and (5,4)
+CORNER = {(4, 4), (4, 5), (5, 4)}
+
+def corner_mask():
+    maze=[[0]*8 for _ in range(8)]
+    for tx,ty in CORNER:
+        maze[ty][tx]=1
+    return PassabilityMask(maze)
+
+def walls_under(mask, px, py):
+    h=PLAYER_HALF_SIZE
+    return {(tx, ty)
+            for ty in range(int((py-h)//TILE_SIZE), int((py+h-1)//TILE_SIZE)+1)
+            for tx in range(int((px-h)//TILE_SIZE), int((px+h-1)//TILE_SIZE)+1)
+            if mask.is_wall(tx, ty)}
+
+def test_step_onto_corner_is_refused():
+    mask=corner_mask()
+    # from the middle of floor tile (3,3) onto the 2x2 tiles (4..5, 4..5)
+    assert _sweep_axis(mask, 3.5*TILE_SIZE, 3.5*TILE_SIZE, 5*TILE_SIZE, 5*TILE_SIZE,
+                       True, False) == (False, False)
+
+def test_step_into_one_wall_is_allowed_once():
+    mask=corner_mask()
+    # straddling rows 4 and 5, stepping right into the column (4,4)-(4,5)
+    y=5*TILE_SIZE
+    x0=3.5*TILE_SIZE
+    x1=4*TILE_SIZE+PLAYER_HALF_SIZE-4
+    assert _sweep_axis(mask, x0, y, x1, y, True, False) == (True, True)
+    assert _sweep_axis(mask, x0, y, x1, y, True, True) == (False, False)
+    assert _sweep_axis(mask, x0, y, x1, y, False, False) == (False, False)
+
+def test_diagonal_walk_into_corner_stays_in_one_wall():
+    mask=corner_mask()
+    for start in ((3.5, 3.5), (3.5, 4.6), (4.6, 3.5), (3.7, 3.9)):
+        px, py = start[0]*TILE_SIZE, start[1]*TILE_SIZE
+        passed=False
+        seen=set()
+        for _ in range(120):   # one 2 s ghost use at 60 ticks/s
+            px, py, passed = move_player_with_diagonal(px, py, PLAYER_SPEED, PLAYER_SPEED,
+                                                       mask, True, passed)
+            seen|=walls_under(mask, px, py)
+        assert len({tx for tx,_ in seen})==1 or len({ty for _,ty in seen})==1, (start, seen)
@@ -0,0 +1,27 @@
+# test_memory_resets.py
+#
+# Leak regression test: 1000 headless level resets (see combined/memdiag.py)
+# must not make any level's traced memory grow. Takes a minute or two,
+# mostly the fog tables of levels 5 and 6 being filled under tracemalloc.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "combined"))
+
+from memdiag import MemoryTracker, run_resets
+
+RESETS = 1000
+LEVELS = [1, 2, 3, 4, 5, 6]
+WARMUP = 120          # loads before the baseline, a multiple of len(LEVELS)
+LIMIT = 256*1024      # bytes a level may grow by; layouts vary by ~20 KiB
+
+def test_memory_bounded_over_resets():
+    tracker=MemoryTracker()
+    try:
+        sizes=run_resets(RESETS, LEVELS, nav=False, tracker=tracker, warmup=WARMUP)
+    finally:
+        tracker.stop()
+    for level,values in sizes.items():
+        growth=values[-1]-values[WARMUP//len(LEVELS)]
+        assert growth<LIMIT, f"level {level} grew by {growth/1024:.1f} KiB over {RESETS} resets"
@@ -0,0 +1,56 @@
+# test_replay_grid.py
+#
+# A run recorded on a non-default grid (main.py --grid) must replay with
+# `main.py --replay` alone: the game has to regenerate the level at the
+# recorded size, not at the default one.
+
+import os
+import sys
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "combined"))
+
+import pygame
+
+from session import GameSession, INPUT_UP, INPUT_LEFT, INPUT_DOWN, INPUT_RIGHT
+from replay import Recorder, Replay
+
+GRID = (64, 40)
+LEVEL = 2
+SEED = 3162779942
+TICKS = 1200
+
+def record(path):
+    """Play TICKS random inputs on GRID; return the session's end state."""
+    rng=random.Random(7)
+    session=GameSession(GRID)
+    session.start(LEVEL, SEED)
+    recorder=Recorder(LEVEL, session.seed, GRID)
+    inputs=0
+    for tick in range(TICKS):
+        if tick%30==0:
+            inputs=rng.choice((INPUT_UP, INPUT_LEFT, INPUT_DOWN, INPUT_RIGHT,
+                               INPUT_UP|INPUT_RIGHT, INPUT_DOWN|INPUT_LEFT))
+        recorder.add(inputs)
+        session.step(inputs)
+    recorder.save(path)
+    return session.snapshot()
+
+def test_replay_uses_recorded_grid(tmp_path, monkeypatch):
+    path=str(tmp_path/"run.cgrp")
+    expected=record(path)
+    assert Replay.load(path).grid_size==GRID
+
+    monkeypatch.chdir(tmp_path)   # profiles file
+    import main
+    pygame.init()
+    try:
+        game=main.Game(main.parse_args(["--replay", path]))
+        session=game.session
+        assert (len(session.maze[0]), len(session.maze))==GRID
+        assert session.seed==SEED
+        game.replay.fast_forward(session, TICKS)
+        assert session.snapshot()==expected
+    finally:
+        pygame.quit()
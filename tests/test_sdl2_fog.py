@@ -0,0 +1,55 @@
+# test_sdl2_fog.py
+#
+# TextureCanvas keeps the maze and fog as cached runs of filled tiles and
+# only rebuilds them when the visible tile range or session.fog_version
+# changes. Walking through a fogged level must still give the same pixels
+# as the plain SurfaceCanvas on every frame.
+
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "combined"))
+
+import pygame
+import pytest
+
+from camera import Camera
+from rendering import SurfaceCanvas
+from session import GameSession, INPUT_RIGHT, INPUT_DOWN
+
+SIZE = (640, 360)
+
+def test_fog_matches_surface_canvas():
+    pygame.init()
+    try:
+        try:
+            from rendering_sdl2 import TextureCanvas
+            tc=TextureCanvas("maximized", software=True)
+        except (ImportError, pygame.error) as e:
+            pytest.skip(f"sdl2 renderer unavailable: {e}")
+        tc.window.size=SIZE
+        screen=pygame.Surface(SIZE)
+        sc=SurfaceCanvas.for_surface(screen)
+
+        session=GameSession((64, 40), nav=False)
+        session.start(6, 1234)
+        assert session.fog_active()
+        camera=Camera(*SIZE, 0, 0)
+        camera.set_world(64, 40)
+        versions=set()
+        for tick in range(240):
+            session.step(INPUT_RIGHT if tick//40%2==0 else INPUT_DOWN)
+            if tick%8:
+                continue
+            camera.follow(session.player_x, session.player_y)
+            versions.add(session.fog_version)
+            for canvas in (sc, tc):
+                canvas.fill((20, 20, 20))
+                canvas.draw_maze(session.maze, camera)
+                canvas.draw_fog(camera, session.tile_visible, session.fog_version)
+            assert (pygame.image.tobytes(tc.renderer.to_surface(), "RGB")
+                    ==pygame.image.tobytes(screen, "RGB")), tick
+        assert len(versions)>1   # the fog moved with the player
+    finally:
+        pygame.quit()